@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+""" Synthetic nets in the format of PetriWidget.graph """
+
+
+class GraphBuilder:
+    """ Collects the cells of a graph, ids are assigned in order of creation """
+
+    def __init__(self, event_attrs=False):
+        self.cells = []
+        self.event_attrs = event_attrs
+        self._places = 0
+        self._transitions = 0
+        self._links = 0
+
+    def place(self, tokens=0):
+        self._places += 1
+        pid = "p%d" % self._places
+        self.cells.append({"type": "Place", "id": pid, "name": pid, "tokens": tokens})
+        return pid
+
+    def transition(self, name=None, conditions=[], exectime=600, eventattrs=None):
+        self._transitions += 1
+        tid = "t%d" % self._transitions
+        if eventattrs is None:
+            eventattrs = ["cost=np.random.exponential(scale=50)"] if self.event_attrs else []
+        self.cells.append({"type": "Transition", "id": tid, "name": name or "task %d" % self._transitions,
+                           "conditions": list(conditions), "exectime": exectime, "eventattrs": list(eventattrs)})
+        return tid
+
+    def link(self, source, target, prob=1):
+        self._links += 1
+        self.cells.append({"type": "Link", "id": "l%d" % self._links, "source": source, "target": target,
+                           "prob": prob})
+
+    def step(self, source, **kwargs):
+        """ Adds a transition consuming from source and producing into a new place """
+
+        t = self.transition(**kwargs)
+        self.link(source, t)
+        target = self.place()
+        self.link(t, target)
+        return target
+
+
+def sequence(size, event_attrs=False):
+    """ A chain of size transitions """
+
+    g = GraphBuilder(event_attrs)
+    p = g.place(tokens=1)
+    for _ in range(size):
+        p = g.step(p)
+    return g.cells
+
+
+def and_split(size, event_attrs=False):
+    """ A split into size concurrent branches and their join """
+
+    g = GraphBuilder(event_attrs)
+    split = g.transition(name="split")
+    g.link(g.place(tokens=1), split)
+    join = g.transition(name="join")
+    for _ in range(size):
+        branch = g.place()
+        g.link(split, branch)
+        done = g.step(branch)
+        g.link(done, join)
+    g.link(join, g.place())
+    return g.cells
+
+
+def xor_tree(size, event_attrs=False, branching=2):
+    """ Nested exclusive choices, size is the depth of a tree with branching choices per level """
+
+    g = GraphBuilder(event_attrs)
+    end = g.place()
+    level = [g.place(tokens=1)]
+    for _ in range(size):
+        following = []
+        for p in level:
+            for _ in range(branching):
+                t = g.transition()
+                g.link(p, t, prob=1 / branching)
+                q = g.place()
+                g.link(t, q)
+                following.append(q)
+        level = following
+    for p in level:
+        t = g.transition()
+        g.link(p, t)
+        g.link(t, end)
+    return g.cells
+
+
+def loop(size, event_attrs=False, repeat=0.3):
+    """ A chain of size transitions that is repeated with probability repeat """
+
+    g = GraphBuilder(event_attrs)
+    start = p = g.place(tokens=1)
+    for _ in range(size):
+        p = g.step(p)
+    again = g.transition(name="repeat")
+    g.link(p, again, prob=repeat)
+    g.link(again, start)
+    done = g.transition(name="finish")
+    g.link(p, done, prob=1 - repeat)
+    g.link(done, g.place())
+    return g.cells
+
+
+def conditioned(size, event_attrs=False):
+    """ An attribute drawn once, then size transitions guarded by disjoint conditions on it """
+
+    g = GraphBuilder(event_attrs)
+    p = g.step(g.place(tokens=1), name="register", eventattrs=["amount=np.random.uniform(0, %d)" % size])
+    end = g.place()
+    for i in range(size):
+        t = g.transition(conditions=["amount >= %d" % i, "amount < %d" % (i + 1)])
+        g.link(p, t)
+        g.link(t, end)
+    return g.cells
+
+
+SHAPES = {
+    "sequence": sequence,
+    "and_split": and_split,
+    "xor_tree": xor_tree,
+    "loop": loop,
+    "conditioned": conditioned,
+}
+
+# case attributes used together with event_attrs=True
+CASE_ATTRS = [
+    "priority: np.random.choice(['low', 'medium', 'high'])",
+    "budget: np.random.normal(loc=1000, scale=100)",
+]
+
+
+def generate(shape, size, attrs=False):
+    """ Returns the cells and the case attributes of a synthetic net """
+
+    return SHAPES[shape](size, event_attrs=attrs), (CASE_ATTRS if attrs else [])
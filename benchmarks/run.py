@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Benchmarks of net construction, simulation and noise functions
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --compare results.json
+
+Every benchmark reports the best wall time of --repeat runs and the peak memory
+traced (in a separate run) by tracemalloc. Results written with --output can be
+compared with a later run via --compare.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import datetime
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from ipypetrinet import PetriWidget, __version__
+from .generators import generate
+
+
+SIZES = {
+    # net size per shape, number of traces and number of cases of the noisy logs
+    "quick": {"nets": {"sequence": 10, "and_split": 5, "xor_tree": 4, "loop": 5, "conditioned": 10},
+              "build": [100, 1000], "traces": [1000], "cases": [1000, 10000]},
+    "full": {"nets": {"sequence": 50, "and_split": 20, "xor_tree": 6, "loop": 10, "conditioned": 50},
+             "build": [100, 1000, 5000], "traces": [1000, 10000], "cases": [1000, 10000, 100000]},
+}
+
+NOISE = ["strip_start", "strip_end", "addDoubles", "addSilence", "switchTimestamps"]
+
+
+def measure(func, repeat=3, memory=True, setup=None):
+    '''
+    Returns the result of func, its best wall time and (if memory) its peak of traced memory in MB
+
+    If setup is given, it is called before every run (untimed and untraced) and func gets its result.
+    '''
+
+    def prepare():
+        return () if setup is None else (setup(),)
+
+    best = None
+    for _ in range(repeat):
+        args = prepare()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if memory:
+        # tracing slows everything down, so memory is measured in a run of its own
+        args = prepare()
+        tracemalloc.start()
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def record(results, name, params, seconds, peak, **metrics):
+    entry = {"name": name, "params": params, "seconds": seconds, "peak_mb": peak}
+    entry.update(metrics)
+    results.append(entry)
+    print("%-18s %-70s %10.4fs %s" % (name, json.dumps(params, sort_keys=True), seconds,
+                                      " ".join("%s=%.0f" % item for item in metrics.items())))
+
+
+def bench_build(results, sizes, repeat, memory):
+    """ createPetriNet on sequences of growing size """
+
+    w = PetriWidget()
+    for size in sizes["build"]:
+        graph, _ = generate("sequence", size)
+        _, seconds, peak = measure(lambda: w.createPetriNet(graph), repeat, memory)
+        record(results, "createPetriNet", {"shape": "sequence", "size": size}, seconds, peak,
+               nodes_per_s=2 * size / seconds)
+
+
+def bench_playout(results, sizes, repeat, memory, engines):
+    """ apply_playout (pm4py EventLog), simulation and DataFrame conversion per shape """
+
+    w = PetriWidget()
+    for shape, size in sizes["nets"].items():
+        graph, case_attrs = generate(shape, size, attrs=True)
+        net, trans, links, initial_marking = w.createPetriNet(graph)
+        smap = w.build_smap(trans, links)
+
+        for no_traces in sizes["traces"]:
+            params = {"shape": shape, "size": size, "traces": no_traces}
+
+            log, seconds, peak = measure(lambda: w.apply_playout(net, initial_marking, case_attrs=case_attrs,
+                                                                 no_traces=no_traces, smap=smap, seed=0),
+                                         repeat, memory)
+            events = sum(len(trace) for trace in log)
+            record(results, "apply_playout", params, seconds, peak,
+                   traces_per_s=no_traces / seconds, events_per_s=events / seconds)
+
+            for engine in engines:
+                def simulate():
+                    columns = w.simulate_traces(net, initial_marking, case_attrs=case_attrs, no_traces=no_traces,
+                                                smap=smap, engine=engine, seed=0)
+                    return columns, w.assign_timestamps(columns.durations)[0]
+
+                (columns, timestamps), seconds, peak = measure(simulate, repeat, memory)
+                record(results, "simulate", dict(params, engine=engine), seconds, peak,
+                       traces_per_s=no_traces / seconds, events_per_s=len(columns) / seconds)
+
+            _, seconds, peak = measure(lambda: columns.to_dataframe(timestamps), repeat, memory)
+            record(results, "to_dataframe", params, seconds, peak, events_per_s=len(columns) / seconds)
+
+
+def bench_noise(results, sizes, repeat, memory):
+    """ Every noise function on logs of growing number of cases """
+
+    w = PetriWidget()
+    graph, _ = generate("sequence", 10)
+    net, trans, links, initial_marking = w.createPetriNet(graph)
+    smap = w.build_smap(trans, links)
+
+    for cases in sizes["cases"]:
+        columns = w.simulate_traces(net, initial_marking, no_traces=cases, smap=smap, engine="compiled", seed=0)
+        log = columns.to_dataframe(w.assign_timestamps(columns.durations)[0])
+
+        for name in NOISE:
+            method = getattr(w, name)
+            random.seed(0)
+            np.random.seed(0)
+            # the in-place functions get a fresh copy for every run, copied outside of the timing
+            _, seconds, peak = measure(method, repeat, memory, setup=log.copy)
+            record(results, name, {"cases": cases}, seconds, peak, events_per_s=len(log) / seconds)
+
+
+def environment():
+    import pm4py
+    return {
+        "ipypetrinet": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pm4py": pm4py.__version__,
+        "machine": platform.platform(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(old, new):
+    """ Prints the change of the wall times of all benchmarks present in both results """
+
+    def key(entry):
+        return entry["name"], json.dumps(entry["params"], sort_keys=True)
+
+    previous = {key(entry): entry for entry in old["results"]}
+    print("\n%-18s %-70s %10s %10s %8s" % ("benchmark", "params", "before", "after", "ratio"))
+    for entry in new["results"]:
+        before = previous.get(key(entry))
+        if before is None:
+            continue
+        ratio = entry["seconds"] / before["seconds"]
+        # a ratio above 1 means slower than before
+        print("%-18s %-70s %9.4fs %9.4fs %7.2fx" % (key(entry) + (before["seconds"], entry["seconds"], ratio)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of ipypetrinet")
+    parser.add_argument("--quick", action="store_true", help="small sizes only")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (the best is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--suite", action="append", choices=["build", "playout", "noise"],
+                        help="suites to run (default: all)")
+    parser.add_argument("--engine", action="append", choices=["pm4py", "compiled", "batched"],
+                        help="simulation engines (default: pm4py and compiled)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    suites = args.suite or ["build", "playout", "noise"]
+    memory = not args.no_memory
+    results = []
+
+    if "build" in suites:
+        bench_build(results, sizes, args.repeat, memory)
+    if "playout" in suites:
+        bench_playout(results, sizes, args.repeat, memory, args.engine or ["pm4py", "compiled"])
+    if "noise" in suites:
+        bench_noise(results, sizes, args.repeat, memory)
+
+    run = {"environment": environment(), "sizes": sizes, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), run)
+    return run
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,6 +5,8 @@
 # Distributed under the terms of the Modified BSD License.
 
 from .widget import PetriWidget
+from .timestamps import WorkCalendar
+from .pnml import iter_pnml, read_pnml, write_pnml
 from ._version import __version__, version_info
 
 def _jupyter_labextension_paths():
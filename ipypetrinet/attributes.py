@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import ast
+import numpy as np
+
+from collections import namedtuple
+from .randomness import case_block_random_state
+
+
+# distributions of the attribute dialog of the widget
+DISTRIBUTIONS = ("choice", "normal", "binomial", "gamma", "exponential")
+
+# cases whose structured attributes are drawn from one stream (fixed, so the values of a
+# case do not depend on how the cases are sharded or chunked)
+CASE_BLOCK = 1024
+
+
+class AttributeSpec(namedtuple("AttributeSpec", ["name", "distribution", "args", "kwargs"])):
+    """ Case attribute drawn from a numpy distribution with literal parameters """
+
+    def sample(self, size=None, rng=None):
+        """ Draws size values (one value if size is None) from rng (default: global numpy random state) """
+
+        if rng is None:
+            rng = np.random
+        return getattr(rng, self.distribution)(*self.args, size=size, **self.kwargs)
+
+
+def parse_case_attr(caseattr):
+    '''
+    Parse a case attribute as given in PetriWidget.caseAttrs
+
+    Parameters
+    ------------------------------------
+    caseattr
+        String of form "name: np.random.<distribution>(<literal parameters>)"
+
+    Returns its AttributeSpec or None if it is any other expression.
+    '''
+
+    name, sep, expression = caseattr.partition(": ")
+    if not sep:
+        return None
+    try:
+        call = ast.parse(expression.strip(), mode="eval").body
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                and call.func.attr in DISTRIBUTIONS and isinstance(call.func.value, ast.Attribute)
+                and call.func.value.attr == "random" and isinstance(call.func.value.value, ast.Name)
+                and call.func.value.value.id == "np"):
+            return None
+        args = tuple(ast.literal_eval(arg) for arg in call.args)
+        kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+    except (SyntaxError, ValueError, TypeError):
+        return None
+    # **kwargs and sizes are left to the expression
+    if None in kwargs or "size" in kwargs:
+        return None
+    return AttributeSpec(name.strip(), call.func.attr, args, kwargs)
+
+
+def sample_case_attrs(specs, first_case, no_traces, seed=None):
+    '''
+    Draw the structured case attributes of many cases at once
+
+    Parameters
+    ------------------------------------
+    specs
+        AttributeSpecs to draw
+    first_case
+        Case ID of the first case
+    no_traces
+        Number of cases
+    seed
+        If provided, the values of every block of CASE_BLOCK cases are drawn from a stream
+        derived from the seed, otherwise from the global numpy random state
+
+    Returns a dictionary name -> array holding the value of every case.
+    '''
+
+    if seed is None or no_traces <= 0:
+        # no values are drawn for no cases, so the global random state is not advanced either
+        return {spec.name: spec.sample(max(no_traces, 0)) for spec in specs}
+
+    first_block = first_case // CASE_BLOCK
+    last_block = (first_case + no_traces - 1) // CASE_BLOCK
+    blocks = {spec.name: [] for spec in specs}
+    for block in range(first_block, last_block + 1):
+        rng = case_block_random_state(seed, block)
+        for spec in specs:
+            blocks[spec.name].append(spec.sample(CASE_BLOCK, rng))
+
+    offset = first_case - first_block * CASE_BLOCK
+    return {name: np.concatenate(values)[offset:offset + no_traces] for name, values in blocks.items()}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import threading
+
+from time import perf_counter
+from concurrent.futures import Future
+
+
+class SimulationProgress:
+    """ Progress of a simulation running in the background, reported at most every interval seconds """
+
+    def __init__(self, no_traces, report, interval=0.25):
+        '''
+        Parameters
+        ------------------------------------
+        no_traces
+            Number of cases to simulate
+        report
+            Callable receiving the progress as dictionary (e.g. setting PetriWidget.progress)
+        interval
+            Minimum number of seconds between two reports while running
+
+        '''
+
+        self.no_traces = no_traces
+        self.report = report
+        self.interval = interval
+        self.start = perf_counter()
+        self._last = None
+        self.cases = 0
+        self.events = 0
+
+    def as_dict(self, state):
+        elapsed = perf_counter() - self.start
+        rate = self.cases / elapsed if elapsed > 0 else 0.0
+        return {
+            "state": state,
+            "cases": self.cases,
+            "total": self.no_traces,
+            "events": self.events,
+            "events_per_s": self.events / elapsed if elapsed > 0 else 0.0,
+            "elapsed": elapsed,
+            # remaining cases at the rate so far
+            "eta": (self.no_traces - self.cases) / rate if rate > 0 else None,
+        }
+
+    def update(self, cases, events, state="running"):
+        """ Adds finished cases and their events, reports if the interval passed (or the state is final) """
+
+        self.cases += cases
+        self.events += events
+        now = perf_counter()
+        if state != "running" or self._last is None or now - self._last >= self.interval:
+            self._last = now
+            self.report(self.as_dict(state))
+
+
+class BackgroundSimulation:
+    """ Simulation running in a worker thread, see PetriWidget.generate_eventlog_async """
+
+    def __init__(self, run):
+        '''
+        Parameters
+        ------------------------------------
+        run
+            Callable receiving a threading.Event (set once cancelled) and returning the log
+
+        '''
+
+        self.future = Future()
+        self.cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(run,), daemon=True)
+
+    def _run(self, run):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.future.set_result(run(self.cancelled))
+        except BaseException as e:
+            self.future.set_exception(e)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """ Stops the simulation after the current chunk of cases, its result is the partial log """
+
+        self.cancelled.set()
+
+    def running(self):
+        return not self.future.done()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pandas as pd
+
+from array import array
+from pm4py.objects.log import obj as log_instance
+
+
+class EventColumns:
+    """ Growable column buffers holding a simulated log (one row per event) """
+
+    def __init__(self, activity_key='activity:name', timestamp_key='time:timestamp', case_id_key='id'):
+        self.activity_key = activity_key
+        self.timestamp_key = timestamp_key
+        self.case_id_key = case_id_key
+
+        self.cases = array('q')
+        self.activities = array('q')
+        self.durations = array('q')
+        # activities are stored as codes into this list of labels
+        self.labels = []
+        self.label_codes = {}
+        # attribute columns in order of their first appearance, filled up with None lazily
+        self.attrs = {}
+        # case attributes stored once per case (first_case, first_case+1, ...) and joined to
+        # the events, all case attributes follow the other attributes in case_attr_order
+        self.case_columns = {}
+        self.case_attr_order = []
+        # simulated cases (including those without any event)
+        self.first_case = 0
+        self.no_cases = 0
+
+    def __len__(self):
+        return len(self.cases)
+
+    def add_event(self, case, activity, duration):
+        """ Appends an event of a case, its attributes are set via set_attr afterwards """
+
+        code = self.label_codes.get(activity)
+        if code is None:
+            code = self.label_codes[activity] = len(self.labels)
+            self.labels.append(activity)
+        self.cases.append(case)
+        self.activities.append(code)
+        self.durations.append(duration)
+
+    def set_attr(self, name, value):
+        """ Sets an attribute of the last added event """
+
+        column = self.attrs.get(name)
+        if column is None:
+            column = self.attrs[name] = []
+        row = len(self.cases) - 1
+        if len(column) > row:
+            # set twice (e.g. event and case attribute of the same name), the last value wins
+            column[row] = value
+            return
+        if len(column) < row:
+            column.extend([None] * (row - len(column)))
+        column.append(value)
+
+    def set_case_column(self, name, values):
+        """ Sets an attribute of all cases at once (one value per case, in order of the case ids) """
+
+        self.case_columns[name] = np.asarray(values)
+
+    def extend(self, other):
+        """ Appends the events of other (e.g. the next shard of cases) """
+
+        codes = np.array([self.label_codes.setdefault(l, len(self.label_codes)) for l in other.labels], dtype=np.int64)
+        self.labels = list(self.label_codes)
+        row = len(self.cases)
+        for name, values in other.case_columns.items():
+            if name in self.case_columns:
+                values = np.concatenate((self.case_columns[name], values))
+            self.case_columns[name] = values
+        self.case_attr_order = self.case_attr_order or other.case_attr_order
+        if not self.no_cases:
+            self.first_case = other.first_case
+        self.no_cases += other.no_cases
+        self.cases.extend(other.cases)
+        self.activities.extend(array('q', codes[np.frombuffer(other.activities, dtype=np.int64)].tolist()))
+        self.durations.extend(other.durations)
+        for name, values in other.attrs.items():
+            column = self.attrs.setdefault(name, [])
+            column.extend([None] * (row - len(column)))
+            column.extend(values)
+
+    def columns(self, timestamps=None):
+        """ Returns all columns as dictionary (in the order of pm4py's dataframe conversion) """
+
+        n = len(self.cases)
+        labels = np.array(self.labels + [None], dtype=object)
+        data = {self.activity_key: labels[np.frombuffer(self.activities, dtype=np.int64)] if n else labels[:0]}
+        data[self.timestamp_key] = timestamps if timestamps is not None else [None] * n
+        case_names = [name for name in self.case_attr_order if name in self.attrs or name in self.case_columns]
+        for name, column in self.attrs.items():
+            if name not in case_names:
+                data[name] = column + [None] * (n - len(column))
+
+        cases = np.frombuffer(self.cases, dtype=np.int64)
+        for name in case_names:
+            if name in self.case_columns:
+                if n:
+                    data[name] = self.case_columns[name][cases - self.first_case]
+            else:
+                data[name] = self.attrs[name] + [None] * (n - len(self.attrs[name]))
+
+        # one string per case instead of one per event
+        if n:
+            first = int(cases.min())
+            ids = np.array([str(i) for i in range(first, int(cases.max()) + 1)], dtype=object)
+            data["case:" + self.case_id_key] = ids[cases - first]
+        else:
+            data["case:" + self.case_id_key] = np.empty(0, dtype=object)
+        return data
+
+    def to_dataframe(self, timestamps=None):
+        """ Builds the pandas DataFrame of the log at once """
+
+        return pd.DataFrame(self.columns(timestamps))
+
+    def to_event_log(self, timestamps=None):
+        """ Builds a pm4py EventLog of the log (only needed if pm4py objects are requested) """
+
+        if timestamps is not None:
+            timestamps = pd.to_datetime(timestamps).to_pydatetime()
+        data = self.columns(timestamps)
+        del data["case:" + self.case_id_key]
+        names = list(data)
+        columns = [data[name] for name in names]
+
+        cases = np.frombuffer(self.cases, dtype=np.int64)
+        case_ids = range(self.first_case, self.first_case + self.no_cases)
+        bounds = np.searchsorted(cases, [case_ids.start] + [i + 1 for i in case_ids])
+
+        log = log_instance.EventLog()
+        for i, start, stop in zip(case_ids, bounds[:-1], bounds[1:]):
+            trace = log_instance.Trace()
+            trace.attributes[self.case_id_key] = str(i)
+            for row in range(start, stop):
+                event = log_instance.Event()
+                for name, column in zip(names, columns):
+                    event[name] = column[row]
+                trace.append(event)
+            log.append(trace)
+        return log
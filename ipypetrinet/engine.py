@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from collections import namedtuple
+from pm4py.objects.petri_net.obj import Marking
+from pm4py.objects.petri_net.utils import final_marking as final_marking_discovery
+from .expressions import NetExpressions
+
+
+class CompiledNet:
+    """ Integer-indexed incidence-matrix representation of a pm4py-petrinet """
+
+    def __init__(self, net, initial_marking, final_marking=None, binary_graph=None):
+        '''
+        Compile a pm4py-petrinet into pre/post incidence arrays
+
+        Parameters
+        ------------------------------------
+        net
+            PM4PY Petri net as returned by PetriWidget.createPetriNet
+        initial_marking
+            Initial marking of the Petri net
+        final_marking
+            If provided, the final marking of the Petri net
+        binary_graph
+            If provided, the transport.BinaryGraph the net was built from, the incidence arrays
+            are then computed on its link columns instead of walking the arcs of the net
+
+        '''
+
+        self.net = net
+        # transitions and places are ordered by their ids, so the simulation
+        # walks enabled transitions in the same order on every run
+        self.transitions = sorted(net.transitions, key=lambda t: t.name)
+        self.places = sorted(net.places, key=lambda p: p.name)
+        self.trans_index = {t: i for i, t in enumerate(self.transitions)}
+        self.place_index = {p: i for i, p in enumerate(self.places)}
+
+        if binary_graph is not None:
+            self.pre, self.post = binary_graph.incidence([t.name for t in self.transitions],
+                                                         [p.name for p in self.places])
+        else:
+            self.pre = np.zeros((len(self.transitions), len(self.places)), dtype=np.int64)
+            self.post = np.zeros((len(self.transitions), len(self.places)), dtype=np.int64)
+            for i, t in enumerate(self.transitions):
+                # every arc moves exactly one token, independent of its weight
+                for a in t.in_arcs:
+                    self.pre[i, self.place_index[a.source]] += 1
+                for a in t.out_arcs:
+                    self.post[i, self.place_index[a.target]] += 1
+
+        self.change = self.post - self.pre
+        # a transition is enabled if each of its input places holds a token
+        self.inputs = (self.pre > 0).astype(np.int64)
+
+        self.initial_marking = self.to_vector(initial_marking)
+        self.final_marking = None if final_marking is None else self.to_vector(final_marking)
+
+    def to_vector(self, marking):
+        """ Converts a pm4py-marking into a token vector """
+
+        vector = np.zeros(len(self.places), dtype=np.int64)
+        for p, tokens in marking.items():
+            vector[self.place_index[p]] = tokens
+        return vector
+
+    def to_marking(self, vector):
+        """ Converts a token vector back into a pm4py-marking """
+
+        marking = Marking()
+        for i in np.flatnonzero(vector):
+            marking[self.places[i]] = int(vector[i])
+        return marking
+
+    def enabled_mask(self, m):
+        """ Returns a boolean mask of the transitions enabled by marking m """
+
+        return self.inputs.dot(m < 1) == 0
+
+    def enabled(self, m):
+        """ Returns the transitions enabled by marking m (ignores conditions) """
+
+        return [self.transitions[i] for i in np.flatnonzero(self.enabled_mask(m))]
+
+    def fire(self, m, t):
+        """ Returns the marking reached by firing transition t in marking m """
+
+        return m + self.change[self.trans_index[t]]
+
+    def is_final(self, m):
+        """ Checks whether marking m equals the final marking """
+
+        return self.final_marking is not None and np.array_equal(m, self.final_marking)
+
+    def weights(self, smap):
+        """ Returns the link probabilities of the stochastic map as array (nan if missing) """
+
+        return np.array([smap.get(t, np.nan) for t in self.transitions], dtype=float)
+
+    def batched_playout(self, weights, no_traces=100, max_trace_length=500, batch_size=10000, rng=None):
+        '''
+        Simulate many cases in lockstep on a (cases x places) marking matrix
+
+        Parameters
+        ------------------------------------
+        weights
+            Link probabilities per transition, i.e. CompiledNet.weights(smap)
+        no_traces
+            Number of traces to simulate
+        max_trace_length
+            Maximum number of transitions fired per trace
+        batch_size
+            Maximum number of cases advanced together (bounds the memory of the matrices)
+        rng
+            numpy RandomState to draw from (default: the global numpy random state)
+
+        Returns a list holding the indices of the fired transitions for every case.
+        Conditions are not taken into account.
+        '''
+
+        # float matrices let numpy use BLAS for the enabling check
+        inputs = self.inputs.T.astype(np.float32)
+        if rng is None:
+            rng = np.random
+        sequences = []
+
+        for start in range(0, no_traces, batch_size):
+            n = min(batch_size, no_traces - start)
+            markings = np.tile(self.initial_marking, (n, 1))
+            alive = np.arange(n)
+            fired_cases, fired_trans = [], []
+
+            for _ in range(max_trace_length):
+                m = markings[alive]
+                enabled = (m < 1).astype(np.float32).dot(inputs) == 0
+                finished = ~enabled.any(axis=1)
+                if self.final_marking is not None:
+                    finished |= (m == self.final_marking).all(axis=1)
+                if finished.any():
+                    alive, enabled = alive[~finished], enabled[~finished]
+                if alive.size == 0:
+                    break
+
+                w = np.where(enabled, weights, 0.0)
+                if np.isnan(w).any():
+                    raise Exception("Please provide a stochastic map containing all enabled transitions!")
+
+                # sample one transition per case from its normalized cumulative distribution
+                cdf = np.cumsum(w, axis=1)
+                if (cdf[:, -1] <= 0).any():
+                    raise Exception("The probabilities of the enabled transitions must not all be 0!")
+                u = rng.random_sample(alive.size) * cdf[:, -1]
+                chosen = np.minimum((cdf <= u[:, None]).sum(axis=1), len(self.transitions) - 1)
+
+                markings[alive] += self.change[chosen]
+                fired_cases.append(alive)
+                fired_trans.append(chosen)
+
+            if fired_cases:
+                cases = np.concatenate(fired_cases)
+                trans = np.concatenate(fired_trans)
+                # steps were recorded one after another, a stable sort keeps them in order per case
+                order = np.argsort(cases, kind="stable")
+                bounds = np.searchsorted(cases[order], np.arange(1, n))
+                sequences.extend(np.split(trans[order], bounds))
+            else:
+                sequences.extend(np.empty(0, dtype=np.int64) for _ in range(n))
+
+        return sequences
+
+
+def build_smap(links, transitions_by_id):
+    '''
+    Builds a stochastic map from the links and the transitions by id
+
+    Parameters
+    ------------------------------------
+    links
+        Links as (source id, target id, probability)
+    transitions_by_id
+        Transitions of the net by their id
+
+    All links into a transition must carry the same probability, so the map does not depend
+    on the order of the links (which graph_key ignores).
+    '''
+
+    smap = {}
+    for link in links:
+        trans = transitions_by_id.get(link[1])
+        if trans is None:
+            continue
+        if trans in smap and smap[trans] != link[2]:
+            raise Exception("Please give all links into transition " + str(trans.name) + " the same probability!")
+        smap[trans] = link[2]
+    return smap
+
+
+class BuiltNet(namedtuple("BuiltNet", ["net", "trans", "links", "initial_marking"])):
+    """ pm4py-petrinet built from a graph together with its id indexes (unpacks as (net, trans, links, initial_marking)) """
+
+    def __new__(cls, net, trans, links, initial_marking, transitions_by_id=None, places_by_id=None,
+                binary_graph=None):
+        self = super().__new__(cls, net, trans, links, initial_marking)
+        # transport.BinaryGraph the net was built from (if any), see CompiledNet
+        self.binary_graph = binary_graph
+        # node ids (pm4py names) to nodes, every lookup while building and simulating is O(1)
+        self.transitions_by_id = transitions_by_id if transitions_by_id is not None else {t.name: t for t in net.transitions}
+        self.places_by_id = places_by_id if places_by_id is not None else {p.name: p for p in net.places}
+        # everything derived from the net is computed on first use and kept for later calls
+        self._smap = None
+        self._final_marking = None
+        self._compiled = None
+        self._expressions = {}
+        return self
+
+    @property
+    def smap(self):
+        """ Stochastic map: probability of the link leading into each transition """
+
+        if self._smap is None:
+            self._smap = build_smap(self.links, self.transitions_by_id)
+        return self._smap
+
+    @property
+    def final_marking(self):
+        """ Final marking discovered from the net """
+
+        if self._final_marking is None:
+            self._final_marking = final_marking_discovery.discover_final_marking(self.net)
+        return self._final_marking
+
+    @property
+    def compiled(self):
+        """ CompiledNet of the net (with its initial and final marking) """
+
+        if self._compiled is None:
+            self._compiled = CompiledNet(self.net, self.initial_marking, final_marking=self.final_marking,
+                                         binary_graph=self.binary_graph)
+        return self._compiled
+
+    def expressions(self, case_attrs=[]):
+        """ NetExpressions of the net for the given case attributes """
+
+        key = tuple(case_attrs)
+        if key not in self._expressions:
+            self._expressions[key] = NetExpressions(self.net.transitions, case_attrs)
+        return self._expressions[key]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import time
+import random
+import builtins
+import datetime
+import numpy as np
+import pandas as pd
+
+from datetime import timedelta
+from .attributes import parse_case_attr
+
+
+# names available to conditions and attributes (as they used to be via the widget module)
+BASE_NAMESPACE = {
+    "__builtins__": builtins,
+    "np": np,
+    "pd": pd,
+    "random": random,
+    "time": time,
+    "datetime": datetime,
+    "timedelta": timedelta,
+}
+
+
+class SeededNumpy:
+    """ Stand-in for the numpy module whose np.random draws from the stream of one case """
+
+    def __init__(self, rng):
+        self.random = rng
+
+    def __getattr__(self, name):
+        return getattr(np, name)
+
+
+class NetExpressions:
+    """ Conditions, event- and case-attributes of a net compiled into code objects """
+
+    def __init__(self, transitions, case_attrs=[]):
+        '''
+        Compile all expression strings of a net once per simulation
+
+        Parameters
+        ------------------------------------
+        transitions
+            Transitions of the pm4py-petrinet (properties = [conditions, exectime, eventattrs])
+        case_attrs
+            Case attributes as list of strings as given in PetriWidget.caseAttrs
+
+        '''
+
+        self.conditions = {}
+        self.event_attrs = {}
+        self.event_attr_names = {}
+        self.case_attr_names = []
+
+        all_names = []
+        for t in sorted(transitions, key=lambda t: t.name):
+            conds, attrs = t.properties[0], t.properties[2]
+            # all conditions are evaluated (no short-circuit), exactly as one by one
+            if conds:
+                source = "(" + ",".join("(%s)" % c for c in conds) + ",)"
+                self.conditions[t] = compile(source, "<conditions of %s>" % t.name, "eval")
+            if attrs:
+                self.event_attrs[t] = compile("\n".join(attrs), "<eventattrs of %s>" % t.name, "exec")
+            names = [attr.split("=")[0].strip() for attr in attrs]
+            self.event_attr_names[t] = names
+            all_names.extend(names)
+
+        # event attributes in order of appearance; duplicates keep their first position
+        self.all_event_attr_names = list(dict.fromkeys(all_names))
+
+        # case attributes drawn from a plain distribution are kept as structured specs,
+        # so they can be drawn for all cases at once (see new_case); the definitions still
+        # take effect in declaration order, so the last definition of a name wins
+        self.case_attr_specs = []
+        case_sources = []
+        other_sources = []
+        last = {caseattr.split(": ")[0].strip(): i for i, caseattr in enumerate(case_attrs)}
+        for i, caseattr in enumerate(case_attrs):
+            name = caseattr.split(": ")[0].strip()
+            self.case_attr_names.append(name)
+            case_sources.append(caseattr.replace(": ", "="))
+            # only the last definition of a name is drawn beforehand, earlier ones are executed
+            spec = parse_case_attr(caseattr) if last[name] == i else None
+            if spec is None:
+                other_sources.append(case_sources[-1])
+            else:
+                self.case_attr_specs.append(spec)
+                # the drawn value is assigned at its position if other expressions precede it
+                if other_sources:
+                    other_sources.append("%s = __case_values__[%r]" % (name, name))
+        self.case_attrs = compile("\n".join(case_sources), "<caseattrs>", "exec")
+        self.other_case_attrs = compile("\n".join(other_sources), "<caseattrs>", "exec")
+
+    def new_case(self, rng=None, case_values=None):
+        '''
+        Returns a fresh namespace for one case (resets event-, draws case-attributes)
+
+        Parameters
+        ------------------------------------
+        rng
+            numpy RandomState (or VariateBuffer) np.random draws from within the expressions
+        case_values
+            Values of the structured case attributes (case_attr_specs) drawn beforehand,
+            only the other case attributes are executed then
+
+        '''
+
+        namespace = dict(BASE_NAMESPACE)
+        # np.random within the expressions draws from the stream of the case (or a VariateBuffer) if provided
+        if rng is not None:
+            namespace["np"] = SeededNumpy(rng)
+        for name in self.all_event_attr_names:
+            namespace[name] = None
+        if case_values is None:
+            exec(self.case_attrs, namespace)
+        else:
+            case_values = dict(case_values)
+            namespace.update(case_values)
+            namespace["__case_values__"] = case_values
+            exec(self.other_case_attrs, namespace)
+            del namespace["__case_values__"]
+        return namespace
+
+    def filter_conditions(self, maybeEnabled, namespace):
+        """ Only keep transitions complying their conditions (in order of their ids) """
+
+        enabled = []
+        for trans in sorted(maybeEnabled, key=lambda t: t.name):
+            # Set/Override Event-Attributes of the case (of form "name=value")
+            attrs = self.event_attrs.get(trans)
+            if attrs is not None:
+                exec(attrs, namespace)
+
+            # Add transitions only if they meet their conditions (or conditions are None)
+            conds = self.conditions.get(trans)
+            if conds is None or all(eval(conds, namespace)):
+                enabled.append(trans)
+
+        return enabled
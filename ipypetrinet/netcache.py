@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import json
+import hashlib
+
+from collections import OrderedDict
+
+
+# fields of the cells that change the built net, everything else (e.g. positions) is ignored
+SEMANTIC_FIELDS = {
+    "Place": ("id", "name", "tokens"),
+    "Transition": ("id", "name", "conditions", "exectime", "eventattrs"),
+    "Link": ("id", "source", "target", "prob"),
+}
+
+
+def cell_digest(cell):
+    """ SHA-1 of the semantic content of a cell (as integer) """
+
+    # createPetriNet treats every cell that is neither place nor transition as link
+    fields = SEMANTIC_FIELDS.get(cell.get("type"), SEMANTIC_FIELDS["Link"])
+    content = json.dumps([cell.get("type")] + [cell.get(f) for f in fields], default=str).encode()
+    return int.from_bytes(hashlib.sha1(content).digest(), "big")
+
+
+def combine_digests(combined):
+    return "%040x" % combined
+
+
+def graph_key(graph):
+    """ Stable hash of the semantic content of a graph (PetriWidget.graph) """
+
+    # the full 160-bit digests are XORed, so the key does not depend on the order of the cells and
+    # can be updated cell by cell (see GraphIndex); like there, a later cell replaces one with its id
+    digests = {cell["id"]: cell_digest(cell) for cell in graph}
+    combined = 0
+    for digest in digests.values():
+        combined ^= digest
+    return combine_digests(combined)
+
+
+class GraphIndex:
+    """ Cells of a graph indexed by their id, so patches from the frontend apply in place """
+
+    def __init__(self, cells=()):
+        self.cells = OrderedDict()
+        # digest per cell id and their XOR, the key is updated with every patch instead of rehashing all cells
+        self.digests = {}
+        self.combined = 0
+        self.apply(upsert=cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def key(self):
+        """ graph_key of the indexed cells """
+
+        return combine_digests(self.combined)
+
+    def apply(self, upsert=(), remove=()):
+        """ Removes the cells with the given ids, replaces changed cells in place and appends new ones """
+
+        for cell_id in remove:
+            if self.cells.pop(cell_id, None) is not None:
+                self.combined ^= self.digests.pop(cell_id)
+        for cell in upsert:
+            digest = cell_digest(cell)
+            self.combined ^= digest ^ self.digests.get(cell["id"], 0)
+            self.digests[cell["id"]] = digest
+            self.cells[cell["id"]] = cell
+
+    def to_list(self):
+        return list(self.cells.values())
+
+
+class NetCache:
+    """ LRU cache of built nets keyed by (graph_key, name) """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        """ Returns the entry of key, calling build() to create it on a miss """
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = self._entries[key] = build()
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, graph_hash):
+        """ Drops the nets built from the graph with the given graph_key (under any name) """
+
+        for key in [key for key in self._entries if key[0] == graph_hash]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """ Returns the counters and size of the cache as dictionary """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
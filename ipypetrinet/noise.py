@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import random
+import numpy as np
+import pandas as pd
+
+
+class CaseLayout:
+    """ Position of every event within its case, computed in one grouped pass over the log """
+
+    def __init__(self, codes):
+        '''
+        Parameters
+        ------------------------------------
+        codes
+            Case of every event as integer code (e.g. groupby(...).ngroup() of the log)
+
+        '''
+
+        # cases are renumbered in order of their first appearance, i.e. as df[caseCol].unique()
+        cases, first, codes = np.unique(codes, return_index=True, return_inverse=True)
+        rank = np.empty(len(cases), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(cases))
+        self.codes = rank[codes.reshape(-1)]
+        self.case_sizes = np.bincount(self.codes, minlength=len(cases))
+
+        # row positions of the events sorted by case (stable, so in order within every case)
+        self.order = np.argsort(self.codes, kind="stable")
+        self.starts = np.cumsum(self.case_sizes) - self.case_sizes
+        self.positions = np.empty(len(self.codes), dtype=np.int64)
+        self.positions[self.order] = np.arange(len(self.codes)) - np.repeat(self.starts, self.case_sizes)
+        self.sizes = self.case_sizes[self.codes]
+
+    @classmethod
+    def of(cls, df, caseCol="case:id"):
+        """ Returns the layout of the cases of a DataFrame """
+
+        return cls(df.groupby(caseCol, sort=False).ngroup().to_numpy())
+
+    def __len__(self):
+        return len(self.case_sizes)
+
+    def sample(self, prob):
+        """ Picks int(prob * number of cases) random cases (as codes) """
+
+        return np.array(random.sample(range(len(self)), int(prob * len(self))), dtype=np.int64)
+
+    def rows(self, cases, positions):
+        """ Returns the row positions of the events at the given positions of the given cases """
+
+        return self.order[self.starts[cases] + positions]
+
+    def mask(self, cases, positions):
+        """ Returns a boolean mask over the rows marking the given events """
+
+        mask = np.zeros(len(self.codes), dtype=bool)
+        mask[self.rows(cases, positions)] = True
+        return mask
+
+
+# The operators only plan their edits on the layout and the timestamps of a log. Each returns
+# the rows to keep (mask or positions), the new timestamps and the delay it adds to all
+# events following the log (or None), the DataFrame itself is changed once by the caller.
+
+def _strip_start(layout, times, prob=0.25, n=1):
+    """ Deletes 1 to n start events of random traces """
+
+    assert n!=0, "Please make sure to select n bigger than 0."
+    dropnum = np.zeros(len(layout), dtype=np.int64)
+    modify = layout.sample(prob)
+    dropnum[modify] = np.random.randint(1, n + 1, size=len(modify))
+    keep = layout.positions >= dropnum[layout.codes]
+    return keep, times if times is None else times[keep], None
+
+
+def _strip_end(layout, times, prob=0.25, n=1):
+    """ Deletes the n end events of random traces """
+
+    assert n!=0, "Please make sure to choose n bigger than 0."
+    dropnum = np.zeros(len(layout), dtype=np.int64)
+    dropnum[layout.sample(prob)] = n
+    keep = layout.sizes - layout.positions > dropnum[layout.codes]
+    return keep, times if times is None else times[keep], None
+
+
+def _silence(layout, times, prob=0.25):
+    """ Deletes a random event (neither start nor end) from random traces """
+
+    modify = layout.sample(prob)
+    modify = modify[layout.case_sizes[modify] > 2]
+    positions = np.random.randint(1, layout.case_sizes[modify] - 1)
+    keep = ~layout.mask(modify, positions)
+    return keep, times if times is None else times[keep], None
+
+
+def _switch(layout, times, prob=0.25):
+    """ Switches the timestamps of two random events of random traces """
+
+    modify = layout.sample(prob)
+    modify = modify[layout.case_sizes[modify] >= 2]
+
+    # two distinct positions per case: the second one skips over the first one
+    sizes = layout.case_sizes[modify]
+    first = np.random.randint(0, sizes)
+    second = np.random.randint(0, sizes - 1)
+    second += second >= first
+    rows1, rows2 = layout.rows(modify, first), layout.rows(modify, second)
+
+    times = times.copy()
+    times[rows1], times[rows2] = times[rows2], times[rows1]
+    return np.arange(len(times)), times, None
+
+
+def _doubles(layout, times, prob=0.25):
+    """ Repeats a random event (not the start event) of random traces right after itself """
+
+    modify = layout.sample(prob)
+    modify = modify[layout.case_sizes[modify] > 2]
+    positions = np.random.randint(1, layout.case_sizes[modify])
+    rows = layout.rows(modify, positions)
+    previous = layout.rows(modify, positions - 1)
+
+    # the repeated event takes as long as the time passed since the previous event,
+    # all following events (of the same and all later traces) are delayed by that time
+    durations = times[rows] - times[previous]
+    delay = np.zeros(len(times), dtype=durations.dtype)
+    delay[rows] = durations
+    delay = np.cumsum(delay) - delay
+
+    repeat = np.ones(len(times), dtype=np.int64)
+    repeat[rows] = 2
+    take = np.repeat(np.arange(len(times)), repeat)
+    return take, times[take] + delay[take], durations.sum()
+
+
+OPERATORS = {
+    "start": _strip_start,
+    "end": _strip_end,
+    "silence": _silence,
+    "switch": _switch,
+    "doubles": _doubles,
+}
+
+
+def strip_start(df, caseCol="case:id", prob=0.25, n=1):
+    """ Deletes 1 to n start events of random traces (in place) """
+
+    keep, _, _ = _strip_start(CaseLayout.of(df, caseCol), None, prob=prob, n=n)
+    df.drop(labels=df.index[~keep], axis=0, inplace=True)
+    return df
+
+
+def strip_end(df, caseCol="case:id", prob=0.25, n=1):
+    """ Deletes the n end events of random traces (in place) """
+
+    keep, _, _ = _strip_end(CaseLayout.of(df, caseCol), None, prob=prob, n=n)
+    df.drop(labels=df.index[~keep], axis=0, inplace=True)
+    return df
+
+
+def addSilence(df, caseCol="case:id", prob=0.25):
+    """ Deletes a random event (neither start nor end) from random traces (in place) """
+
+    keep, _, _ = _silence(CaseLayout.of(df, caseCol), None, prob=prob)
+    df.drop(labels=df.index[~keep], axis=0, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def switchTimestamps(df, caseCol="case:id", prob=0.25, timeCol="time:timestamp"):
+    """ Switches the timestamps of two random events of random traces (in place) """
+
+    _, times, _ = _switch(CaseLayout.of(df, caseCol), df[timeCol].to_numpy(), prob=prob)
+    df[timeCol] = times
+    return df
+
+
+def addDoubles(df, caseCol="case:id", prob=0.25, timeCol="time:timestamp"):
+    """ Repeats a random event (not the start event) of random traces right after itself (in place) """
+
+    take, times, _ = _doubles(CaseLayout.of(df, caseCol), df[timeCol].to_numpy(), prob=prob)
+    out = df.iloc[take].reset_index(drop=True)
+    out[timeCol] = times
+    # rows are added, so df is emptied and refilled column by column (it takes the index of the first one)
+    df.drop(index=df.index, columns=df.columns, inplace=True)
+    for col in out.columns:
+        df[col] = out[col]
+    return df
+
+
+class NoisePipeline:
+    """ Several noise operators planned together and applied to the log at once """
+
+    def __init__(self, steps, caseCol="case:id", timeCol="time:timestamp"):
+        '''
+        Parameters
+        ------------------------------------
+        steps
+            Operators to apply one after another, as tuples (name, prob) or (name, prob, kwargs)
+            with name in "start", "end", "silence", "switch" and "doubles", e.g.
+            [("silence", 0.1), ("doubles", 0.05), ("start", 0.1, {"n": 2})]
+        caseCol
+            The column holding the case ID
+        timeCol
+            The column holding the timestamp
+
+        '''
+
+        self.steps = []
+        for step in steps:
+            name, prob = step[0], step[1]
+            kwargs = step[2] if len(step) > 2 else {}
+            if name not in OPERATORS:
+                raise Exception("Unknown noise operator '%s', please choose one of %s!" % (name, list(OPERATORS)))
+            self.steps.append((OPERATORS[name], prob, kwargs))
+        self.caseCol = caseCol
+        self.timeCol = timeCol
+
+    def apply_chunk(self, df, delay=None):
+        """ Applies all operators to a log (or chunk of whole cases), returns it and the delay it adds """
+
+        codes = df.groupby(self.caseCol, sort=False).ngroup().to_numpy()
+        take = np.arange(len(df))
+        times = df[self.timeCol].to_numpy()
+        added = None
+
+        # every operator samples its traces once and only edits row positions and timestamps
+        for operator, prob, kwargs in self.steps:
+            rows, times, op_delay = operator(CaseLayout(codes), times, prob=prob, **kwargs)
+            take, codes = take[rows], codes[rows]
+            if op_delay is not None:
+                added = op_delay if added is None else added + op_delay
+
+        out = df.iloc[take].reset_index(drop=True)
+        # events repeated in earlier chunks delay this chunk as well
+        out[self.timeCol] = times if delay is None else times + delay
+        return out, added
+
+    def iter_apply(self, chunks):
+        """ Applies all operators to every chunk of an iterable of DataFrames holding whole cases """
+
+        delay = None
+        for chunk in chunks:
+            out, added = self.apply_chunk(chunk, delay)
+            if added is not None:
+                delay = added if delay is None else delay + added
+            yield out
+
+    def apply(self, df, chunk_size=None):
+        '''
+        Apply all operators to a log
+
+        Parameters
+        ------------------------------------
+        df
+            pandas DataFrame (the event log)
+        chunk_size
+            If provided, the log is processed in chunks of this many cases (the log has to be
+            ordered by case then). The traces to modify are sampled per chunk in that case.
+
+        '''
+
+        if chunk_size is None:
+            return self.apply_chunk(df)[0]
+
+        codes = CaseLayout.of(df, self.caseCol).codes
+        bounds = np.searchsorted(codes, np.arange(chunk_size, len(np.unique(codes)), chunk_size))
+        chunks = (df.iloc[start:stop] for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(df)]))
+        return pd.concat(list(self.iter_apply(chunks)), ignore_index=True)
+
+
+def apply_noise(df, steps, caseCol="case:id", timeCol="time:timestamp", chunk_size=None):
+    """ Applies several noise operators at once, see NoisePipeline """
+
+    return NoisePipeline(steps, caseCol=caseCol, timeCol=timeCol).apply(df, chunk_size=chunk_size)
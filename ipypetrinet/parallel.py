@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from .profiling import SimulationStats
+
+
+def playout_shard(graph, name, first_case, no_traces, kwargs, profile=False):
+    """ Simulates the cases first_case, ..., first_case+no_traces-1 in a worker process """
+
+    # imported here, the widget module itself imports this one
+    from .widget import PetriWidget
+
+    widget = PetriWidget()
+    built = widget.createPetriNet(graph, name=name)
+    stats = SimulationStats() if profile else None
+    columns = widget.simulate_traces(built.net, built.initial_marking, no_traces=no_traces,
+                                     final_marking=built.final_marking, smap=built.smap,
+                                     first_case=first_case, stats=stats, **kwargs)
+    return columns, stats
+
+
+def parallel_playout(graph, name="PetriNet", no_traces=100, workers=2, stats=None, **kwargs):
+    '''
+    Shard the simulation of a net across a process pool
+
+    Parameters
+    ------------------------------------
+    graph
+        Cells of the created Petri net, i.e. PetriWidget.graph
+    name
+        Name of the generated pm4py-petrinet
+    no_traces
+        Number of traces to simulate
+    workers
+        Number of worker processes
+    stats
+        If provided, SimulationStats the timings and counters of all workers are added to
+    kwargs
+        Further parameters of PetriWidget.simulate_traces (a seed is required,
+        a datafunc must be picklable, i.e. defined at module level)
+
+    Returns the merged EventColumns of all shards (timestamps not yet assigned).
+    '''
+
+    if kwargs.get("seed") is None:
+        raise Exception("Please provide a seed to simulate in parallel!")
+
+    # contiguous shards keep the case ids (and thus the log order) of a single-process run
+    bounds = [int(b) for b in np.linspace(0, no_traces, workers + 1)]
+    shards = [(start, stop - start) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    columns = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(playout_shard, graph, name, start, n, kwargs, stats is not None) for start, n in shards]
+        for future in futures:
+            shard, shard_stats = future.result()
+            if stats is not None:
+                stats.merge(shard_stats)
+            if columns is None:
+                columns = shard
+            else:
+                columns.extend(shard)
+
+    return columns
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Reading and writing PNML files without the frontend, in the format of its import/export
+
+Nets are read element by element (xml.etree.ElementTree.iterparse), every parsed element is
+dropped right away, so files with hundreds of thousands of elements are read in bounded
+memory. The extensions of ipypetrinet are kept in toolspecific elements:
+
+    <net> <caseattr label="..."/> ... </net>
+    <transition> <toolspecific tool="ipypetrinet" exectime="...">
+        <condition label="..."/> <eventattr label="..."/> </toolspecific> </transition>
+    <arc> <name><text>probability</text></name> </arc>
+"""
+
+from functools import lru_cache
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+
+TOOL = "ipypetrinet"
+
+
+@lru_cache(maxsize=None)
+def _local(tag):
+    # tags without namespace, e.g. of files written by other tools
+    return tag.rsplit("}", 1)[-1]
+
+
+def _number(text, default):
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return default
+    return int(value) if value.is_integer() else value
+
+
+def _text(elem, tag):
+    """ Text of <tag><text>...</text></tag> below elem, None if there is no such element """
+
+    for child in elem:
+        if _local(child.tag).lower() == tag:
+            for text in child:
+                if _local(text.tag) == "text":
+                    return text.text or ""
+            return ""
+    return None
+
+
+def _place(elem):
+    return {"type": "Place", "id": elem.get("id"), "name": _text(elem, "name") or "",
+            "tokens": _number(_text(elem, "initialmarking"), 0)}
+
+
+def _transition(elem):
+    name = _text(elem, "name")
+    exectime, conditions, eventattrs = 1, [], []
+    for child in elem:
+        if _local(child.tag) == "toolspecific" and child.get("tool") == TOOL:
+            exectime = _number(child.get("exectime"), exectime)
+            for item in child:
+                if _local(item.tag) == "condition":
+                    conditions.append(item.get("label"))
+                elif _local(item.tag) == "eventattr":
+                    eventattrs.append(item.get("label"))
+    return {"type": "Transition", "id": elem.get("id"), "name": elem.get("id") if name is None else name,
+            "exectime": exectime, "conditions": conditions, "eventattrs": eventattrs}
+
+
+def _arc(elem):
+    return {"type": "Link", "id": elem.get("id"), "prob": _number(_text(elem, "name"), 1),
+            "source": elem.get("source"), "target": elem.get("target")}
+
+
+def iter_pnml(source, case_attrs=None):
+    '''
+    Stream the cells of a PNML file in the format of PetriWidget.graph
+
+    Parameters
+    ------------------------------------
+    source
+        Path or binary file object of the PNML file
+    case_attrs
+        If provided, the labels of the case attributes are appended to this list
+
+    Yields the places, transitions and links in the order of the file.
+    '''
+
+    parsers = {"place": _place, "transition": _transition, "arc": _arc}
+    parents = []
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        tag = _local(elem.tag)
+        if tag in parsers:
+            yield parsers[tag](elem)
+        elif tag == "caseattr":
+            if case_attrs is not None:
+                case_attrs.append(elem.get("label"))
+        elif tag != "page":
+            continue
+        # the element is parsed, drop it (and its parsed siblings) from the tree
+        if parents:
+            parents[-1].clear()
+
+
+def read_pnml(source):
+    '''
+    Read a PNML file (e.g. exported by the widget)
+
+    Parameters
+    ------------------------------------
+    source
+        Path or binary file object of the PNML file
+
+    Returns the graph (see PetriWidget.graph) and the case attributes (see PetriWidget.caseAttrs).
+    '''
+
+    case_attrs = []
+    graph = list(iter_pnml(source, case_attrs))
+    return graph, case_attrs
+
+
+def _write_pnml(graph, f, case_attrs, name):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n<pnml>\n<net id="net" type="https://www.pnml.org">\n')
+    for label in case_attrs:
+        f.write('<caseattr label=%s/>\n' % quoteattr(label))
+    f.write('<name><text>%s</text></name>\n<page id="Page0">\n' % escape(name))
+    for c in graph:
+        if c["type"] == "Place":
+            f.write('<place id=%s><name><text>%s</text></name><toolspecific tool="%s"/>'
+                    '<initialMarking><text>%s</text></initialMarking></place>\n'
+                    % (quoteattr(c["id"]), escape(c.get("name") or ""), TOOL, int(c.get("tokens") or 0)))
+        elif c["type"] == "Transition":
+            f.write('<transition id=%s><name><text>%s</text></name><toolspecific tool="%s" exectime=%s>'
+                    % (quoteattr(c["id"]), escape(c.get("name") or ""), TOOL, quoteattr(str(c.get("exectime", 1)))))
+            for condition in c.get("conditions") or []:
+                f.write('<condition label=%s/>' % quoteattr(condition))
+            for eventattr in c.get("eventattrs") or []:
+                f.write('<eventattr label=%s/>' % quoteattr(eventattr))
+            f.write('</toolspecific></transition>\n')
+        else:
+            f.write('<arc id=%s source=%s target=%s><name><text>%s</text></name><toolspecific tool="%s"/>'
+                    '<arctype><text>normal</text></arctype></arc>\n'
+                    % (quoteattr(c["id"]), quoteattr(c["source"]), quoteattr(c["target"]), c["prob"], TOOL))
+    f.write('</page>\n<finalmarkings><marking></marking></finalmarkings>\n</net>\n</pnml>\n')
+
+
+def write_pnml(graph, target, case_attrs=(), name="PetriNet"):
+    '''
+    Write a net as PNML file, which the widget (and pm4py) can import
+
+    Parameters
+    ------------------------------------
+    graph
+        Cells of the net, i.e. PetriWidget.graph (any iterable, cells are written one by one)
+    target
+        Path or text file object to write to
+    case_attrs
+        Case attributes of the net, i.e. PetriWidget.caseAttrs
+    name
+        Name of the net
+
+    Positions are not written, the widget lays out imported nets without positions itself.
+    '''
+
+    if hasattr(target, "write"):
+        _write_pnml(graph, target, case_attrs, name)
+    else:
+        with open(target, "w", encoding="utf-8") as f:
+            _write_pnml(graph, f, case_attrs, name)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from time import perf_counter
+
+
+# phases in the order of a simulation run
+PHASES = [
+    "build",        # building (or fetching the cached) pm4py-petrinet
+    "case_attrs",   # drawing the case attributes of every case
+    "enabling",     # checking which transitions hold the tokens to fire
+    "conditions",   # exec of event attributes and eval of conditions
+    "sampling",     # picking the transition to fire from the stochastic map
+    "firing",       # computing the following marking
+    "playout",      # playing out all cases at once (batched engine)
+    "datafunc",     # calls of the datafunc
+    "recording",    # storing activities, durations and attributes of the events
+    "timestamps",   # assigning the timestamps (incl. worktime/calendar handling)
+    "conversion",   # building the DataFrame or pm4py EventLog
+]
+
+
+class SimulationStats:
+    """ Cumulative timings and counters of a simulation run (see generate_eventlog(profile=True)) """
+
+    def __init__(self):
+        # seconds spent per phase
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.cases = 0
+        self.events = 0
+        # iterations of the playout loop, i.e. enabling checks
+        self.steps = 0
+        # fired transitions (including silent ones)
+        self.firings = 0
+        # cases stopped without enabled transitions outside of the final marking
+        self.deadlocks = 0
+        # cases stopped by max_trace_length
+        self.truncations = 0
+        # sum of the sizes of the enabled sets over all steps
+        self.enabled_total = 0
+        # steps whose enabled set was found in (or missing from) the cache of enabled sets per marking
+        self.enabled_hits = 0
+        self.enabled_misses = 0
+
+    @property
+    def mean_enabled(self):
+        """ Mean number of enabled transitions per step """
+
+        return self.enabled_total / self.steps if self.steps else 0.0
+
+    @property
+    def enabled_hit_rate(self):
+        """ Share of the steps whose enabled set was cached """
+
+        lookups = self.enabled_hits + self.enabled_misses
+        return self.enabled_hits / lookups if lookups else 0.0
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def timer(self):
+        """ Returns the current time of the clock the phases are measured with """
+
+        return perf_counter()
+
+    def add_time(self, phase, start):
+        """ Adds the time since start to phase and returns the current time """
+
+        now = perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - start
+        return now
+
+    def merge(self, other):
+        """ Adds the timings and counters of other (e.g. of another worker) """
+
+        for phase, seconds in other.timings.items():
+            self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        for name in ("cases", "events", "steps", "firings", "deadlocks", "truncations", "enabled_total",
+                     "enabled_hits", "enabled_misses"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self):
+        """ Returns all metrics as flat dictionary (e.g. to push them into a monitoring system) """
+
+        metrics = {"time_" + phase: seconds for phase, seconds in self.timings.items()}
+        metrics.update({
+            "time_total": self.total_time,
+            "cases": self.cases,
+            "events": self.events,
+            "steps": self.steps,
+            "firings": self.firings,
+            "deadlocks": self.deadlocks,
+            "truncations": self.truncations,
+            "mean_enabled": self.mean_enabled,
+            "enabled_hits": self.enabled_hits,
+            "enabled_misses": self.enabled_misses,
+        })
+        return metrics
+
+    def __repr__(self):
+        lines = ["%-12s %9.4fs" % (phase, seconds) for phase, seconds in self.timings.items() if seconds]
+        lines.append("%-12s %9.4fs" % ("total", self.total_time))
+        lines.append("cases=%d events=%d steps=%d firings=%d deadlocks=%d truncations=%d mean_enabled=%.2f" % (
+            self.cases, self.events, self.steps, self.firings, self.deadlocks, self.truncations, self.mean_enabled))
+        lines.append("enabled_hits=%d enabled_misses=%d (%.1f%%)" % (
+            self.enabled_hits, self.enabled_misses, 100 * self.enabled_hit_rate))
+        return "\n".join(lines)
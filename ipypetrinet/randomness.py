@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+
+def case_random_state(seed, case):
+    """ Returns the independent random stream of a case derived from the user seed """
+
+    # equals the case-th child of SeedSequence(seed).spawn(), without spawning the others
+    seq = np.random.SeedSequence(seed, spawn_key=(case,))
+    return np.random.RandomState(np.random.PCG64(seq))
+
+
+def batch_random_state(seed, first_case):
+    """ Returns the random stream of a batch of cases starting at first_case """
+
+    seq = np.random.SeedSequence(seed, spawn_key=(first_case, 0))
+    return np.random.RandomState(np.random.PCG64(seq))
+
+
+def buffer_random_state(seed, first_case):
+    """ Returns the stream the variate blocks of the cases starting at first_case are drawn from """
+
+    seq = np.random.SeedSequence(seed, spawn_key=(first_case, 1))
+    return np.random.RandomState(np.random.PCG64(seq))
+
+
+def case_block_random_state(seed, block):
+    """ Returns the stream the structured case attributes of a block of cases are drawn from """
+
+    seq = np.random.SeedSequence(seed, spawn_key=(block, 2))
+    return np.random.RandomState(np.random.PCG64(seq))
+
+
+def arrival_random_state(seed):
+    """ Returns the stream the inter-arrival times of the cases are drawn from """
+
+    seq = np.random.SeedSequence(seed, spawn_key=(0, 3))
+    return np.random.RandomState(np.random.PCG64(seq))
+
+
+def _freeze(value):
+    """ Makes lists and arrays of parameters usable as part of a dictionary key """
+
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(value)
+    return value
+
+
+class VariateBuffer:
+    """ Stand-in for np.random handing out variates from blocks pre-drawn per distribution """
+
+    def __init__(self, rng=None, block_size=4096):
+        '''
+        Parameters
+        ------------------------------------
+        rng
+            numpy RandomState to draw the blocks from (default: the global numpy random state)
+        block_size
+            Number of values drawn at once per distribution and parameters
+
+        Draws without size (as emitted by the attribute dialog of the widget: choice, normal,
+        binomial, gamma, exponential, as well as random_sample, uniform and randint) are served
+        from the blocks, everything else is passed on to rng directly.
+        '''
+
+        self.rng = np.random if rng is None else rng
+        self.block_size = block_size
+        # iterators over the remaining values of every block
+        self._blocks = {}
+        # blocks drawn so far, i.e. calls of rng
+        self.calls = 0
+
+    def _next(self, key, method, *args, **kwargs):
+        try:
+            return next(self._blocks[key])
+        except (KeyError, StopIteration):
+            values = method(*args, size=self.block_size, **kwargs)
+            self.calls += 1
+            block = self._blocks[key] = iter(values.tolist())
+            return next(block)
+
+    def random_sample(self, size=None):
+        if size is not None:
+            return self.rng.random_sample(size)
+        return self._next(("random_sample",), self.rng.random_sample)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        if size is not None:
+            return self.rng.normal(loc, scale, size)
+        return self._next(("normal", loc, scale), self.rng.normal, loc, scale)
+
+    def binomial(self, n, p, size=None):
+        if size is not None:
+            return self.rng.binomial(n, p, size)
+        return self._next(("binomial", n, p), self.rng.binomial, n, p)
+
+    def gamma(self, shape, scale=1.0, size=None):
+        if size is not None:
+            return self.rng.gamma(shape, scale, size)
+        return self._next(("gamma", shape, scale), self.rng.gamma, shape, scale)
+
+    def exponential(self, scale=1.0, size=None):
+        if size is not None:
+            return self.rng.exponential(scale, size)
+        return self._next(("exponential", scale), self.rng.exponential, scale)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        if size is not None:
+            return self.rng.uniform(low, high, size)
+        return self._next(("uniform", low, high), self.rng.uniform, low, high)
+
+    def randint(self, low, high=None, size=None):
+        if size is not None:
+            return self.rng.randint(low, high, size)
+        return self._next(("randint", low, high), self.rng.randint, low, high)
+
+    def choice(self, a, size=None, replace=True, p=None):
+        key = ("choice", _freeze(a), _freeze(p))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if size is not None or key is None:
+            return self.rng.choice(a, size, replace, p)
+        return self._next(key, self.rng.choice, a, p=p)
+
+    def __getattr__(self, name):
+        return getattr(self.rng, name)
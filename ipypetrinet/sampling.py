@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import math
+import numpy as np
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+class TransitionSampler:
+    """ Cumulative distributions of the enabled sets of a stochastic map, cached in LRU order """
+
+    def __init__(self, smap, maxsize=4096):
+        '''
+        Parameters
+        ------------------------------------
+        smap
+            Stochastic map (transition -> probability), must not change while the sampler is used
+        maxsize
+            Maximum number of enabled sets whose distributions are kept
+
+        '''
+
+        self.smap = smap
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def distribution(self, et):
+        """ Returns the cumulative distribution over the enabled transitions et (a tuple) """
+
+        cdf = self._cache.get(et)
+        if cdf is not None:
+            self.hits += 1
+            self._cache.move_to_end(et)
+            return cdf
+
+        self.misses += 1
+        probability_dist = [self.smap[t] for t in et]
+        # needs to be normalized, computed exactly as numpy's choice does
+        prob_sum = sum(probability_dist)
+        p = np.array([x / prob_sum for x in probability_dist], dtype=float)
+        if (p < 0).any():
+            raise ValueError("probabilities are not non-negative")
+        if abs(math.fsum(p) - 1.) > np.sqrt(np.finfo(float).eps):
+            raise ValueError("probabilities do not sum to 1")
+        cdf = p.cumsum()
+        cdf /= cdf[-1]
+
+        cdf = self._cache[et] = cdf.tolist()
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return cdf
+
+    def pick(self, et, rng=None):
+        """ Picks one of the enabled transitions et, drawing one uniform number from rng """
+
+        et = tuple(et)
+        cdf = self.distribution(et)
+        if rng is None:
+            rng = np.random
+        # the same draw and lookup as rng.choice(et, p=...) without its per-call overhead
+        return et[bisect_right(cdf, rng.random_sample())]
+
+
+class EnabledSetCache:
+    """ Enabled transitions per marking (and their distribution), cached in LRU order """
+
+    def __init__(self, sampler, exprs, maxsize=65536):
+        '''
+        Parameters
+        ------------------------------------
+        sampler
+            TransitionSampler of the stochastic map the transitions are picked with
+        exprs
+            NetExpressions of the net, sets without conditions and event attributes are static
+        maxsize
+            Maximum number of markings whose enabled sets are kept
+
+        '''
+
+        self.sampler = sampler
+        self.exprs = exprs
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """ Returns the entry (enabled, is_final, choices, cdf) of a marking fingerprint or None """
+
+        entry = self._cache.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return entry
+
+    def put(self, key, enabled, is_final):
+        '''
+        Stores the enabled transitions (in order of their ids) of a marking
+
+        If none of them has conditions or event attributes, the set does not depend on
+        the case and its distribution (including None to stop in the final marking) is
+        stored as well, otherwise cdf is None and the set has to be filtered per step.
+        '''
+
+        enabled = tuple(enabled)
+        choices = cdf = None
+        static = not any(t in self.exprs.conditions or t in self.exprs.event_attrs for t in enabled)
+        if static and enabled:
+            choices = enabled + (None,) if is_final else enabled
+            cdf = self.sampler.distribution(choices)
+
+        entry = self._cache[key] = (enabled, is_final, choices, cdf)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return entry
+
+    def pick(self, entry, rng=None):
+        """ Picks one of the choices of a static entry, exactly as TransitionSampler.pick """
+
+        if rng is None:
+            rng = np.random
+        return entry[2][bisect_right(entry[3], rng.random_sample())]
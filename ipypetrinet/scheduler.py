@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from heapq import heapify, heappop, heappush, heapreplace
+from .attributes import parse_case_attr
+from .randomness import arrival_random_state
+
+
+def arrival_times(arrivals, no_traces, init_timestamp=0, seed=None):
+    '''
+    Compute the arrival time of every case
+
+    Parameters
+    ------------------------------------
+    arrivals
+        Mean inter-arrival time in seconds (exponentially distributed), a distribution of the
+        inter-arrival times as "np.random.<distribution>(<constant parameters>)" or the
+        inter-arrival times themselves (one per case)
+    no_traces
+        Number of cases
+    init_timestamp
+        Timestamp in seconds the first case arrives at
+    seed
+        If provided, the inter-arrival times are drawn from a stream derived from the seed
+
+    Returns the arrival times in seconds (int64).
+    '''
+
+    if isinstance(arrivals, str):
+        spec = parse_case_attr("arrival: " + arrivals)
+        if spec is None:
+            raise Exception("Please provide the inter-arrival times as np.random.<distribution>(<constants>)!")
+    elif np.ndim(arrivals) == 0:
+        spec = parse_case_attr("arrival: np.random.exponential(scale=%r)" % float(arrivals))
+    else:
+        spec = None
+        gaps = np.asarray(arrivals, dtype=float)
+        if len(gaps) != no_traces:
+            raise Exception("Please provide one inter-arrival time per case!")
+
+    if spec is not None:
+        gaps = spec.sample(no_traces, None if seed is None else arrival_random_state(seed))
+    gaps = np.round(np.asarray(gaps, dtype=float)).astype(np.int64)
+    if (gaps < 0).any():
+        raise Exception("Please provide non-negative inter-arrival times!")
+    # the first case arrives right away
+    gaps[:1] = 0
+    return init_timestamp + np.cumsum(gaps)
+
+
+def resource_pools(resources, labels):
+    '''
+    Map the activities to capacity-limited resource pools
+
+    Parameters
+    ------------------------------------
+    resources
+        Dictionary activity -> capacity, a tuple of activities as key shares one pool among them
+    labels
+        Activity names of the label codes of EventColumns
+
+    Returns the pool index of every label code (-1: unlimited) and the capacities of the pools.
+    '''
+
+    pool_of = [-1] * len(labels)
+    codes = {label: code for code, label in enumerate(labels)}
+    capacities = []
+    for activities, capacity in resources.items():
+        if int(capacity) < 1:
+            raise Exception("Please provide a capacity of at least 1 for %s!" % (activities,))
+        if isinstance(activities, str):
+            activities = (activities,)
+        for activity in activities:
+            if activity in codes:
+                pool_of[codes[activity]] = len(capacities)
+        capacities.append(int(capacity))
+    return pool_of, capacities
+
+
+def schedule(cases, activities, durations, arrivals, pool_of=None, capacities=(), first_case=0):
+    '''
+    Discrete-event scheduling of the events of many cases overlapping in time
+
+    Every case starts at its arrival time and each of its events starts once the previous
+    one ended and (if its activity belongs to a pool) one of the resources of the pool is
+    free. Events waiting for a pool are served first come, first served. Each event costs
+    O(log n) heap operations.
+
+    Parameters
+    ------------------------------------
+    cases
+        Case of every event, the events of a case are consecutive and in order
+    activities
+        Label code of every event
+    durations
+        Duration of every event in seconds
+    arrivals
+        Arrival time of every case in seconds (of the cases first_case, first_case+1, ...)
+    pool_of
+        Pool index per label code, -1 for activities without resource limits (see resource_pools)
+    capacities
+        Number of resources per pool
+    first_case
+        Case ID of the first case
+
+    Returns the start times of the events in seconds (int64) and the end of the last event.
+    '''
+
+    cases = np.asarray(cases, dtype=np.int64)
+    n = len(cases)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), int(arrivals[-1]) if len(arrivals) else 0
+
+    # the first event of every case is ready at the arrival of the case
+    firsts = np.flatnonzero(np.concatenate(([True], cases[1:] != cases[:-1])))
+    arrivals = np.asarray(arrivals, dtype=np.int64)
+    queue = list(zip(arrivals[cases[firsts] - first_case].tolist(), firsts.tolist()))
+    heapify(queue)
+
+    last_of_case = np.zeros(n, dtype=bool)
+    last_of_case[firsts[1:] - 1] = True
+    last_of_case[-1] = True
+    last_of_case = last_of_case.tolist()
+    activities = np.asarray(activities, dtype=np.int64).tolist()
+    durations = np.asarray(durations, dtype=np.int64).tolist()
+    if pool_of is None:
+        pool_of = [-1] * (max(activities) + 1)
+    # free times of the resources of every pool
+    pools = [[0] * capacity for capacity in capacities]
+    out = [0] * n
+    end = 0
+
+    while queue:
+        ready, row = heappop(queue)
+        pool = pool_of[activities[row]]
+        if pool < 0:
+            start = ready
+        else:
+            free = pools[pool]
+            start = max(ready, free[0])
+            heapreplace(free, start + durations[row])
+        out[row] = start
+        finish = start + durations[row]
+        if last_of_case[row]:
+            end = max(end, finish)
+        else:
+            heappush(queue, (finish, row + 1))
+
+    return np.array(out, dtype=np.int64), end
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from pm4py.objects.petri_net.obj import Marking
+
+
+# token count standing for arbitrarily many tokens (ω) in the compact markings
+OMEGA = np.iinfo(np.uint16).max
+
+
+class StateSpace:
+    """ Reachability (or coverability) graph of a CompiledNet, see explore """
+
+    def __init__(self, cnet, markings, edges, dead, complete):
+        self.cnet = cnet
+        # one row of uint16 token counts per state (in order of discovery), OMEGA for ω
+        self.markings = markings
+        # arrays of source state, transition index and target state of every edge
+        self.sources, self.labels, self.targets = edges
+        self.complete = complete
+        is_final = np.zeros(len(markings), dtype=bool)
+        if cnet.final_marking is not None and len(markings):
+            is_final = (markings == cnet.final_marking).all(axis=1)
+        # states without enabled transitions, except the final marking
+        self.deadlocks = np.flatnonzero(dead & ~is_final)
+        self.final_states = np.flatnonzero(is_final)
+        self._live = None
+
+    def __len__(self):
+        return len(self.markings)
+
+    @property
+    def bounded(self):
+        """ Whether no place can hold arbitrarily many tokens (only certain if complete) """
+
+        return not (self.markings == OMEGA).any()
+
+    @property
+    def bounds(self):
+        """ Maximum number of tokens per place (inf for unbounded places) """
+
+        bounds = self.markings.max(axis=0).astype(float) if len(self) else np.zeros(len(self.cnet.places))
+        bounds[bounds == OMEGA] = np.inf
+        return dict(zip(self.cnet.places, bounds.tolist()))
+
+    @property
+    def safe(self):
+        """ Whether no place ever holds more than one token """
+
+        return len(self) == 0 or int(self.markings.max()) <= 1
+
+    def firings(self):
+        """ Number of edges labeled with each transition """
+
+        counts = np.bincount(self.labels, minlength=len(self.cnet.transitions))
+        return dict(zip(self.cnet.transitions, counts.tolist()))
+
+    @property
+    def dead_transitions(self):
+        """ Transitions that are not enabled in any reachable marking """
+
+        return [t for t, n in self.firings().items() if n == 0]
+
+    @property
+    def live_transitions(self):
+        '''
+        Transitions that can be enabled again from every reachable marking
+
+        A transition is live if it labels an edge within every terminal strongly
+        connected component of the reachability graph. Requires a complete
+        exploration of a bounded net.
+        '''
+
+        if not (self.complete and self.bounded):
+            raise Exception("Please explore the complete state space of a bounded net to decide liveness!")
+        if self._live is None:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import connected_components
+
+            n = len(self)
+            graph = csr_matrix((np.ones(len(self.sources), dtype=np.int8), (self.sources, self.targets)), shape=(n, n))
+            _, component = connected_components(graph, directed=True, connection="strong")
+            leaving = component[self.sources] != component[self.targets]
+            terminal = np.ones(component.max() + 1, dtype=bool)
+            terminal[component[self.sources[leaving]]] = False
+
+            inner = ~leaving & terminal[component[self.sources]]
+            pairs = set(zip(component[self.sources[inner]].tolist(), self.labels[inner].tolist()))
+            no_terminal = int(terminal.sum())
+            counts = np.bincount([t for _, t in pairs], minlength=len(self.cnet.transitions))
+            self._live = [t for t, n in zip(self.cnet.transitions, counts) if n == no_terminal]
+        return self._live
+
+    def marking(self, state):
+        """ Returns the pm4py-marking of a state (ω as inf) """
+
+        marking = Marking()
+        row = self.markings[state]
+        for i in np.flatnonzero(row):
+            marking[self.cnet.places[i]] = np.inf if row[i] == OMEGA else int(row[i])
+        return marking
+
+    def summary(self):
+        """ Returns the key figures of the exploration as dictionary """
+
+        return {
+            "states": len(self),
+            "edges": len(self.sources),
+            "complete": self.complete,
+            "bounded": self.bounded,
+            "safe": self.safe,
+            "deadlocks": len(self.deadlocks),
+            "dead_transitions": [t.label or t.name for t in self.dead_transitions],
+        }
+
+    def __repr__(self):
+        return "StateSpace(%s)" % ", ".join("%s=%s" % item for item in self.summary().items())
+
+
+def explore(cnet, max_states=1000000, max_memory=None, coverability=True):
+    '''
+    Explore the markings reachable from the initial marking of a net breadth-first
+
+    Parameters
+    ------------------------------------
+    cnet
+        CompiledNet of the net (conditions and probabilities are not taken into account)
+    max_states
+        Exploration stops once this many states are found
+    max_memory
+        If provided, exploration stops once markings, index and edges take about this many MB
+    coverability
+        Replace token counts growing along a path by ω (Karp-Miller), so that the
+        exploration of unbounded nets terminates
+
+    Returns the StateSpace, which is incomplete if a budget was exhausted.
+    '''
+
+    n_places = len(cnet.places)
+    width = 2 * n_places
+    inputs = cnet.inputs.T.astype(np.float32)
+    change = cnet.change.astype(np.int32)
+    if max_memory is not None:
+        # rough size of a state: its row, its bytes key in the index and a few edges
+        state_bytes = width + (width + 100) + 4 * 12
+        max_states = min(max_states, max(1, int(max_memory * 2**20 / state_bytes)))
+
+    initial = cnet.initial_marking
+    if (initial >= OMEGA).any():
+        raise Exception("Please use less than %d tokens per place!" % OMEGA)
+
+    # per state: its marking, parent, token sum and nearest ancestor with a smaller sum,
+    # only those ancestors can be strictly covered by a successor
+    space = _States(min(max_states, 1024), n_places)
+    space.add(initial[None, :].astype(np.uint16), np.array([-1]), np.array([initial.sum()]))
+    index = {space.markings[0].tobytes(): 0}
+
+    frontier = np.arange(1)
+    dead = []
+    sources, labels, targets = [], [], []
+    complete = True
+
+    while frontier.size and complete:
+        m = space.markings[frontier]
+        enabled = (m < 1).astype(np.float32).dot(inputs) == 0
+        dead.append(frontier[~enabled.any(axis=1)])
+        rows, trans = np.nonzero(enabled)
+        succ = m[rows]
+        omega = succ == OMEGA
+        succ = succ.astype(np.int32) + change[trans]
+        if (succ[~omega] >= OMEGA).any():
+            raise Exception("Too many tokens, please explore unbounded nets with coverability=True!")
+        succ[omega] = OMEGA
+        succ = succ.astype(np.uint16)
+        parents = frontier[rows]
+
+        # every distinct successor of the level is looked up once
+        keys = succ.view(np.dtype((np.void, width))).ravel()
+        unique, first_seen, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        uniq_succ = succ[first_seen]
+        uniq_parents = parents[first_seen]
+        unique = unique.tolist()
+        states = np.array([index.get(key, -1) for key in unique], dtype=np.int64)
+
+        unknown = np.flatnonzero(states < 0)
+        if coverability and unknown.size:
+            covering = unknown[space.covers_ancestor(uniq_succ[unknown], uniq_parents[unknown])]
+            for j in covering.tolist():
+                accelerated = space.accelerate(uniq_succ[j], uniq_parents[j])
+                uniq_succ[j] = accelerated
+                unique[j] = accelerated.tobytes()
+                states[j] = index.get(unique[j], -1)
+            unknown = np.flatnonzero(states < 0)
+
+        new = []
+        count = first = len(space)
+        for j in unknown.tolist():
+            key = unique[j]
+            state = index.get(key)
+            if state is None:
+                if count == max_states:
+                    complete = False
+                    break
+                state = index[key] = count
+                new.append(j)
+                count += 1
+            states[j] = state
+        space.add(uniq_succ[new], uniq_parents[new], uniq_succ[new].astype(np.int64).sum(axis=1), max_states)
+
+        found = states[inverse.ravel()]
+        # edges into states beyond the budget are dropped
+        kept = found >= 0
+        sources.append(parents[kept].astype(np.int32))
+        labels.append(trans[kept].astype(np.int32))
+        targets.append(found[kept].astype(np.int32))
+        frontier = np.arange(first, count)
+
+    edges = tuple(np.concatenate(part) if part else np.empty(0, dtype=np.int32) for part in (sources, labels, targets))
+    is_dead = np.zeros(len(space), dtype=bool)
+    is_dead[np.concatenate(dead)] = True
+    return StateSpace(cnet, space.markings[:len(space)].copy(), edges, is_dead, complete)
+
+
+class _States:
+    """ Growing arrays of the explored states """
+
+    def __init__(self, capacity, n_places):
+        self.markings = np.empty((capacity, n_places), dtype=np.uint16)
+        self.parent = np.empty(capacity, dtype=np.int64)
+        self.sums = np.empty(capacity, dtype=np.int64)
+        self.lower = np.empty(capacity, dtype=np.int64)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, markings, parents, sums, max_states=None):
+        n = self.count + len(markings)
+        if n > len(self.markings):
+            size = max(2 * len(self.markings), n)
+            if max_states is not None:
+                size = max(min(size, max_states), n)
+            for name in ("markings", "parent", "sums", "lower"):
+                array = getattr(self, name)
+                grown = np.empty((size,) + array.shape[1:], dtype=array.dtype)
+                grown[:self.count] = array[:self.count]
+                setattr(self, name, grown)
+        self.markings[self.count:n] = markings
+        self.parent[self.count:n] = parents
+        self.sums[self.count:n] = sums
+        self.lower[self.count:n] = self.below(parents, sums)
+        self.count = n
+
+    def below(self, states, sums):
+        """ Nearest states on the paths up from states (inclusive) whose sum is smaller than sums, -1 if none """
+
+        states = np.array(states, dtype=np.int64)
+        sums = np.asarray(sums)
+        todo = np.flatnonzero(states >= 0)
+        while todo.size:
+            todo = todo[self.sums[states[todo]] >= sums[todo]]
+            states[todo] = self.lower[states[todo]]
+            todo = todo[states[todo] >= 0]
+        return states
+
+    def covers_ancestor(self, markings, parents):
+        """ Whether each marking strictly covers a state on the path up from its parent """
+
+        sums = markings.astype(np.int64).sum(axis=1)
+        covers = np.zeros(len(markings), dtype=bool)
+        todo = np.arange(len(markings))
+        ancestors = self.below(parents, sums)
+        while todo.size:
+            alive = ancestors >= 0
+            todo, ancestors = todo[alive], ancestors[alive]
+            candidate = self.markings[ancestors]
+            hit = (candidate <= markings[todo]).all(axis=1)
+            covers[todo[hit]] = True
+            todo, ancestors = todo[~hit], ancestors[~hit]
+            ancestors = self.below(self.parent[ancestors], sums[todo])
+        return covers
+
+    def accelerate(self, marking, state):
+        """ Sets ω where marking strictly covers a state on the path up from state """
+
+        marking = marking.copy()
+        total = int(marking.astype(np.int64).sum())
+        state = self.below([state], [total])[0]
+        while state >= 0:
+            ancestor = self.markings[state]
+            if (ancestor <= marking).all():
+                marking[ancestor < marking] = OMEGA
+                total = int(marking.astype(np.int64).sum())
+            state = self.below([self.parent[state]], [total])[0]
+        return marking
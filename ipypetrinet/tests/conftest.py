@@ -52,3 +52,34 @@ def mock_comm():
             delattr(Widget, attr)
         else:
             setattr(Widget, attr, value)
+
+
+@pytest.fixture
+def example_graph():
+    """A small net with a choice, a loop, conditions and event attributes."""
+    return [
+        {"type": "Place", "id": "p1", "name": "start", "tokens": 1},
+        {"type": "Place", "id": "p2", "name": "p2", "tokens": 0},
+        {"type": "Place", "id": "p3", "name": "p3", "tokens": 0},
+        {"type": "Place", "id": "p4", "name": "end", "tokens": 0},
+        {"type": "Transition", "id": "t1", "name": "register", "conditions": [], "exectime": 3600,
+         "eventattrs": ["amount=np.random.normal(loc=100, scale=10)"]},
+        {"type": "Transition", "id": "t2", "name": "approve", "conditions": ["amount > 100"], "exectime": 600,
+         "eventattrs": []},
+        {"type": "Transition", "id": "t3", "name": "reject", "conditions": ["amount <= 100"], "exectime": 600,
+         "eventattrs": []},
+        {"type": "Transition", "id": "t4", "name": "rework", "conditions": [], "exectime": 1800,
+         "eventattrs": ["amount=amount+5"]},
+        {"type": "Transition", "id": "t5", "name": "archive", "conditions": [], "exectime": 60,
+         "eventattrs": []},
+        {"type": "Link", "id": "l1", "source": "p1", "target": "t1", "prob": 1},
+        {"type": "Link", "id": "l2", "source": "t1", "target": "p2", "prob": 1},
+        {"type": "Link", "id": "l3", "source": "p2", "target": "t2", "prob": 1},
+        {"type": "Link", "id": "l4", "source": "p2", "target": "t3", "prob": 1},
+        {"type": "Link", "id": "l5", "source": "t2", "target": "p4", "prob": 1},
+        {"type": "Link", "id": "l6", "source": "t3", "target": "p3", "prob": 1},
+        {"type": "Link", "id": "l7", "source": "p3", "target": "t4", "prob": 0.5},
+        {"type": "Link", "id": "l8", "source": "p3", "target": "t5", "prob": 0.5},
+        {"type": "Link", "id": "l9", "source": "t4", "target": "p2", "prob": 1},
+        {"type": "Link", "id": "l10", "source": "t5", "target": "p4", "prob": 1},
+    ]
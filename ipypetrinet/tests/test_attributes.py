@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pandas as pd
+
+from ..attributes import AttributeSpec, parse_case_attr, sample_case_attrs
+from ..widget import PetriWidget
+
+
+CASE_ATTRS = [
+    "priority: np.random.choice(['low', 'high'], p=[0.3, 0.7])",
+    "scaled: np.random.normal(loc=1) * 2",
+    "budget: np.random.gamma(shape=9, scale=0.5)",
+]
+
+
+def test_parse_case_attrs():
+    assert parse_case_attr("cost: np.random.normal(loc=1, scale=0.5)") == \
+        AttributeSpec("cost", "normal", (), {"loc": 1, "scale": 0.5})
+    assert parse_case_attr("n: np.random.binomial(n=1, p=0.5)").distribution == "binomial"
+    # everything else keeps the per-case path
+    assert parse_case_attr("scaled: np.random.normal(loc=1) * 2") is None
+    assert parse_case_attr("k: np.random.poisson(3)") is None
+    assert parse_case_attr("c: np.random.choice(names)") is None
+    assert parse_case_attr("e: np.random.exponential(scale=3, size=2)") is None
+
+
+def test_values_do_not_depend_on_sharding():
+    specs = [parse_case_attr(CASE_ATTRS[0]), parse_case_attr(CASE_ATTRS[2])]
+    full = sample_case_attrs(specs, 0, 3000, seed=1)
+    part = sample_case_attrs(specs, 1000, 1500, seed=1)
+
+    assert (full["budget"][1000:2500] == part["budget"]).all()
+    assert (full["priority"][1000:2500] == part["priority"]).all()
+
+
+def test_case_attrs_joined_to_log(example_graph):
+    w = PetriWidget()
+    df = w.generate_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=60, seed=2)
+    chunks = w.iter_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=60, seed=2, chunk_size=25)
+
+    assert list(df.columns) == ["activity:name", "time:timestamp", "amount", "priority", "scaled", "budget", "case:id"]
+    assert df["budget"].dtype == float
+    assert (df.groupby("case:id")[["priority", "budget"]].nunique() == 1).all().all()
+    assert pd.concat(chunks).equals(df)
+    assert df.equals(w.generate_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=60, seed=2, workers=2))
+
+
+def test_event_attrs_may_change_case_attrs(example_graph):
+    graph = [dict(c, eventattrs=["budget=budget+1"]) if c.get("name") == "rework" else c for c in example_graph]
+    w = PetriWidget()
+    df = w.generate_eventlog(graph, case_attrs=CASE_ATTRS, no_traces=40, seed=2)
+
+    reworked = df[df["activity:name"] == "rework"]["case:id"].iloc[0]
+    budgets = df[df["case:id"] == reworked]["budget"]
+    assert budgets.iloc[-1] > budgets.iloc[0]
+
+
+def test_last_definition_of_a_case_attr_wins(example_graph):
+    w = PetriWidget()
+    drawn = "x: np.random.normal(loc=100, scale=1)"
+    df = w.generate_eventlog(example_graph, case_attrs=["x: 5", "y: x + 1", drawn], no_traces=20, seed=2)
+    assert (df["x"] > 90).all() and (df["y"] == 6).all()
+
+    df = w.generate_eventlog(example_graph, case_attrs=[drawn, "x: 5"], no_traces=20, seed=2)
+    assert (df["x"] == 5).all()
+    df = w.generate_eventlog(example_graph, case_attrs=["x: 5", drawn], no_traces=20)
+    assert (df["x"] > 90).all()
+
+
+def test_no_cases(example_graph):
+    specs = [parse_case_attr(CASE_ATTRS[0]), parse_case_attr(CASE_ATTRS[2])]
+    assert {name: len(values) for name, values in sample_case_attrs(specs, 5, 0, seed=1).items()} == \
+        {"priority": 0, "budget": 0}
+
+    w = PetriWidget()
+    assert len(w.generate_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=0, seed=2)) == 0
+    assert len(w.generate_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=0)) == 0
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+import threading
+
+from ..background import SimulationProgress
+from ..widget import PetriWidget
+
+
+def test_background_log_equals_generated_log(example_graph):
+    w = PetriWidget()
+    reports = []
+    w.observe(lambda change: reports.append(change["new"]), "progress")
+    future = w.generate_eventlog_async(example_graph, no_traces=300, seed=3, chunk_size=100, progress_interval=0)
+
+    assert future.result(timeout=60).equals(w.generate_eventlog(example_graph, no_traces=300, seed=3))
+    assert [r["cases"] for r in reports] == [0, 100, 200, 300, 300]
+    assert reports[-1]["state"] == "done" and reports[-1]["eta"] == 0
+
+
+def test_cancel_returns_partial_log(example_graph):
+    go = threading.Event()
+
+    def datafunc():
+        go.wait(timeout=60)
+        return {}
+
+    w = PetriWidget()
+    future = w.generate_eventlog_async(example_graph, no_traces=1000, seed=3, chunk_size=10, datafunc=datafunc)
+    with pytest.raises(Exception):
+        w.generate_eventlog_async(example_graph)
+    assert w.cancel_eventlog()
+    go.set()
+
+    df = future.result(timeout=60)
+    assert df["case:id"].nunique() == 10
+    assert w.progress["state"] == "cancelled"
+    assert not w.cancel_eventlog()
+
+
+def test_cancel_with_arrivals_per_case(example_graph):
+    go = threading.Event()
+
+    def datafunc():
+        go.wait(timeout=60)
+        return {}
+
+    w = PetriWidget()
+    arrivals = [600] * 1000
+    future = w.generate_eventlog_async(example_graph, no_traces=1000, seed=3, chunk_size=10, datafunc=datafunc,
+                                       arrivals=arrivals)
+    assert w.cancel_eventlog()
+    go.set()
+
+    df = future.result(timeout=60)
+    assert df["case:id"].nunique() == 10
+    assert w.progress["state"] == "cancelled"
+    assert df.equals(w.generate_eventlog(example_graph, no_traces=10, seed=3, arrivals=arrivals[:10]))
+
+
+def test_failures_are_reported(example_graph):
+    def datafunc():
+        raise ValueError("broken")
+
+    w = PetriWidget()
+    future = w.generate_eventlog_async(example_graph, datafunc=datafunc)
+    with pytest.raises(ValueError):
+        future.result(timeout=60)
+    assert w.progress["state"] == "failed"
+
+
+def test_progress_is_throttled():
+    reports = []
+    progress = SimulationProgress(100, reports.append, interval=60)
+    for _ in range(10):
+        progress.update(5, 50)
+    progress.update(50, 500, state="done")
+
+    assert [r["cases"] for r in reports] == [5, 100]
+    assert reports[-1]["events"] == 1000
+
+
+def test_runs_do_not_share_a_sampler(example_graph):
+    # the foreground runs with another stochastic map while the background run is going
+    other = [dict(c, prob=0.9) if c["id"] == "l7" else dict(c, prob=0.1) if c["id"] == "l8" else c
+             for c in example_graph]
+    w = PetriWidget()
+    expected = [w.generate_eventlog(graph, no_traces=300, seed=3) for graph in (example_graph, other)]
+
+    future = w.generate_eventlog_async(example_graph, no_traces=300, seed=3, chunk_size=10)
+    logs = [w.generate_eventlog(other, no_traces=300, seed=3) for _ in range(3)]
+    assert future.result(timeout=60).equals(expected[0])
+    assert all(log.equals(expected[1]) for log in logs)
+    # every run draws from its own sampler, the one of pick_transition is left alone
+    assert w._sampler is None
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from pm4py.objects.conversion.log import converter as log_converter
+
+from ..columns import EventColumns
+from ..widget import PetriWidget
+
+
+def test_columns_fill_missing_attributes():
+    columns = EventColumns()
+    columns.no_cases = 2
+    columns.add_event(0, "A", 10)
+    columns.set_attr("x", 1)
+    columns.add_event(1, "B", 20)
+    columns.add_event(1, "A", 30)
+    columns.set_attr("y", "v")
+
+    df = columns.to_dataframe()
+    assert list(df.columns) == ["activity:name", "time:timestamp", "x", "y", "case:id"]
+    assert list(df["activity:name"]) == ["A", "B", "A"]
+    assert list(df["case:id"]) == ["0", "1", "1"]
+    assert df["x"].isna().tolist() == [False, True, True]
+    assert list(columns.durations) == [10, 20, 30]
+
+
+def test_dataframe_matches_event_log_conversion(example_graph):
+    w = PetriWidget()
+    net, trans, links, initial_marking = w.createPetriNet(example_graph)
+    smap = w.build_smap(trans, links)
+    case_attrs = ["priority: np.random.choice(['low', 'high'])"]
+
+    log = w.apply_playout(net, initial_marking, case_attrs=case_attrs, no_traces=30, smap=smap, seed=5)
+    df = w.generate_eventlog(example_graph, case_attrs=case_attrs, no_traces=30, seed=5)
+
+    assert len(log) == 30
+    assert log_converter.apply(log, variant=log_converter.Variants.TO_DATA_FRAME).equals(df)
+    assert len(w.generate_eventlog(example_graph, no_traces=30, seed=5, output="eventlog")) == 30
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+import random
+import numpy as np
+
+from ..engine import CompiledNet
+from ..widget import PetriWidget
+
+
+def simulate(graph, **kwargs):
+    w = PetriWidget()
+    random.seed(42)
+    np.random.seed(42)
+    return w.generate_eventlog(graph, **kwargs)
+
+
+def test_compiled_net_incidence(example_graph):
+    w = PetriWidget()
+    net, _, _, initial_marking = w.createPetriNet(example_graph)
+    cnet = CompiledNet(net, initial_marking)
+
+    assert [t.name for t in cnet.transitions] == ["t1", "t2", "t3", "t4", "t5"]
+    assert list(cnet.initial_marking) == [1, 0, 0, 0]
+    assert [t.name for t in cnet.enabled(cnet.initial_marking)] == ["t1"]
+
+    m = cnet.fire(cnet.initial_marking, cnet.transitions[0])
+    assert list(m) == [0, 1, 0, 0]
+    assert cnet.to_marking(m) == w.execute(cnet.transitions[0], initial_marking)
+
+
+def test_compiled_engine_matches_pm4py_engine(example_graph):
+    case_attrs = ["priority: np.random.choice(['low', 'high'])"]
+    df_pm4py = simulate(example_graph, case_attrs=case_attrs, no_traces=50, worktime=(8, 17))
+    df_compiled = simulate(example_graph, case_attrs=case_attrs, no_traces=50, worktime=(8, 17),
+                           engine="compiled")
+
+    assert len(df_pm4py) > 50
+    assert df_pm4py.equals(df_compiled)
+
+
+def test_batched_playout_sequences(example_graph):
+    w = PetriWidget()
+    net, _, _, initial_marking = w.createPetriNet(example_graph)
+    cnet = CompiledNet(net, initial_marking)
+    weights = np.ones(len(cnet.transitions))
+
+    np.random.seed(0)
+    sequences = cnet.batched_playout(weights, no_traces=25, max_trace_length=4, batch_size=10)
+
+    assert len(sequences) == 25
+    for seq in sequences:
+        assert 2 <= len(seq) <= 4
+        assert seq[0] == 0
+        m = cnet.initial_marking
+        for t in seq:
+            assert cnet.enabled_mask(m)[t]
+            m = m + cnet.change[t]
+
+
+def test_batched_engine_falls_back_on_conditions(example_graph):
+    with pytest.warns(UserWarning):
+        df_batched = simulate(example_graph, no_traces=20, engine="batched")
+    df_compiled = simulate(example_graph, no_traces=20, engine="compiled")
+    assert df_batched.equals(df_compiled)
+
+
+def test_batched_engine_without_conditions(example_graph):
+    for cell in example_graph:
+        if cell["type"] == "Transition":
+            cell["conditions"] = []
+    df = simulate(example_graph, no_traces=200, engine="batched")
+
+    assert df["case:id"].nunique() == 200
+    assert (df.groupby("case:id")["activity:name"].first() == "register").all()
+    assert set(df["activity:name"]) == {"register", "approve", "reject", "rework", "archive"}
+
+
+def test_built_net_indexes(example_graph):
+    w = PetriWidget()
+    built = w.createPetriNet(example_graph)
+    net, trans, links, initial_marking = built
+
+    assert built.transitions_by_id["t2"] in net.transitions
+    assert len(net.arcs) == len([c for c in example_graph if c["type"] == "Link"])
+    assert built.smap == w.build_smap(trans, links)
+    assert {t.name: p for t, p in built.smap.items()}["t4"] == 0.5
+    # derived objects are kept for later calls
+    assert built.compiled is built.compiled
+    assert built.expressions(["x: 1"]) is built.expressions(["x: 1"])
+
+
+def test_event_attrs_equal_across_engines(example_graph):
+    # every enabled candidate counts itself, so the values depend on the enabled sets of the trace
+    for cell in example_graph:
+        if cell["type"] == "Transition":
+            cell["conditions"] = []
+            cell["eventattrs"] = ["seen=seen+1"]
+    traces = {}
+    for engine in ["pm4py", "compiled", "batched"]:
+        df = simulate(example_graph, case_attrs=["seen: 0"], no_traces=100, max_trace_length=8, engine=engine)
+        for _, case in df.groupby("case:id"):
+            trace = tuple(case["activity:name"])
+            assert traces.setdefault(trace, list(case["seen"])) == list(case["seen"])
+
+    assert len(traces) > 3
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from .. import widget
+from ..expressions import NetExpressions
+from ..widget import PetriWidget
+
+
+def test_case_namespaces_are_isolated(example_graph):
+    w = PetriWidget()
+    net, _, _, _ = w.createPetriNet(example_graph)
+    exprs = NetExpressions(net.transitions, ["priority: 'high'"])
+
+    first, second = exprs.new_case(), exprs.new_case()
+    assert first["amount"] is None and first["priority"] == "high"
+
+    register = [t for t in net.transitions if t.name == "t1"]
+    assert exprs.filter_conditions(register, first) == register
+    assert first["amount"] is not None
+    assert second["amount"] is None
+    assert not hasattr(widget, "amount")
+
+
+def test_conditions_are_evaluated_per_case(example_graph):
+    w = PetriWidget()
+    net, _, _, _ = w.createPetriNet(example_graph)
+    exprs = NetExpressions(net.transitions)
+    choice = [t for t in net.transitions if t.name in ("t2", "t3")]
+
+    namespace = exprs.new_case()
+    namespace["amount"] = 120
+    assert [t.name for t in exprs.filter_conditions(choice, namespace)] == ["t2"]
+    namespace["amount"] = 80
+    assert [t.name for t in exprs.filter_conditions(choice, namespace)] == ["t3"]
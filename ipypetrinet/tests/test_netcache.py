@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import copy
+
+import pytest
+
+from .. import netcache
+from ..netcache import NetCache, GraphIndex, graph_key
+from ..widget import PetriWidget
+
+
+def test_graph_key_ignores_layout(example_graph):
+    moved = copy.deepcopy(example_graph)
+    for cell in moved:
+        cell["position"] = {"x": 10, "y": 20}
+    changed = copy.deepcopy(example_graph)
+    changed[0]["tokens"] = 2
+
+    assert graph_key(moved) == graph_key(example_graph)
+    assert graph_key(changed) != graph_key(example_graph)
+
+
+def test_graph_key_combines_all_digests(example_graph):
+    assert graph_key(list(reversed(example_graph))) == graph_key(example_graph)
+    # a cell given twice is indexed once, it does not cancel itself out
+    assert graph_key(example_graph + example_graph[:1]) == graph_key(example_graph)
+    assert graph_key(example_graph + example_graph[:1]) != graph_key(example_graph[1:])
+
+    index = GraphIndex(example_graph)
+    index.apply(upsert=[dict(example_graph[0], tokens=2)], remove=["l10"])
+    index.apply(upsert=[example_graph[0], example_graph[-1]])
+    assert index.key == graph_key(example_graph)
+
+
+def test_smap_does_not_depend_on_the_link_order(example_graph):
+    w = PetriWidget()
+    join = example_graph + [{"type": "Place", "id": "p5", "name": "p5", "tokens": 1},
+                            {"type": "Link", "id": "l11", "source": "p5", "target": "t5", "prob": 0.5}]
+    reordered = join[:-2] + join[-1:] + join[-2:-1]
+    assert graph_key(reordered) == graph_key(join)
+    smap = {t.name: p for t, p in w.createPetriNet(join).smap.items()}
+    assert smap == {t.name: p for t, p in w.createPetriNet(reordered).smap.items()}
+    assert smap["t5"] == 0.5
+
+    # conflicting probabilities of the links into a transition would make the map depend on their order
+    conflicting = copy.deepcopy(join)
+    conflicting[-1]["prob"] = 0.9
+    with pytest.raises(Exception, match="t5"):
+        w.createPetriNet(conflicting).smap
+
+
+def test_repeated_runs_reuse_the_net(example_graph):
+    w = PetriWidget()
+    first = w.generate_eventlog(example_graph, no_traces=20, seed=3, engine="compiled")
+    second = w.generate_eventlog(example_graph, no_traces=20, seed=3, engine="compiled")
+
+    assert first.equals(second)
+    assert w.net_cache_info()["misses"] == 1
+    assert w.net_cache_info()["hits"] == 1
+
+
+def test_graph_change_invalidates(example_graph):
+    w = PetriWidget(graph=example_graph)
+    built = w.compile_graph(w.graph)
+
+    # moving cells keeps the net
+    w.graph = [dict(cell, position={"x": 1, "y": 1}) for cell in example_graph]
+    assert w.compile_graph(w.graph) is built
+
+    changed = copy.deepcopy(example_graph)
+    changed[0]["tokens"] = 2
+    w.graph = changed
+    assert w.net_cache_info()["invalidations"] == 1
+    assert w.compile_graph(w.graph) is not built
+
+
+def test_lru_eviction():
+    cache = NetCache(maxsize=2)
+    for key in ["a", "b", "a", "c"]:
+        cache.get((key, "net"), object)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 1
+    assert ("a", "net") in cache._entries and ("b", "net") not in cache._entries
+
+
+def test_graph_patches(example_graph):
+    w = PetriWidget(graph=example_graph)
+    sent = []
+    w._send = lambda msg, buffers=None: sent.append(msg)
+
+    renamed = dict(example_graph[1], name="check")
+    added = {"type": "Place", "id": "p9", "name": "p9", "tokens": 0}
+    w._handle_frontend_msg(w, {"event": "graph_patch", "upsert": [renamed, added], "remove": [example_graph[0]["id"]]}, [])
+
+    assert w.graph == [renamed] + example_graph[2:] + [added]
+    # the patched graph is not sent back to the frontend
+    assert sent == []
+
+    # assigning the graph in Python still syncs and resets the index
+    w.graph = example_graph
+    assert sent[-1]["state"]["graph"] == example_graph
+    w.apply_graph_patch(remove=["p9"])
+    assert w.graph == example_graph
+
+
+def test_patches_only_hash_changed_cells(example_graph, monkeypatch):
+    w = PetriWidget(graph=example_graph)
+    built = w.compile_graph(w.graph)
+
+    hashed = []
+    digest = netcache.cell_digest
+    monkeypatch.setattr(netcache, "cell_digest", lambda cell: hashed.append(cell["id"]) or digest(cell))
+    w.apply_graph_patch([dict(example_graph[0], position={"x": 5, "y": 5})])
+    assert hashed == [example_graph[0]["id"]]
+    assert w.compile_graph(w.graph) is built
+
+    assert hashed == [example_graph[0]["id"]]
+
+    w.apply_graph_patch([dict(example_graph[0], tokens=3)], remove=["l10"])
+    assert w._graph_index.key == graph_key(w.graph) == GraphIndex(reversed(w.graph)).key
+    assert w.net_cache_info()["invalidations"] == 1
+
+
+def test_compile_graph_reuses_the_key_of_the_graph(example_graph, monkeypatch):
+    w = PetriWidget(graph=example_graph)
+    monkeypatch.setattr("ipypetrinet.widget.graph_key", lambda graph: 1 / 0)
+    built = w.compile_graph(w.graph)
+    assert w.compile_graph(w.graph) is built
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import random
+import numpy as np
+import pandas as pd
+
+from ..widget import PetriWidget
+
+
+def make_log(sizes):
+    rows = []
+    t = pd.Timestamp("2021-01-01 12:00")
+    for case, size in enumerate(sizes):
+        for pos in range(size):
+            rows.append({"activity:name": "a%d" % pos, "time:timestamp": t, "case:id": str(case)})
+            t += pd.Timedelta(minutes=10 * (pos + 1))
+    return pd.DataFrame(rows)
+
+
+def seed():
+    random.seed(0)
+    np.random.seed(0)
+
+
+def test_strip_start_and_end():
+    w = PetriWidget()
+    seed()
+    df = w.strip_start(make_log([4] * 10), prob=0.5, n=2)
+    first = df.groupby("case:id")["activity:name"].first()
+    assert (first != "a0").sum() == 5
+    assert set(first) <= {"a0", "a1", "a2"}
+
+    seed()
+    df = w.strip_end(make_log([4] * 10), prob=0.3, n=2)
+    assert sorted(df.groupby("case:id").size().tolist()) == [2, 2, 2] + [4] * 7
+
+
+def test_add_silence_keeps_start_and_end():
+    w = PetriWidget()
+    seed()
+    df = w.addSilence(make_log([2, 5, 5, 5]), prob=1)
+    assert df.groupby("case:id").size().tolist() == [2, 4, 4, 4]
+    assert (df.groupby("case:id")["activity:name"].first() == "a0").all()
+    assert (df.groupby("case:id")["activity:name"].last().iloc[1:] == "a4").all()
+    assert list(df.index) == list(range(14))
+
+
+def test_switch_timestamps_within_cases():
+    w = PetriWidget()
+    log = make_log([3] * 8)
+    seed()
+    df = w.switchTimestamps(log.copy(), prob=0.5)
+
+    changed = (df["time:timestamp"] != log["time:timestamp"]).groupby(df["case:id"]).sum()
+    assert sorted(changed.tolist()) == [0] * 4 + [2] * 4
+    for case in df["case:id"].unique():
+        assert sorted(df[df["case:id"] == case]["time:timestamp"]) == \
+            sorted(log[log["case:id"] == case]["time:timestamp"])
+
+
+def test_add_doubles_delays_following_events():
+    w = PetriWidget()
+    original = make_log([3, 3])
+    log = original.copy()
+    seed()
+    df = w.addDoubles(log, prob=1)
+
+    # the log is changed in place, like by the other noise functions
+    assert df is log and len(log) == 8
+    assert list(log.columns) == list(original.columns) and (log.dtypes == original.dtypes).all()
+    assert log.groupby("case:id").size().tolist() == [4, 4]
+    assert list(df.index) == list(range(8))
+    assert (df["time:timestamp"].diff().dropna() >= pd.Timedelta(0)).all()
+    delay = df["time:timestamp"].iloc[-1] - original["time:timestamp"].iloc[-1]
+    assert delay > pd.Timedelta(0)
+
+
+def test_pipeline_equals_sequential_noise():
+    w = PetriWidget()
+    log = make_log([3, 5, 4, 6, 2, 5] * 5)
+
+    seed()
+    df = w.addSilence(log.copy(), prob=0.3)
+    df = w.addDoubles(df, prob=0.2)
+    df = w.switchTimestamps(df, prob=0.2)
+    df = w.strip_start(df, prob=0.2, n=2).reset_index(drop=True)
+
+    seed()
+    piped = w.apply_noise(log, [("silence", 0.3), ("doubles", 0.2), ("switch", 0.2), ("start", 0.2, {"n": 2})])
+
+    assert piped.equals(df)
+
+
+def test_pipeline_in_chunks_carries_delay():
+    w = PetriWidget()
+    log = make_log([4] * 20)
+
+    seed()
+    df = w.apply_noise(log, [("doubles", 0.4), ("end", 0.2)], chunk_size=5)
+
+    assert len(df) == len(log) + 8 - 4
+    assert list(df["case:id"].unique()) == [str(i) for i in range(20)]
+    assert (df["time:timestamp"].diff().dropna() >= pd.Timedelta(0)).all()
+    assert df["time:timestamp"].iloc[-1] > log["time:timestamp"].iloc[-1]
+
+
+def test_empty_log():
+    w = PetriWidget()
+    empty = make_log([3]).iloc[:0]
+    for name in ["strip_start", "strip_end", "addSilence", "switchTimestamps", "addDoubles"]:
+        assert getattr(w, name)(empty.copy(), prob=0.5).equals(empty)
+    assert w.apply_noise(empty, [("silence", 0.3), ("doubles", 0.2), ("switch", 0.2), ("start", 0.2)]).equals(empty)
+    assert w.apply_noise(empty, [("doubles", 0.2), ("end", 0.2)], chunk_size=5).equals(empty)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from ..widget import PetriWidget
+
+
+def test_seed_reproduces_log(example_graph):
+    w = PetriWidget()
+    case_attrs = ["priority: np.random.choice(['low', 'high'])"]
+    df1 = w.generate_eventlog(example_graph, case_attrs=case_attrs, no_traces=30, seed=7, engine="compiled")
+    df2 = w.generate_eventlog(example_graph, case_attrs=case_attrs, no_traces=30, seed=7)
+    df3 = w.generate_eventlog(example_graph, case_attrs=case_attrs, no_traces=30, seed=8)
+
+    assert df1.equals(df2)
+    assert not df1.equals(df3)
+
+
+def test_workers_match_single_process(example_graph):
+    w = PetriWidget()
+    single = w.generate_eventlog(example_graph, no_traces=40, seed=3, worktime=(8, 17))
+    sharded = w.generate_eventlog(example_graph, no_traces=40, seed=3, worktime=(8, 17), workers=3)
+
+    assert single.equals(sharded)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import io
+import tracemalloc
+
+from ..pnml import iter_pnml, read_pnml, write_pnml
+from ..widget import PetriWidget
+
+
+# as exported by the frontend (downloadPNML)
+FRONTEND_PNML = b"""<?xml version="1.0" encoding="ISO-8859-1"?>
+<pnml><net id="net" type="https://www.pnml.org"> <caseattr label='budget: np.random.normal(loc=5)'/>
+  <name><text>PetriNet</text></name>
+  <page id="Page0"><name><text/></name>
+    <place id="p1"><name><text>start</text></name><toolspecific tool="ipypetrinet"/>
+      <graphics><position x="2" y="3"/><dimension x="50" y="50"/></graphics>
+      <initialMarking><text>2</text></initialMarking></place>
+    <place id="p2"><name><text>end</text></name><toolspecific tool="ipypetrinet"/>
+      <initialMarking><text>0</text></initialMarking></place>
+    <transition id="t1"><name><text>pay</text></name>
+      <toolspecific tool="ipypetrinet" exectime="90"> <condition label='budget &gt; 3'/>
+        <eventattr label='cost=np.random.normal(loc=100)'/></toolspecific>
+      <graphics><position x="5" y="3"/></graphics></transition>
+    <arc id="a1" source="p1" target="t1"><name><text>0.75</text></name><toolspecific tool="ipypetrinet"/>
+      <arctype><text>normal</text></arctype></arc>
+    <arc id="a2" source="t1" target="p2"><name><text>1.00</text></name></arc>
+  </page><finalmarkings><marking></marking></finalmarkings></net></pnml>"""
+
+
+def test_read_frontend_pnml():
+    graph, case_attrs = read_pnml(io.BytesIO(FRONTEND_PNML))
+    assert case_attrs == ["budget: np.random.normal(loc=5)"]
+    assert graph == [
+        {"type": "Place", "id": "p1", "name": "start", "tokens": 2},
+        {"type": "Place", "id": "p2", "name": "end", "tokens": 0},
+        {"type": "Transition", "id": "t1", "name": "pay", "exectime": 90, "conditions": ["budget > 3"],
+         "eventattrs": ["cost=np.random.normal(loc=100)"]},
+        {"type": "Link", "id": "a1", "prob": 0.75, "source": "p1", "target": "t1"},
+        {"type": "Link", "id": "a2", "prob": 1, "source": "t1", "target": "p2"},
+    ]
+
+
+def test_write_read_round_trip(example_graph, tmp_path):
+    case_attrs = ["label: np.random.choice(['<a>', \"b & c\"])"]
+    write_pnml(example_graph, tmp_path / "net.pnml", case_attrs)
+    graph, read_attrs = read_pnml(tmp_path / "net.pnml")
+
+    assert read_attrs == case_attrs
+    key = lambda c: c["id"]
+    assert sorted(graph, key=key) == sorted(example_graph, key=key)
+
+    built, _ = PetriWidget().compile_pnml(tmp_path / "net.pnml")
+    assert len(built.net.transitions) == 5 and len(built.net.arcs) == 10
+
+
+def test_large_files_are_streamed(tmp_path):
+    n = 5000
+
+    def cells():
+        for i in range(n):
+            yield {"type": "Place", "id": f"p{i}", "name": f"p{i}", "tokens": int(i == 0)}
+            yield {"type": "Transition", "id": f"t{i}", "name": f"t{i}", "exectime": 60, "conditions": ["x > 1"],
+                   "eventattrs": []}
+            yield {"type": "Link", "id": f"a{i}", "prob": 1, "source": f"p{i}", "target": f"t{i}"}
+            yield {"type": "Link", "id": f"b{i}", "prob": 1, "source": f"t{i}", "target": f"p{i + 1}"}
+
+    write_pnml(cells(), tmp_path / "large.pnml")
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_pnml(tmp_path / "large.pnml"))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert count == 4 * n
+    # the parsed elements are dropped, memory does not grow with the number of elements
+    assert peak < 1024 * 1024
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from ..profiling import SimulationStats
+from ..widget import PetriWidget
+
+
+def test_profile_returns_stats(example_graph):
+    w = PetriWidget()
+    df, stats = w.generate_eventlog(example_graph, no_traces=30, seed=2, profile=True)
+
+    assert df.equals(w.generate_eventlog(example_graph, no_traces=30, seed=2))
+    assert stats.cases == 30
+    assert stats.events == stats.firings == len(df)
+    # one more step per case that ends without enabled transitions
+    assert stats.steps == stats.firings + 30
+    assert stats.deadlocks == 0 and stats.truncations == 0
+    assert stats.timings["conditions"] > 0 and stats.timings["conversion"] > 0
+    assert 0 < stats.mean_enabled <= 1
+
+
+def test_truncations_and_hooks(example_graph):
+    w = PetriWidget()
+    seen = []
+    w.generate_eventlog(example_graph, no_traces=10, seed=2, max_trace_length=1, hooks=[seen.append])
+
+    assert len(seen) == 1
+    assert seen[0].truncations == 10
+    assert seen[0].as_dict()["events"] == 10
+
+
+def test_chunk_stats_accumulate(example_graph):
+    w = PetriWidget()
+    chunks = list(w.iter_eventlog(example_graph, no_traces=25, chunk_size=10, seed=2, profile=True))
+
+    assert [stats.cases for _, stats in chunks] == [25, 25, 25]
+    assert chunks[0][1] is chunks[-1][1]
+
+
+def test_merge():
+    first, second = SimulationStats(), SimulationStats()
+    first.steps, second.steps = 2, 3
+    second.timings["sampling"] = 1.5
+    first.merge(second)
+
+    assert first.steps == 5
+    assert first.timings["sampling"] == 1.5
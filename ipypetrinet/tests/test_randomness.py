@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from ..randomness import VariateBuffer
+from ..widget import PetriWidget
+
+
+def test_buffer_draws_blocks():
+    variates = VariateBuffer(np.random.RandomState(0), block_size=100)
+    values = [variates.normal(loc=5, scale=2) for _ in range(250)]
+    reference = np.random.RandomState(0).normal(5, 2, size=100)
+
+    assert values[:100] == reference.tolist()
+    assert variates.calls == 3
+    assert variates.choice(["a", "b"], p=[0, 1]) == "b"
+    # draws of several values and other distributions are passed on
+    assert variates.normal(size=3).shape == (3,)
+    assert variates.poisson(2) >= 0
+    assert variates.calls == 4
+
+
+def test_buffered_log_is_reproducible(example_graph):
+    w = PetriWidget()
+    kwargs = dict(case_attrs=["priority: np.random.choice(['low', 'high'], p=[0.3, 0.7])",
+                              "budget: np.random.gamma(shape=9, scale=0.5)"],
+                  no_traces=200, seed=4, rng_block_size=64)
+    df1 = w.generate_eventlog(example_graph, **kwargs)
+    df2 = w.generate_eventlog(example_graph, engine="compiled", **kwargs)
+
+    assert df1.equals(df2)
+    assert df1["priority"].isin(["low", "high"]).all()
+    assert not df1.equals(w.generate_eventlog(example_graph, **dict(kwargs, seed=5)))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from ..sampling import TransitionSampler, EnabledSetCache
+from ..widget import PetriWidget
+
+
+def test_sampler_draws_as_numpy_choice():
+    smap = {"a": 0.2, "b": 0.5, "c": 1.3, "d": 0.0}
+    sampler = TransitionSampler(smap)
+    rng1, rng2 = np.random.RandomState(9), np.random.RandomState(9)
+
+    for et in [["a", "b"], ["a", "b", "c", "d"], ["c"], ["b", "d"]] * 50:
+        probs = np.array([smap[t] for t in et]) / sum(smap[t] for t in et)
+        assert sampler.pick(et, rng1) == rng2.choice(et, 1, p=probs)[0]
+
+    assert sampler.misses == 4
+    assert sampler.hits == 196
+
+
+def test_sampler_cache_is_bounded():
+    sampler = TransitionSampler({i: 1 for i in range(10)}, maxsize=3)
+    for i in range(10):
+        sampler.pick([i, (i + 1) % 10])
+
+    assert len(sampler._cache) == 3
+
+
+def test_enabled_sets_are_cached_per_marking(example_graph):
+    w = PetriWidget()
+    built = w.compile_graph(example_graph)
+    cnet, exprs = built.compiled, built.expressions()
+    cache = EnabledSetCache(w.transition_sampler(built.smap), exprs, maxsize=2)
+
+    # register draws an amount, approve and reject are conditioned on it
+    register = cache.put(b"start", cnet.transitions[:1], False)
+    choice = cache.put(b"p2", cnet.transitions[1:3], False)
+    final = cache.put(b"end", [], True)
+
+    assert register[3] is None and choice[3] is None and final[3] is None
+    assert cache.get(b"start") is None and cache.get(b"end") is final
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    archive = cnet.transitions[4]
+    static = cache.put(b"p3", [archive], False)
+    assert static[2] == (archive,) and static[3] == [1.0]
+    assert cache.pick(static) is archive
+
+
+def test_cached_playout_matches_uncached(example_graph):
+    w = PetriWidget()
+    built = w.compile_graph(example_graph)
+    cnet, exprs, smap = built.compiled, built.expressions(), built.smap
+
+    for engine_cnet in (None, cnet):
+        cache = EnabledSetCache(w.transition_sampler(smap), exprs)
+        for case in range(50):
+            runs = []
+            for c in (None, cache):
+                rng = np.random.RandomState(case)
+                runs.append(list(w.play_case(built.net, built.initial_marking, built.final_marking, smap, exprs,
+                                             exprs.new_case(rng), cnet=engine_cnet, rng=rng, cache=c)))
+            assert runs[0] == runs[1]
+        assert cache.hits > cache.misses
+
+    _, stats = w.generate_eventlog(example_graph, no_traces=50, seed=0, profile=True)
+    assert stats.enabled_hits + stats.enabled_misses == stats.steps
+    assert stats.as_dict()["enabled_misses"] == stats.enabled_misses <= 5
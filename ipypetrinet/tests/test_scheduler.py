@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+import numpy as np
+
+from ..scheduler import arrival_times, resource_pools, schedule
+from ..widget import PetriWidget
+
+
+def test_arrival_times():
+    assert list(arrival_times([5, 10, 20], 3, init_timestamp=100)) == [100, 110, 130]
+    assert (arrival_times(600, 1000, seed=1) == arrival_times("np.random.exponential(scale=600.0)", 1000, seed=1)).all()
+    assert abs(np.diff(arrival_times(600, 10000, seed=1)).mean() - 600) < 30
+
+    with pytest.raises(Exception):
+        arrival_times("np.random.exponential(scale=600) + 5", 10)
+    with pytest.raises(Exception):
+        arrival_times([1, 2], 3)
+
+
+def test_schedule_queues_at_resources():
+    # three cases "a" (10s) then "b" (20s), arriving every 5 seconds, with a single resource for "b"
+    cases = [0, 0, 1, 1, 2, 2]
+    activities = [0, 1, 0, 1, 0, 1]
+    durations = [10, 20] * 3
+    arrivals = [0, 5, 10]
+
+    starts, end = schedule(cases, activities, durations, arrivals)
+    assert list(starts) == [0, 10, 5, 15, 10, 20] and end == 40
+
+    pool_of, capacities = resource_pools({"b": 1}, ["a", "b"])
+    starts, end = schedule(cases, activities, durations, arrivals, pool_of, capacities)
+    assert list(starts) == [0, 10, 5, 30, 10, 50] and end == 70
+
+    # a shared pool of two resources for both activities
+    pool_of, capacities = resource_pools({("a", "b"): 2}, ["a", "b"])
+    starts, _ = schedule(cases, activities, durations, arrivals, pool_of, capacities)
+    assert list(starts) == [0, 10, 5, 25, 15, 30]
+
+
+def test_cases_overlap_in_generated_log(example_graph):
+    w = PetriWidget()
+    kwargs = dict(no_traces=200, seed=4, engine="compiled", arrivals=600, resources={"approve": 1})
+    df = w.generate_eventlog(example_graph, **kwargs)
+
+    spans = df.groupby("case:id", sort=False)["time:timestamp"].agg(["min", "max"])
+    assert (spans["min"].values[1:] < spans["max"].values[:-1]).any()
+    assert df.groupby("case:id")["time:timestamp"].is_monotonic_increasing.all()
+
+    # the single resource executes one approval after another
+    approvals = df[df["activity:name"] == "approve"]["time:timestamp"].sort_values()
+    assert (approvals.diff().dropna() >= np.timedelta64(540, "s")).all()
+
+    assert df.equals(w.generate_eventlog(example_graph, workers=2, **kwargs))
+    with pytest.raises(Exception):
+        w.generate_eventlog(example_graph, arrivals=600, worktime=(8, 17))
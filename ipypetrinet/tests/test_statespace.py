@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+import numpy as np
+
+from ..statespace import explore, OMEGA
+from ..widget import PetriWidget
+
+
+def net(places, transitions, arcs):
+    """ Graph of places {id: tokens}, transitions [id] and arcs [(source, target)] """
+
+    cells = [{"type": "Place", "id": p, "name": p, "tokens": tokens} for p, tokens in places.items()]
+    cells += [{"type": "Transition", "id": t, "name": t, "conditions": [], "exectime": 60, "eventattrs": []}
+              for t in transitions]
+    cells += [{"type": "Link", "id": "l%d" % i, "source": s, "target": t, "prob": 1} for i, (s, t) in enumerate(arcs)]
+    return cells
+
+
+def reachable(cnet):
+    """ Reference: plain breadth-first search on the markings as tuples """
+
+    start = tuple(cnet.initial_marking)
+    seen, todo = {start}, [start]
+    while todo:
+        m = todo.pop()
+        for t in cnet.enabled(np.array(m)):
+            following = tuple(cnet.fire(np.array(m), t))
+            if following not in seen:
+                seen.add(following)
+                todo.append(following)
+    return seen
+
+
+def concurrent():
+    # a split into three branches of two steps each, joined again
+    places = {"start": 1, "end": 0}
+    transitions, arcs = ["split", "join"], [("start", "split"), ("join", "end")]
+    for b in "abc":
+        places.update({b + "1": 0, b + "2": 0, b + "3": 0})
+        transitions += [b + "x", b + "y"]
+        arcs += [("split", b + "1"), (b + "1", b + "x"), (b + "x", b + "2"), (b + "2", b + "y"),
+                 (b + "y", b + "3"), (b + "3", "join")]
+    return net(places, transitions, arcs)
+
+
+@pytest.mark.parametrize("graph", ["example", "concurrent"])
+def test_matches_reference(graph, example_graph):
+    graph = example_graph if graph == "example" else concurrent()
+    cnet = PetriWidget().compile_graph(graph).compiled
+    space = explore(cnet)
+
+    assert space.complete and space.bounded and space.safe
+    assert set(map(tuple, space.markings.tolist())) == reachable(cnet)
+    assert len(space.deadlocks) == 0 and len(space.final_states) == 1
+    # every edge fires its transition
+    fired = space.markings[space.sources].astype(int) + cnet.change[space.labels]
+    assert (fired == space.markings[space.targets]).all()
+
+
+def test_unbounded_net_is_covered():
+    graph = net({"p": 1, "q": 0}, ["produce", "consume"], [("p", "produce"), ("produce", "p"), ("produce", "q"),
+                                                           ("q", "consume")])
+    w = PetriWidget()
+    space = w.explore_statespace(graph)
+
+    assert space.complete and not space.bounded
+    assert sorted(space.markings.tolist()) == [[1, 0], [1, OMEGA]]
+    assert space.bounds[w.compile_graph(graph).places_by_id["q"]] == np.inf
+    with pytest.raises(Exception):
+        space.live_transitions
+    # without ω, the token count grows until the budget is exhausted
+    space = w.explore_statespace(graph, coverability=False, max_states=50)
+    assert not space.complete and space.bounded and space.markings[:, 1].max() == 49
+
+
+def test_deadlocks_and_liveness():
+    # both tokens are needed by "sync", "steal" may take one of them away for good
+    graph = net({"a": 1, "b": 1, "c": 0, "d": 0}, ["sync", "back", "steal"],
+                [("a", "sync"), ("b", "sync"), ("sync", "c"), ("c", "back"), ("back", "a"), ("back", "b"),
+                 ("a", "steal"), ("steal", "d")])
+    space = PetriWidget().explore_statespace(graph)
+
+    assert len(space) == 3
+    assert [space.marking(s) for s in space.deadlocks] == [space.marking(2)]
+    assert space.live_transitions == [] and space.dead_transitions == []
+
+    cycle = net({"a": 1, "b": 0}, ["forth", "back", "never"], [("a", "forth"), ("forth", "b"), ("b", "back"),
+                                                               ("back", "a"), ("c", "never")])
+    cycle.insert(0, {"type": "Place", "id": "c", "name": "c", "tokens": 0})
+    space = PetriWidget().explore_statespace(cycle)
+    assert [t.name for t in space.live_transitions] == ["back", "forth"]
+    assert [t.name for t in space.dead_transitions] == ["never"]
+
+
+def test_state_budget():
+    cnet = PetriWidget().compile_graph(concurrent()).compiled
+    space = explore(cnet, max_states=20)
+
+    assert not space.complete and len(space) == 20
+    assert space.targets.max() < 20
+    assert len(explore(cnet, max_memory=0.001)) < len(explore(cnet))
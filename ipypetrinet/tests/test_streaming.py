@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import pandas as pd
+
+from ..widget import PetriWidget
+
+
+def test_chunks_concatenate_to_full_log(example_graph):
+    w = PetriWidget()
+    kwargs = dict(case_attrs=["priority: np.random.choice(['low', 'high'])"], no_traces=45, seed=11,
+                  worktime=(8, 17), engine="compiled")
+
+    chunks = list(w.iter_eventlog(example_graph, chunk_size=10, **kwargs))
+    full = w.generate_eventlog(example_graph, **kwargs)
+
+    assert len(chunks) == 5
+    assert chunks[-1]["case:id"].nunique() == 5
+    assert pd.concat(chunks).equals(full)
+
+
+def test_chunks_as_event_logs(example_graph):
+    w = PetriWidget()
+    logs = list(w.iter_eventlog(example_graph, no_traces=25, chunk_size=10, seed=1, output="eventlog"))
+
+    assert [len(log) for log in logs] == [10, 10, 5]
+    assert logs[1][0].attributes["id"] == "10"
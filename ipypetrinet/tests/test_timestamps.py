@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import time
+import pytest
+import datetime
+import numpy as np
+import pandas as pd
+
+from ..timestamps import WorkCalendar
+from ..widget import PetriWidget
+
+
+def seconds(date):
+    return int(np.datetime64(date, "s").astype(np.int64))
+
+
+def test_calendar_skips_evenings_weekends_and_holidays():
+    calendar = WorkCalendar(hours=(8, 17), holidays=["2021-01-04"])
+    # friday noon, the monday is a holiday
+    starts, end = calendar.advance(seconds("2021-01-01T12:00"), [5 * 3600, 3600, 9 * 3600, 60])
+
+    assert list(starts.astype("datetime64[s]").astype(str)) == [
+        "2021-01-01T12:00:00", "2021-01-05T08:00:00", "2021-01-05T09:00:00", "2021-01-06T09:00:00"]
+    assert end == seconds("2021-01-06T09:01")
+
+
+def test_calendar_with_shifts_per_weekday():
+    calendar = WorkCalendar(shifts={0: [(14, 22), (6, 14)], 5: [(9, 12)]})
+    starts, end = calendar.advance(seconds("2021-01-01T12:00"), [2 * 3600] * 10)
+
+    assert starts[0] == seconds("2021-01-02T09:00")
+    assert starts[2] == seconds("2021-01-04T07:00")
+    assert starts[-1] == seconds("2021-01-04T21:00")
+    assert end == seconds("2021-01-09T10:00")
+
+
+def test_calendar_matches_step_by_step_schedule():
+    calendar = WorkCalendar(hours=(9, 17.5), holidays=["2021-01-06"])
+    # all boundaries and durations are multiples of 15 minutes, so a walk on that grid is exact
+    durations = np.random.RandomState(3).randint(0, 24, size=300) * 900
+    starts, end = calendar.advance(seconds("2021-01-02T03:00"), durations)
+
+    def working(t):
+        date = np.datetime64(t, "s").astype("datetime64[D]")
+        return np.is_busday(date, holidays=["2021-01-06"]) and 9 * 3600 <= t % 86400 < 17.5 * 3600
+
+    expected, current = [], seconds("2021-01-02T03:00")
+    for duration in list(durations) + [0]:
+        while not working(current):
+            current += 900
+        expected.append(current)
+        for _ in range(duration // 900):
+            while not working(current):
+                current += 900
+            current += 900
+
+    assert list(starts) == expected[:-1]
+    assert end == expected[-1]
+
+
+def test_generate_eventlog_with_calendar(example_graph):
+    w = PetriWidget()
+    calendar = WorkCalendar(hours=(8, 17))
+    df = w.generate_eventlog(example_graph, no_traces=50, seed=4, calendar=calendar)
+    times = pd.DatetimeIndex(df["time:timestamp"])
+
+    assert times.is_monotonic_increasing
+    assert (times.hour >= 8).all() and (times.hour < 17).all()
+    assert (times.dayofweek < 5).all()
+
+    # chunks continue the schedule of each other
+    chunks = list(w.iter_eventlog(example_graph, no_traces=50, seed=4, calendar=calendar, chunk_size=15))
+    assert pd.concat(chunks).equals(df)
+
+
+def legacy_worktime(start, durations, worktime):
+    # the original per-event loop of assign_timestamps
+    curr, dates = start, []
+    for duration in durations:
+        date = datetime.datetime.fromtimestamp(curr)
+        if date.hour >= worktime[1]:
+            diff = date.hour - worktime[1]
+            date = date.replace(hour=worktime[0])
+            date += datetime.timedelta(days=1, hours=diff)
+        if date.weekday() >= 5:
+            date += datetime.timedelta(days=7-date.weekday())
+        curr = int(time.mktime(date.timetuple()))
+        dates.append(date)
+        curr += duration
+    return np.array(dates, dtype="datetime64[ns]"), curr
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Europe/Berlin", "America/New_York"])
+def test_worktime_keeps_the_step_by_step_schedule(tz, monkeypatch):
+    monkeypatch.setenv("TZ", tz)
+    time.tzset()
+    try:
+        w = PetriWidget()
+        # a year of events crosses both changes of the daylight saving time
+        durations = np.random.RandomState(5).randint(0, 4 * 3600, size=5000)
+        for worktime in [(8, 17), (9, 12)]:
+            starts, end = w.assign_timestamps(durations, init_timestamp=1609502400, worktime=worktime)
+            expected, expected_end = legacy_worktime(1609502400, durations.tolist(), worktime)
+
+            assert (starts == expected).all()
+            assert end == expected_end
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_calendar_works_in_utc(example_graph, monkeypatch):
+    w = PetriWidget()
+    calendar = WorkCalendar(hours=(8, 17))
+    utc = w.generate_eventlog(example_graph, no_traces=20, seed=4, calendar=calendar)
+
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        assert w.generate_eventlog(example_graph, no_traces=20, seed=4, calendar=calendar).equals(utc)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
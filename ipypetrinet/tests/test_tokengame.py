@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+from ..widget import PetriWidget
+
+
+CASE_ATTRS = ["budget: np.random.gamma(shape=9, scale=0.5)", "scaled: np.random.normal(loc=1) * 2"]
+
+
+def played_widget(graph):
+    w = PetriWidget(graph=graph, caseAttrs=CASE_ATTRS)
+    w.sent = []
+    w.send = lambda content, buffers=None: w.sent.append(content)
+    return w
+
+
+def test_token_game_matches_simulation(example_graph):
+    w = played_widget(example_graph)
+    steps = w.play_token_game(no_traces=40, seed=7)
+
+    names = {c["id"]: c.get("name") for c in example_graph}
+    cases = {}
+    for step in steps:
+        if isinstance(step, dict):
+            assert step["marking"] == {"p1": 1}
+            fired = cases[step["case"]] = []
+        else:
+            fired.append(names[step])
+
+    df = w.generate_eventlog(example_graph, case_attrs=CASE_ATTRS, no_traces=40, seed=7)
+    assert cases == {int(case): list(events) for case, events in df.groupby("case:id")["activity:name"]}
+
+
+def test_token_game_is_streamed_in_batches(example_graph):
+    w = played_widget(example_graph)
+    w._handle_frontend_msg(w, {"event": "play_token_game", "cases": 3}, [])
+    w._handle_frontend_msg(w, {"event": "play_token_game", "cases": 30}, [])
+
+    assert [m["steps"][0]["case"] for m in w.sent[:2]] == [0, 3]
+    assert [m["last"] for m in w.sent[1:]] == [False] * (len(w.sent) - 2) + [True]
+    assert all(len(m["steps"]) <= 100 for m in w.sent)
+    assert sum(len(m["steps"]) for m in w.sent[1:]) > 100
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from ipywidgets.widgets.widget import _remove_buffers, _put_buffers
+
+from ..transport import encode_graph, decode_graph, encode_steps
+from ..widget import PetriWidget
+
+
+def same_cells(a, b):
+    key = lambda c: c["id"]
+    return sorted(a, key=key) == sorted(b, key=key)
+
+
+def test_graph_round_trip(example_graph):
+    content, buffers = encode_graph(example_graph)
+    graph = decode_graph(content, [b.tobytes() for b in buffers])
+    assert same_cells(graph.cells(), example_graph)
+
+    # the columns are views on the received buffers
+    received = bytearray(buffers[2].tobytes())
+    graph = decode_graph(content, buffers[:2] + [received] + buffers[3:])
+    received[8:12] = np.int32(7).tobytes()
+    assert graph.tokens[0] == 7
+
+
+def test_binary_graph_patch(example_graph):
+    w = PetriWidget(graph=example_graph[:1])
+    content, buffers = encode_graph(example_graph[1:])
+    w._handle_frontend_msg(w, {"event": "graph_patch", "binary": content, "remove": []}, buffers)
+    assert same_cells(w.graph, example_graph)
+
+
+def test_graph_trait_is_sent_as_buffers(example_graph):
+    assert PetriWidget(graph=example_graph).get_state(["graph"])["graph"] == example_graph
+
+    w = PetriWidget(graph=example_graph, binary_transport=True)
+    state, paths, buffers = _remove_buffers(w.get_state(["graph"]))
+    assert len(buffers) == 8
+
+    _put_buffers(state, paths, buffers)
+    received = PetriWidget()
+    received.set_state(state)
+    assert same_cells(received.graph, example_graph)
+
+
+def test_token_game_steps_as_buffers(example_graph):
+    steps = [{"case": 4, "marking": {"p1": 1}}, "t1", "t2", {"case": 5, "marking": {"p1": 1}}, "t1"]
+    codes, cases, markings = encode_steps(steps, ["p0", "p1"], ["t2", "t1"])
+    assert np.frombuffer(codes, dtype=np.int32).tolist() == [-1, 1, 0, -1, 1]
+    assert np.frombuffer(cases, dtype=np.int32).tolist() == [4, 5]
+    assert np.frombuffer(markings, dtype=np.int32).tolist() == [0, 1, 0, 1]
+
+    w = PetriWidget(graph=example_graph, binary_transport=True)
+    sent = []
+    w.send = lambda content, buffers=None: sent.append((content, buffers))
+    steps = w.play_token_game(no_traces=5, seed=1, batch_size=10)
+    assert "places" in sent[0][0] and all("places" not in c for c, _ in sent[1:])
+    codes = np.concatenate([np.frombuffer(b[0], dtype=np.int32) for _, b in sent])
+    transitions = sent[0][0]["transitions"]
+    assert [transitions[i] for i in codes if i >= 0] == [s for s in steps if not isinstance(s, dict)]
+
+
+def test_net_built_from_binary_graph(example_graph):
+    w = PetriWidget()
+    content, buffers = encode_graph(example_graph)
+    graph = decode_graph(content, [b.tobytes() for b in buffers])
+    graph.cells = None  # the net is built from the columns, not from cells
+    built = w.createPetriNet(graph)
+    expected = w.createPetriNet(example_graph)
+    assert built.binary_graph is graph and expected.binary_graph is None
+
+    assert [t.properties for t in built.trans] == [t.properties for t in expected.trans]
+    assert sorted((p.name, p.properties) for p in built.net.places) == \
+        sorted((p.name, p.properties) for p in expected.net.places)
+    assert sorted((a.source.name, a.target.name) for a in built.net.arcs) == \
+        sorted((a.source.name, a.target.name) for a in expected.net.arcs)
+    assert {t.name: p for t, p in built.smap.items()} == {t.name: p for t, p in expected.smap.items()}
+    assert built.compiled.pre.tolist() == expected.compiled.pre.tolist()
+    assert built.compiled.post.tolist() == expected.compiled.post.tolist()
+    assert built.compiled.initial_marking.tolist() == expected.compiled.initial_marking.tolist()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+import time
+import datetime
+import numpy as np
+
+
+# utc offsets only ever change at multiples of 15 minutes
+OFFSET_RESOLUTION = 900
+
+EPOCH = datetime.datetime(1970, 1, 1)
+SECOND = datetime.timedelta(seconds=1)
+
+
+def local_offsets(seconds):
+    """ Returns the offset of the local timezone in seconds for every unix timestamp """
+
+    seconds = np.asarray(seconds, dtype=np.int64)
+    buckets, inverse = np.unique(seconds // OFFSET_RESOLUTION, return_inverse=True)
+    offsets = np.array([time.localtime(b).tm_gmtoff for b in (buckets * OFFSET_RESOLUTION).tolist()], dtype=np.int64)
+    return offsets[inverse.reshape(seconds.shape)]
+
+
+def to_local_datetime64(seconds):
+    """ Converts unix timestamps into naive local datetimes (as datetime.fromtimestamp does) """
+
+    seconds = np.asarray(seconds, dtype=np.int64)
+    return (seconds + local_offsets(seconds)).astype("datetime64[s]").astype("datetime64[ns]")
+
+
+def worktime_start(curr, worktime):
+    """ Returns the start of an event ready at curr as local wall-clock seconds and unix timestamp """
+
+    date = datetime.datetime.fromtimestamp(curr)
+    if date.hour >= worktime[1]:
+        diff = date.hour - worktime[1]
+        date = date.replace(hour=worktime[0])
+        date += datetime.timedelta(days=1, hours=diff)
+    if date.weekday() >= 5:
+        date += datetime.timedelta(days=7-date.weekday())
+    return (date - EPOCH) // SECOND, int(time.mktime(date.timetuple()))
+
+
+def worktime_timestamps(start, durations, worktime, block_size=64):
+    '''
+    Schedule events one after another, moving their starts out of the evenings and weekends
+
+    Parameters
+    ------------------------------------
+    start
+        Unix timestamp (seconds) the first event starts at
+    durations
+        Duration in seconds of every event
+    worktime
+        Tuple (start hour, end hour) of the working day in local time
+    block_size
+        Minimum number of events checked at once for the first one to be moved
+
+    An event starting at or after the end hour starts the next day as many hours after the start
+    hour as it would have started after the end hour, one starting on a weekend the next monday.
+    Durations elapse regardless of the working day. Returns the starts (local time, datetime64[ns])
+    and the unix timestamp (seconds) following the last event, exactly as worktime_start event by event.
+    '''
+
+    durations = np.asarray(durations, dtype=np.int64)
+    # starts without any move, every move delays all following events by the same amount
+    planned = int(start) + np.concatenate(([0], np.cumsum(durations)))
+    dates = np.empty(len(durations), dtype="datetime64[s]")
+    # utc offsets at the start of every day (from the day before the first event on, extended on demand),
+    # a day whose offset differs from the one of the next day contains a change
+    first_day = int(start) // 86400 - 1
+    offsets = local_offsets((first_day + np.arange(64)) * 86400)
+    changing = offsets[1:] != offsets[:-1]
+    delay = 0
+    i = 0
+    stepwise = 0
+    while i < len(durations):
+        if stepwise:
+            # moves follow each other closely, so a few events are moved one by one
+            stop = min(i + stepwise, len(durations))
+            walls = []
+            for ready in planned[i:stop].tolist():
+                wall, moved = worktime_start(ready + delay, worktime)
+                walls.append(wall)
+                delay = moved - ready
+            dates[i:stop] = walls
+            i = stop
+            stepwise = 0
+            continue
+
+        t = planned[i:min(i + block_size, len(durations))] + delay
+        days = t // 86400 - first_day
+        if days[-1] + 2 >= len(offsets):
+            more = first_day + len(offsets) + np.arange(max(len(offsets), int(days[-1]) + 3 - len(offsets)))
+            offsets = np.concatenate((offsets, local_offsets(more * 86400)))
+            changing = offsets[1:] != offsets[:-1]
+        wall = t + offsets[days]
+        # events to be moved, and events on or next to days with a change (their local time may be ambiguous)
+        special = ((wall // 3600) % 24 >= worktime[1]) | ((wall // 86400 + 3) % 7 >= 5)
+        special |= changing[days] | changing[days - 1] | changing[days + 1]
+        k = int(np.argmax(special)) if special.any() else len(t)
+        dates[i:i + k] = wall[:k]
+        i += k
+        if k < len(t):
+            stepwise = block_size if k < block_size // 8 else 1
+
+    return dates.astype("datetime64[ns]"), int(planned[-1] + delay)
+
+
+class WorkCalendar:
+    """ Working calendar mapping whole batches of durations onto working times at once """
+
+    def __init__(self, hours=(8, 17), weekdays=(0, 1, 2, 3, 4), holidays=(), shifts=None):
+        '''
+        Parameters
+        ------------------------------------
+        hours
+            Tuple (start hour, end hour) of the working day (ignored if shifts are given)
+        weekdays
+            Working days (0 = Monday, ..., 6 = Sunday)
+        holidays
+            Dates without any working time (anything numpy.datetime64 understands, e.g. "2021-12-24")
+        shifts
+            Working periods of a day as list of (start hour, end hour), e.g. [(6, 14), (14, 22)],
+            or a dictionary {weekday: [(start hour, end hour), ...]} for different days
+
+        Events start at the time they would in a world consisting of working time only: durations
+        only elapse during working periods and events never start outside of them. The calendar
+        works in UTC: hours, days and holidays are UTC, independent of the local timezone.
+        '''
+
+        if shifts is None:
+            shifts = [hours]
+        if not isinstance(shifts, dict):
+            shifts = {day: shifts for day in weekdays}
+
+        self.shifts = {}
+        for day, periods in shifts.items():
+            periods = sorted((int(round(start * 3600)), int(round(end * 3600))) for start, end in periods)
+            for (start, end), following in zip(periods, periods[1:] + [(24 * 3600, None)]):
+                assert 0 <= start < end <= following[0], "Please make sure the shifts of a day do not overlap."
+            self.shifts[int(day)] = periods
+        self.holidays = np.array(holidays, dtype="datetime64[D]")
+
+        self.weekly = sum(end - start for periods in self.shifts.values() for start, end in periods)
+        assert self.weekly > 0, "Please make sure the calendar contains working time."
+
+    def periods(self, first_day, no_days):
+        """ Returns the starts and ends (in seconds) of all working periods of no_days days """
+
+        days = np.arange(no_days) + np.datetime64(first_day, "D")
+        days = days[~np.isin(days, self.holidays)]
+        # 01.01.1970 was a Thursday
+        weekdays = (days.astype(np.int64) + 3) % 7
+        seconds = days.astype("datetime64[s]").astype(np.int64)
+
+        starts, ends = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for day, periods in self.shifts.items():
+            base = seconds[weekdays == day]
+            for start, end in periods:
+                starts.append(base + start)
+                ends.append(base + end)
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        order = np.argsort(starts, kind="stable")
+        return starts[order], ends[order]
+
+    def advance(self, start, durations):
+        '''
+        Schedule events one after another
+
+        Parameters
+        ------------------------------------
+        start
+            Unix timestamp (seconds) the first event may start at
+        durations
+            Duration in seconds of every event
+
+        Returns the start of every event and the time the last event is finished,
+        both as unix timestamps (seconds).
+        '''
+
+        durations = np.asarray(durations, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(durations)))
+        first_day = np.datetime64(int(start), "s").astype("datetime64[D]")
+
+        # enough days for the total working time (plus a week for holidays), doubled until it fits
+        no_days = int(offsets[-1] * 7 // self.weekly) + 14
+        while True:
+            starts, ends = self.periods(first_day, no_days)
+            worked = np.concatenate(([0], np.cumsum(ends - starts)))
+
+            # working time passed before start within the periods
+            i = np.searchsorted(starts, start, side="right") - 1
+            if i < 0:
+                origin = 0
+            elif start < ends[i]:
+                origin = worked[i] + start - starts[i]
+            else:
+                origin = worked[i + 1]
+
+            if len(starts) and origin + offsets[-1] < worked[-1]:
+                break
+            no_days *= 2
+
+        # an event hitting the end of a period starts at the beginning of the next one
+        work = origin + offsets
+        period = np.searchsorted(worked, work, side="right") - 1
+        times = starts[period] + work - worked[period]
+        return times[:-1], int(times[-1])
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Jakob Bucksch.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Compact encoding of graphs and token game steps as binary buffers of comm messages
+
+A graph is sent as the content {"layout": GRAPH_LAYOUT, "counts": [places, transitions,
+links, strings]} together with the buffers of GRAPH_LAYOUT (in this order):
+
+    strings      utf-8 bytes of all strings (ids, names, conditions, event attributes)
+    offsets      uint32 [strings + 1], string i is strings[offsets[i]:offsets[i + 1]]
+    places       int32 [places x 3]: id, name (string indexes), tokens
+    transitions  int32 [transitions x 4]: id, name (string indexes), number of conditions
+                 and of event attributes
+    exectimes    float64 [transitions]
+    expressions  int32: string indexes of the conditions, then the event attributes of
+                 every transition (in order of the transitions)
+    links        int32 [links x 3]: id, source id, target id (string indexes)
+    probs        float64 [links]
+
+The counterpart in the frontend is src/transport.ts.
+"""
+
+import numpy as np
+
+
+GRAPH_LAYOUT = ["strings", "offsets", "places", "transitions", "exectimes", "expressions", "links", "probs"]
+
+
+class StringTable:
+    """ Collects distinct strings, each is stored once and referenced by its index """
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, string):
+        string = "" if string is None else str(string)
+        i = self.index.get(string)
+        if i is None:
+            i = self.index[string] = len(self.index)
+        return i
+
+    def buffers(self):
+        encoded = [s.encode("utf-8") for s in self.index]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return b"".join(encoded), offsets
+
+
+def encode_graph(cells):
+    '''
+    Encode the cells of a graph (i.e. PetriWidget.graph) into buffers
+
+    Returns the content of the message and the list of buffers (see GRAPH_LAYOUT).
+    '''
+
+    table = StringTable()
+    places, transitions, exectimes, expressions, links, probs = [], [], [], [], [], []
+    for c in cells:
+        if c["type"] == "Place":
+            places.append((table.add(c["id"]), table.add(c.get("name")), int(c.get("tokens") or 0)))
+        elif c["type"] == "Transition":
+            conditions, eventattrs = c.get("conditions") or [], c.get("eventattrs") or []
+            transitions.append((table.add(c["id"]), table.add(c.get("name")), len(conditions), len(eventattrs)))
+            exectimes.append(float(c.get("exectime") or 0))
+            expressions.extend(table.add(e) for e in list(conditions) + list(eventattrs))
+        else:
+            links.append((table.add(c["id"]), table.add(c["source"]), table.add(c["target"])))
+            probs.append(float(c["prob"]))
+
+    strings, offsets = table.buffers()
+    arrays = [
+        np.array(places, dtype=np.int32).reshape(-1, 3),
+        np.array(transitions, dtype=np.int32).reshape(-1, 4),
+        np.array(exectimes, dtype=np.float64),
+        np.array(expressions, dtype=np.int32),
+        np.array(links, dtype=np.int32).reshape(-1, 3),
+        np.array(probs, dtype=np.float64),
+    ]
+    content = {"layout": GRAPH_LAYOUT, "counts": [len(places), len(transitions), len(links), len(offsets) - 1]}
+    return content, [memoryview(strings), memoryview(offsets)] + [memoryview(a) for a in arrays]
+
+
+class BinaryGraph:
+    """ Graph decoded from buffers, its columns are numpy arrays on the received memory (no copies) """
+
+    def __init__(self, content, buffers):
+        n_places, n_transitions, n_links, n_strings = content["counts"]
+        data = dict(zip(content["layout"], buffers))
+        self.strings = memoryview(data["strings"]).tobytes()
+        self.offsets = np.frombuffer(data["offsets"], dtype=np.uint32, count=n_strings + 1)
+        self.places = np.frombuffer(data["places"], dtype=np.int32, count=3 * n_places).reshape(-1, 3)
+        self.transitions = np.frombuffer(data["transitions"], dtype=np.int32, count=4 * n_transitions).reshape(-1, 4)
+        self.exectimes = np.frombuffer(data["exectimes"], dtype=np.float64, count=n_transitions)
+        self.expressions = np.frombuffer(data["expressions"], dtype=np.int32)
+        self.links = np.frombuffer(data["links"], dtype=np.int32, count=3 * n_links).reshape(-1, 3)
+        self.probs = np.frombuffer(data["probs"], dtype=np.float64, count=n_links)
+        self._strings = None
+
+    @property
+    def tokens(self):
+        """ Tokens per place (the initial marking) """
+
+        return self.places[:, 2]
+
+    def string(self, i):
+        return self.table()[i]
+
+    def table(self):
+        """ All strings (decoded on first use) """
+
+        if self._strings is None:
+            offsets = self.offsets.tolist()
+            self._strings = [self.strings[a:b].decode("utf-8") for a, b in zip(offsets[:-1], offsets[1:])]
+        return self._strings
+
+    def place_infos(self):
+        """ [id, name, tokens] of every place (as collected by PetriWidget.createPetriNet) """
+
+        table = self.table()
+        return [[table[i], table[n], tokens] for i, n, tokens in self.places.tolist()]
+
+    def transition_infos(self):
+        """ [id, name, conditions, exectime, eventattrs] of every transition (as collected by PetriWidget.createPetriNet) """
+
+        table = self.table()
+        expressions = self.expressions.tolist()
+        infos = []
+        pos = 0
+        for (i, n, n_conditions, n_eventattrs), exectime in zip(self.transitions.tolist(), self.exectimes.tolist()):
+            conditions = [table[e] for e in expressions[pos:pos + n_conditions]]
+            pos += n_conditions
+            eventattrs = [table[e] for e in expressions[pos:pos + n_eventattrs]]
+            pos += n_eventattrs
+            infos.append([table[i], table[n], conditions, int(exectime) if exectime.is_integer() else exectime,
+                          eventattrs])
+        return infos
+
+    def link_infos(self):
+        """ [source id, target id, probability] of every link (as collected by PetriWidget.createPetriNet) """
+
+        table = self.table()
+        return [[table[s], table[t], prob] for (_, s, t), prob in zip(self.links.tolist(), self.probs.tolist())]
+
+    def incidence(self, transition_ids, place_ids):
+        '''
+        Pre and post incidence arrays of the links, computed on the link columns
+
+        Parameters
+        ------------------------------------
+        transition_ids, place_ids
+            Order of the rows (transitions) and columns (places) of the arrays
+
+        Returns the int64 arrays pre and post (transitions x places), as CompiledNet counts
+        the arcs of the net: every link moves one token.
+        '''
+
+        index = {s: i for i, s in enumerate(self.table())}
+        trans_row = np.full(len(index), -1, dtype=np.int64)
+        trans_row[[index[t] for t in transition_ids]] = np.arange(len(transition_ids))
+        place_col = np.full(len(index), -1, dtype=np.int64)
+        place_col[[index[p] for p in place_ids]] = np.arange(len(place_ids))
+
+        sources, targets = self.links[:, 1], self.links[:, 2]
+        pre = np.zeros((len(transition_ids), len(place_ids)), dtype=np.int64)
+        post = np.zeros((len(transition_ids), len(place_ids)), dtype=np.int64)
+        inbound = (place_col[sources] >= 0) & (trans_row[targets] >= 0)
+        np.add.at(pre, (trans_row[targets[inbound]], place_col[sources[inbound]]), 1)
+        outbound = (trans_row[sources] >= 0) & (place_col[targets] >= 0)
+        np.add.at(post, (trans_row[sources[outbound]], place_col[targets[outbound]]), 1)
+        return pre, post
+
+    def cells(self):
+        """ Returns the cells in the format of PetriWidget.graph (places, transitions, then links) """
+
+        cells = [{"type": "Place", "id": i, "name": n, "tokens": tokens} for i, n, tokens in self.place_infos()]
+        cells.extend({"type": "Transition", "id": i, "name": n, "exectime": exectime, "conditions": conditions,
+                      "eventattrs": eventattrs} for i, n, conditions, exectime, eventattrs in self.transition_infos())
+        table = self.table()
+        cells.extend({"type": "Link", "id": table[i], "prob": prob, "source": table[s], "target": table[t]}
+                     for (i, s, t), prob in zip(self.links.tolist(), self.probs.tolist()))
+        return cells
+
+
+def decode_graph(content, buffers):
+    """ Decodes a graph encoded by encode_graph (or the frontend) into a BinaryGraph """
+
+    return BinaryGraph(content, buffers)
+
+
+def graph_to_json(cells, widget):
+    """ Serializes PetriWidget.graph, as buffers if the widget uses the binary transport """
+
+    if not getattr(widget, "binary_transport", False):
+        return cells
+    content, buffers = encode_graph(cells)
+    return {"binary": content, "buffers": buffers}
+
+
+def graph_from_json(value, widget):
+    """ Deserializes PetriWidget.graph sent as list of cells or as buffers """
+
+    if isinstance(value, dict) and "binary" in value:
+        return decode_graph(value["binary"], value["buffers"]).cells()
+    return value
+
+
+def encode_steps(steps, place_ids=None, transition_ids=None):
+    '''
+    Encode token game steps (see PetriWidget.play_token_game) into buffers
+
+    Parameters
+    ------------------------------------
+    steps
+        Case starts {"case": id, "marking": {place id: tokens}} and ids of fired transitions
+    place_ids, transition_ids
+        Order of the places and transitions the buffers refer to
+
+    Returns the buffers: int32 steps (index of the fired transition or -1 for the start of a
+    case), int32 case ids and int32 [cases x places] initial markings of the started cases.
+    '''
+
+    transition_index = {t: i for i, t in enumerate(transition_ids)}
+    place_index = {p: i for i, p in enumerate(place_ids)}
+    codes, cases, markings = [], [], []
+    for step in steps:
+        if isinstance(step, dict):
+            codes.append(-1)
+            cases.append(step["case"])
+            marking = [0] * len(place_ids)
+            for place, tokens in step["marking"].items():
+                marking[place_index[place]] = tokens
+            markings.append(marking)
+        else:
+            codes.append(transition_index[step])
+    return [memoryview(np.array(codes, dtype=np.int32)), memoryview(np.array(cases, dtype=np.int32)),
+            memoryview(np.array(markings, dtype=np.int32).reshape(-1, len(place_ids)))]
@@ -6,20 +6,34 @@
 
 import time
 import random
+import warnings
 import datetime
 import numpy as np
 import pandas as pd
 
-from datetime import timedelta
 from ipywidgets import DOMWidget, register
-from traitlets import Unicode, List
+from traitlets import Unicode, List, Dict, Bool, observe
 from ._frontend import module_name, module_version
+from . import noise
+from .engine import CompiledNet, BuiltNet, build_smap
+from .expressions import NetExpressions
+from .attributes import sample_case_attrs
+from .randomness import case_random_state, batch_random_state, buffer_random_state, VariateBuffer
+from .parallel import parallel_playout
+from .profiling import SimulationStats
+from .sampling import TransitionSampler, EnabledSetCache
+from .columns import EventColumns
+from .netcache import NetCache, GraphIndex, graph_key
+from .statespace import explore
+from .timestamps import to_local_datetime64, worktime_timestamps
+from .scheduler import arrival_times, resource_pools, schedule
+from .background import BackgroundSimulation, SimulationProgress
+from .transport import BinaryGraph, graph_to_json, graph_from_json, decode_graph, encode_steps
+from .pnml import read_pnml
 
 from copy import copy
-from pm4py.objects.log import obj as log_instance
 from pm4py.objects.petri_net.utils import petri_utils
 from pm4py.objects.petri_net.obj import PetriNet, Marking
-from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.visualization.petri_net import visualizer as pn_visualizer
 from pm4py.objects.petri_net.utils import final_marking as final_marking_discovery
 
@@ -34,9 +48,78 @@ class PetriWidget(DOMWidget):
     _view_name = Unicode('PetriView').tag(sync=True)
     _view_module = Unicode(module_name).tag(sync=True)
     _view_module_version = Unicode(module_version).tag(sync=True)
-    graph = List().tag(sync=True)
+    graph = List().tag(sync=True, to_json=graph_to_json, from_json=graph_from_json)
     caseAttrs = List().tag(sync=True)
+    # send large graphs and token game steps as binary buffers instead of JSON (see transport.py)
+    binary_transport = Bool(False).tag(sync=True)
+    # progress of the simulation running in the background (see generate_eventlog_async)
+    progress = Dict().tag(sync=True)
+
+    def __init__(self, *args, **kwargs):
+        # nets built from graphs so far, see compile_graph
+        self._net_cache = NetCache()
+        # cells of the graph by id, the frontend only sends patches of changed cells
+        self._graph_index = GraphIndex()
+        # key of the net of PetriWidget.graph in the cache (see graph_key), kept up to date by the index
+        self._graph_key = self._graph_index.key
+        self._patching = False
+        # cached distributions of the stochastic map sampled last by pick_transition (simulations
+        # have their own, see simulate_traces)
+        self._sampler = None
+        # simulation running in the background, see generate_eventlog_async
+        self._background = None
+        # cases played in the token game so far, see play_token_game
+        self._token_game_cases = 0
+        super().__init__(*args, **kwargs)
+        self.on_msg(self._handle_frontend_msg)
+
+    @observe("graph")
+    def _graph_changed(self, change):
+        """ Drops the cached net of the previous graph if its content (not only its layout) changed """
+
+        # patches already updated the index (and its key) cell by cell
+        if not self._patching:
+            self._graph_index = GraphIndex(change["new"] or [])
+        if self._graph_index.key != self._graph_key:
+            self._net_cache.invalidate(self._graph_key)
+            self._graph_key = self._graph_index.key
+
+    def _should_send_property(self, key, value):
+        # the frontend already holds the graph it sent as patch, so it is not sent back
+        if key == "graph" and self._patching:
+            return False
+        return super()._should_send_property(key, value)
+
+    def _handle_frontend_msg(self, widget, content, buffers):
+        if content.get("event") == "graph_patch":
+            upsert = content.get("upsert", [])
+            if "binary" in content:
+                upsert = decode_graph(content["binary"], buffers).cells()
+            self.apply_graph_patch(upsert, content.get("remove", []))
+        elif content.get("event") == "cancel_eventlog":
+            self.cancel_eventlog()
+        elif content.get("event") == "play_token_game":
+            self.play_token_game(no_traces=content.get("cases", 1))
+
+    def apply_graph_patch(self, upsert=[], remove=[]):
+        '''
+        Apply a patch of the frontend to the graph
+
+        Parameters
+        ------------------------------------
+        upsert
+            Added or changed cells (replaced by id, new cells are appended)
+        remove
+            Ids of removed cells
+
+        '''
 
+        self._graph_index.apply(upsert, remove)
+        self._patching = True
+        try:
+            self.graph = self._graph_index.to_list()
+        finally:
+            self._patching = False
 
     def add_nodes(self, net, trans, placelist):
         """ Adds places and transitions to a pm4py-petrinet """
@@ -75,52 +158,50 @@ class PetriWidget(DOMWidget):
                 tokenplaces.append((p, p.properties[1]))
         return tokenplaces
         
-    def add_links(self, net, links):
-        """ Adds links to a pm4py-petrinet """
+    def add_links(self, net, links, transitions_by_id=None, places_by_id=None):
+        """ Adds links to a pm4py-petrinet (looking up their nodes via id->node maps) """
+
+        if transitions_by_id is None:
+            transitions_by_id = {t.name: t for t in net.transitions}
+        if places_by_id is None:
+            places_by_id = {p.name: p for p in net.places}
 
         for l in links:
-            source = petri_utils.get_transition_by_name(net, l[0])
-            target = self.get_places_by_name(net, l[1])
+            source = transitions_by_id.get(l[0])
+            target = places_by_id.get(l[1])
             weight = l[2]
             if not source:
-                source = self.get_places_by_name(net, l[0])
-                target = petri_utils.get_transition_by_name(net, l[1])
+                source = places_by_id.get(l[0])
+                target = transitions_by_id.get(l[1])
             
             petri_utils.add_arc_from_to(source, target, net, weight=weight)
             
     def build_smap(self, translist, links):
         """ Builds a stochastic map """
 
-        smap = {}
-        for link in links:
-            for trans in translist:
-                # remember trans.name is the trans_id
-                # and link[2] is the probability
-                if link[1] == trans.name:
-                    smap[trans] = link[2]
-        return smap
+        # remember trans.name is the trans_id
+        return build_smap(links, {trans.name: trans for trans in translist})
 
     def get_unix_time(self, t=datetime.datetime(2021, 1, 1, 12, 0)):
         """ Returns the seconds since 01.01.1970 for a given datetime """
 
         return int(time.mktime(t.timetuple()))
 
-    def pick_transition(self, et, smap):
-        """ Picks a transition based on the stochastic map """
+    def pick_transition(self, et, smap, rng=None):
+        """ Picks a transition based on the stochastic map (draws from rng if provided) """
 
         if et == []:
             return None
-        
-        probability_dist = []
-        for t in et:
-            probability_dist.append(smap[t])
 
-        # needs to be normalized for the following method
-        prob_sum = sum(probability_dist)
-        probability_dist = [x / prob_sum for x in probability_dist]
+        return self.transition_sampler(smap).pick(et, rng)
+
+    def transition_sampler(self, smap):
+        """ Returns the TransitionSampler of the stochastic map """
 
-        chosen_t = list(np.random.choice(et, 1, p=probability_dist))[0]
-        return chosen_t
+        # the normalized distribution of every enabled set is only computed once per smap
+        if self._sampler is None or self._sampler.smap is not smap:
+            self._sampler = TransitionSampler(smap)
+        return self._sampler
         
     def is_enabled(self, t, pn, m):
         """ Checks whether a transition can fire based on marking """
@@ -149,38 +230,342 @@ class PetriWidget(DOMWidget):
 
         return m_out
     
-    def enabled_transitions(self, pn, m):
+    def enabled_transitions(self, pn, m, exprs=None, namespace=None):
         """ Return a set of enabled transitions (takes conditions into account) """
         
         maybeEnabled = set() 
-        enabled = set()
         
         # Get all transitions enabled by provided tokens
         for t in pn.transitions:
             if self.is_enabled(t, pn, m):
                 maybeEnabled.add(t)
+
+        # Conditions are evaluated against the namespace of the current case
+        if exprs is None:
+            exprs = NetExpressions(pn.transitions)
+        if namespace is None:
+            namespace = exprs.new_case()
                 
-        # Only keep transitions complying their conditions
-        for trans in maybeEnabled:
-            # Set/Override global Event-Attributes (of form "name=value")
-            for attr in trans.properties[2]:
-                exec(attr, globals())
+        return set(exprs.filter_conditions(maybeEnabled, namespace))
+
+    def play_case(self, net, initial_marking, final_marking, smap, exprs, namespace, max_trace_length=500, cnet=None,
+                  rng=None, stats=None, cache=None):
+        """
+        Yields the transitions fired while playing out one case (step by step), timed if stats are given.
+        The enabled transitions of every marking are looked up in the EnabledSetCache cache if given.
+        """
+
+        visible_transitions_visited = 0
+        marking = copy(cnet.initial_marking) if cnet else copy(initial_marking)
+        sampler = cache.sampler if cache is not None else self.transition_sampler(smap)
+
+        while visible_transitions_visited < max_trace_length:
+            if stats is not None:
+                start = stats.timer()
+            entry = None
+            if cache is not None:
+                key = marking.tobytes() if cnet else frozenset(marking.items())
+                entry = cache.get(key)
+            if entry is None:
+                if cnet:
+                    maybeEnabled = cnet.enabled(marking)
+                    is_final = cnet.is_final(marking)
+                else:
+                    maybeEnabled = [t for t in net.transitions if self.is_enabled(t, net, marking)]
+                    is_final = final_marking is not None and marking == final_marking
+                if cache is not None:
+                    entry = cache.put(key, sorted(maybeEnabled, key=lambda t: t.name), is_final)
+            else:
+                maybeEnabled, is_final = entry[0], entry[1]
+            if stats is not None:
+                start = stats.add_time("enabling", start)
+            if entry is not None and entry[3] is not None:
+                # no conditions or event attributes, all transitions of the marking stay enabled
+                all_enabled_trans = maybeEnabled
+            else:
+                all_enabled_trans = exprs.filter_conditions(maybeEnabled, namespace)
+            if stats is not None:
+                start = stats.add_time("conditions", start)
+                stats.steps += 1
+                stats.enabled_total += len(all_enabled_trans)
             
-            # Add transitions only if they meet their conditions (or conditions are None)
-            if trans.properties[0]:
-                cond_results = []
-                for cond in trans.properties[0]:
-                    cond_results.append(eval(cond))
-                if all(cond_results):
-                    enabled.add(trans)
+            # supports nets with possible deadlocks
+            if not all_enabled_trans:
+                if stats is not None and not is_final:
+                    stats.deadlocks += 1
+                break
+
+            if entry is not None and entry[3] is not None:
+                trans = cache.pick(entry, rng)
             else:
-                enabled.add(trans)
+                en_t_list = all_enabled_trans
+                if is_final:
+                    en_t_list.append(None)
+                trans = sampler.pick(en_t_list, rng)
+            if stats is not None:
+                start = stats.add_time("sampling", start)
+            if trans is None:
+                break
+
+            if trans.label is not None:
+                visible_transitions_visited += 1
+            marking = cnet.fire(marking, trans) if cnet else self.execute(trans, marking)
+            if stats is not None:
+                stats.add_time("firing", start)
+                stats.firings += 1
+            yield trans
+        else:
+            if stats is not None:
+                stats.truncations += 1
+
+    def event_duration(self, trans, rng=None):
+        """ Draws the duration of an event of a transition (its exectime +/- 10%) """
+
+        meanTime = int(trans.properties[1])
+        lower, upper = int(meanTime*0.9), int(meanTime*1.1)+1
+        if rng is None:
+            return random.randrange(lower, upper)
+        return int(rng.randint(lower, upper))
+
+    def replay_case(self, transitions, cnet, exprs, namespace):
+        """
+        Yields the already simulated transitions of one case and sets their event-attributes.
+        As in play_case, the event-attributes of all transitions enabled before a step are set.
+        """
+
+        marking = cnet.initial_marking
+        for trans in transitions:
+            if exprs.event_attrs:
+                exprs.filter_conditions(cnet.enabled(marking), namespace)
+            marking = cnet.fire(marking, trans)
+            yield trans
         
-        return enabled
+    def simulate_traces(self, net, initial_marking, case_attrs=[], no_traces=100, max_trace_length=500,
+                        case_id_key='id', activity_key='activity:name', timestamp_key='time:timestamp',
+                        final_marking=None, smap=None, datafunc=None, engine="pm4py", seed=None, first_case=0,
+                        cnet=None, exprs=None, stats=None, rng_block_size=None):
+        """
+        Simulate traces of a Petrinet without assigning their timestamps yet
+
+        Parameters are the same as for apply_playout, additionally:
+        first_case
+            Case ID of the first simulated trace (the traces get IDs first_case, first_case+1, ...)
+        cnet
+            CompiledNet of the net to reuse across calls (compiled on demand if not provided)
+        exprs
+            NetExpressions of the net to reuse across calls (compiled on demand if not provided)
+        stats
+            SimulationStats to add the timings and counters of the simulation to (None: no profiling)
+        rng_block_size
+            If provided, durations, attribute values and the draws picking transitions are handed
+            out from blocks of this many values pre-drawn per distribution (see VariateBuffer)
+
+        Returns the simulated events as EventColumns (holding the duration of every
+        event in seconds, the timestamps are assigned afterwards).
+        """
+
+        # infer the final marking from the net
+        if final_marking is None:
+            final_marking = final_marking_discovery.discover_final_marking(net)
+        if smap is None:
+            raise Exception("Please provide a stochastic map!")
+        if engine not in ("pm4py", "compiled", "batched"):
+            raise Exception("Unknown engine '%s', please choose 'pm4py', 'compiled' or 'batched'!" % engine)
+        if engine == "batched" and any(t.properties[0] for t in net.transitions):
+            warnings.warn("Conditions cannot be evaluated in batches, falling back to the compiled engine.")
+            engine = "compiled"
+
+        sequences = None
+        if engine == "pm4py":
+            cnet = None
+        elif cnet is None:
+            cnet = CompiledNet(net, initial_marking, final_marking=final_marking)
+        if engine == "batched":
+            if stats is not None:
+                start = stats.timer()
+            # a batch shares one stream, so its log depends on how the cases are sharded
+            rng = None if seed is None else batch_random_state(seed, first_case)
+            sequences = cnet.batched_playout(cnet.weights(smap), no_traces=no_traces,
+                                             max_trace_length=max_trace_length, rng=rng)
+            if stats is not None:
+                stats.add_time("playout", start)
+                stats.firings += sum(len(sequence) for sequence in sequences)
+
+        columns = EventColumns(activity_key=activity_key, timestamp_key=timestamp_key, case_id_key=case_id_key)
+        columns.first_case, columns.no_cases = first_case, no_traces
         
+        # compile conditions, event- and case-attributes once for all traces
+        if exprs is None:
+            exprs = NetExpressions(net.transitions, case_attrs)
+        # the enabled transitions only depend on the marking, cases revisit the same markings;
+        # every run has its own cache and sampler, so runs in the background share nothing with others
+        cache = None if sequences is not None else EnabledSetCache(TransitionSampler(smap), exprs)
+
+        # blocks are shared by all cases, so (as for "batched") the log depends on the sharding
+        variates = None
+        if rng_block_size is not None:
+            variates = VariateBuffer(None if seed is None else buffer_random_state(seed, first_case),
+                                     block_size=rng_block_size)
+
+        # case attributes of plain distributions are drawn for all cases at once
+        specs = exprs.case_attr_specs
+        case_rows = None
+        recorded_case_attrs = exprs.case_attr_names
+        if specs:
+            if stats is not None:
+                start = stats.timer()
+            case_values = sample_case_attrs(specs, first_case, no_traces, seed=seed)
+            names = list(case_values)
+            case_rows = list(zip(*(case_values[name].tolist() for name in names)))
+            # they are joined to the log as columns unless other expressions may change them
+            joined = [] if datafunc else [
+                name for name in names
+                if exprs.case_attr_names.count(name) == 1 and name not in exprs.all_event_attr_names]
+            for name in joined:
+                columns.set_case_column(name, case_values[name])
+            if joined:
+                columns.case_attr_order = list(exprs.case_attr_names)
+                recorded_case_attrs = [c for c in exprs.case_attr_names if c not in joined]
+            if stats is not None:
+                stats.add_time("case_attrs", start)
+
+        for i in range(first_case, first_case + no_traces):
+            if stats is not None:
+                start = stats.timer()
+            # every case draws from its own stream if a seed is given (or all from the blocks)
+            if variates is not None:
+                rng = variates
+            else:
+                rng = None if seed is None else case_random_state(seed, i)
+            # every trace gets its own namespace with reset event and fresh case attributes
+            namespace = exprs.new_case(rng, None if case_rows is None else zip(names, case_rows[i - first_case]))
+            # dictionary containing the actual values of the event attrs
+            event_attrs = dict.fromkeys(exprs.all_event_attr_names)
+            if stats is not None:
+                start = stats.add_time("case_attrs", start)
+                stats.cases += 1
+
+            datadicts = None
+            if datafunc:
+                datadicts = datafunc()
+                if stats is not None:
+                    stats.add_time("datafunc", start)
+            
+            if sequences is not None:
+                fired = self.replay_case([cnet.transitions[t] for t in sequences[i - first_case]], cnet, exprs,
+                                         namespace)
+            else:
+                fired = self.play_case(net, initial_marking, final_marking, smap, exprs, namespace,
+                                       max_trace_length=max_trace_length, cnet=cnet, rng=rng, stats=stats,
+                                       cache=cache)
+
+            for trans in fired:
+                if stats is not None:
+                    start = stats.timer()
+                if trans.label is not None:
+                    # only update the value of the e_attrs corresponding to the chosen transition
+                    for attr_name in exprs.event_attr_names[trans]:
+                        event_attrs[attr_name] = namespace[attr_name]
+
+                    activity = trans.label.split(" [", 1)[0]
+                    columns.add_event(i, activity, self.event_duration(trans, rng))
+                    
+                    # add additional data attributes coming from custom function, event or case-attributes
+                    if datadicts:
+                        for dictname, dictvalue in datadicts.items():
+                            if type(dictvalue) is dict:
+                                if activity in dictvalue.keys():
+                                    actualValue = dictvalue[activity]
+                                    namespace[dictname] = actualValue
+                                    columns.set_attr(dictname, actualValue)
+                                else:
+                                    columns.set_attr(dictname, None)
+                            else:
+                                namespace[dictname] = dictvalue
+                                columns.set_attr(dictname, dictvalue)
+
+                    for e, value in event_attrs.items():
+                        columns.set_attr(e, value)
+                    for c in recorded_case_attrs:
+                        columns.set_attr(c, namespace[c])
+                if stats is not None:
+                    stats.add_time("recording", start)
+
+        if stats is not None:
+            stats.events += len(columns)
+            if cache is not None:
+                stats.enabled_hits += cache.hits
+                stats.enabled_misses += cache.misses
+        return columns
+
+    def assign_timestamps(self, durations, init_timestamp=1609502400, worktime=None, calendar=None):
+        """
+        Compute the increasing timestamps of the events of a simulated log
+
+        Parameters
+        -------------------------------------------------------
+        durations
+            Duration in seconds of every event in order of the log (i.e. EventColumns.durations)
+        init_timestamp
+            Timestamp in seconds to start at
+        worktime
+            Tuple (start hour, end hour) of the working day in local time, events starting after
+            the end hour are moved to the next morning and events on weekends to the next monday
+        calendar
+            If provided, a WorkCalendar (working hours, weekdays, holidays, shifts) all events are
+            scheduled on at once instead of worktime, durations then only elapse during working time
+
+        Returns the timestamps and the timestamp in seconds following the last event. The
+        timestamps are local times (datetime64[ns], as datetime.fromtimestamp), except with a
+        calendar: a WorkCalendar works in UTC, so they are UTC times then.
+        """
+
+        durations = np.asarray(durations, dtype=np.int64)
+
+        if calendar is not None:
+            starts, end = calendar.advance(init_timestamp, durations)
+            return starts.astype("datetime64[s]").astype("datetime64[ns]"), end
+
+        if worktime:
+            return worktime_timestamps(init_timestamp, durations, worktime)
+
+        # without working times every event simply starts when the previous one ended
+        starts = init_timestamp + np.concatenate(([0], np.cumsum(durations)))
+        return to_local_datetime64(starts[:-1]), int(starts[-1])
+
+    def schedule_timestamps(self, columns, arrivals=0, resources=None, init_timestamp=1609502400, seed=None):
+        """
+        Compute the timestamps of a simulated log whose cases overlap in time (discrete-event simulation)
+
+        Parameters
+        -------------------------------------------------------
+        columns
+            EventColumns of the simulated log
+        arrivals
+            Inter-arrival times of the cases: their mean in seconds (exponentially distributed),
+            a distribution like "np.random.gamma(shape=2, scale=300)" or one value per case
+        resources
+            Dictionary activity -> number of resources executing it, events wait in a queue
+            while all of them are busy. A tuple of activities as key shares one pool.
+        init_timestamp
+            Timestamp in seconds the first case arrives at
+        seed
+            If provided, the inter-arrival times are drawn from a stream derived from the seed
+
+        Returns the timestamps (local time, datetime64[ns]) and the timestamp in seconds
+        the last event ends at.
+        """
+
+        arrival = arrival_times(arrivals, columns.no_cases, init_timestamp=init_timestamp, seed=seed)
+        pool_of, capacities = resource_pools(resources or {}, columns.labels)
+        starts, end = schedule(columns.cases, columns.activities, columns.durations, arrival,
+                               pool_of=pool_of, capacities=capacities, first_case=columns.first_case)
+        return to_local_datetime64(starts), end
+
     def apply_playout(self, net, initial_marking, case_attrs=[], no_traces=100, max_trace_length=500,
                       case_id_key='id', activity_key='activity:name', timestamp_key='time:timestamp',
-                      final_marking=None, smap=None, init_timestamp=1609502400, worktime=None, datafunc=None):
+                      final_marking=None, smap=None, init_timestamp=1609502400, worktime=None, datafunc=None, engine="pm4py",
+                      seed=None, calendar=None, arrivals=None, resources=None):
         
         """
         Do the playout of a Petrinet generating a log
@@ -209,129 +594,47 @@ class PetriWidget(DOMWidget):
             Stochastic map
         init_timestamp
             Timestamp in seconds to start at
+        worktime
+            Tuple (start hour, end hour) of the working day
         datafunc
             Method to generate dictionary of dictionaries
+        engine
+            "pm4py" to fire transitions on pm4py-markings,
+            "compiled" to fire them on the incidence arrays of a CompiledNet or
+            "batched" to advance all cases in lockstep on a marking matrix (falls back
+            to "compiled" if any transition carries conditions)
+        seed
+            If provided, every case draws from its own random stream derived from the seed
+            (via numpy.random.SeedSequence) instead of the global random state
+        calendar
+            If provided, the WorkCalendar to schedule the events on (instead of worktime)
+        arrivals
+            If provided, the inter-arrival times of the cases, which then overlap in time
+            (see schedule_timestamps)
+        resources
+            Dictionary activity -> capacity of the resource pools (see schedule_timestamps)
         """
-        
-        # infer the final marking from the net
-        if final_marking is None:
-            final_marking = final_marking_discovery.discover_final_marking(net)
-        if smap is None:
-            raise Exception("Please provide a stochastic map!")
-
-        # assign an increased timestamp to each event starting at init_timestamp
-        curr_timestamp = init_timestamp
-        log = log_instance.EventLog()
-        
-        # get all event attributes from the net and store their names
-        eventAttr_names = []
-        for t in net.transitions:
-            for attr in t.properties[2]:
-                attr_name = attr.split("=")[0]
-                eventAttr_names.append(attr_name)
-        caseAttr_names = []
-        for caseattr in case_attrs:
-            caseAttr_names.append(caseattr.split(": ")[0])
-
-        # dictionary containing the actual values of the event attrs
-        event_attrs = {}
-        
-        for i in range(no_traces):
-            # reset all event and case attributes for every trace
-            for eventattr in eventAttr_names:
-                exec('%s=%s' % (eventattr, None), globals())
-                event_attrs[eventattr] = None
-            for caseattr in case_attrs:
-                exec(caseattr.replace(": ", "="), globals())
-
-            datadicts = None
-            if datafunc:
-                datadicts = datafunc()
-            
-            trace = log_instance.Trace()
-            trace.attributes[case_id_key] = str(i)
-            visible_transitions_visited = []
-            marking = copy(initial_marking)
-
-            while len(visible_transitions_visited) < max_trace_length:
-                # resets event_attr so it only is set for the respective activity
-                # for eventattr in eventAttr_names:
-                #     exec('%s=%s' % (eventattr, None), globals())
-                #     event_attrs[eventattr] = None
-
-                all_enabled_trans = self.enabled_transitions(net, marking)
-                
-                # supports nets with possible deadlocks
-                if not all_enabled_trans:
-                    break
-                if final_marking is not None and marking == final_marking:
-                    en_t_list = list(all_enabled_trans.union({None}))
-                else:
-                    en_t_list = list(all_enabled_trans)
-                
-                trans = self.pick_transition(en_t_list, smap)
-                if trans is None:
-                    break
-                    
-                if trans.label is not None:
-                    # only update the value of the e_attrs corresponding to the chosen transition
-                    for attr in trans.properties[2]:
-                        attr_name = attr.split("=")[0]
-                        event_attrs[attr_name] = eval(attr_name)
-
-                    visible_transitions_visited.append(trans)
-                    event = log_instance.Event()
-
-                    # add duration of activity to datetime and make sure its in usual working times
-                    date = datetime.datetime.fromtimestamp(curr_timestamp)
-                    if worktime:
-                        if date.hour >= worktime[1]:
-                            diff = date.hour - worktime[1]
-                            date = date.replace(hour=worktime[0])
-                            date += timedelta(days=1, hours=diff)
-                        if date.weekday() >= 5:
-                            date += timedelta(days=7-date.weekday())
-
-                        # update unix_time according to the possibly executed modifications
-                        curr_timestamp = self.get_unix_time(date)
-
-                    event[activity_key] = trans.label.split(" [", 1)[0]
-                    event[timestamp_key] = date
-                    
-                    # add additional data attributes coming from custom function, event or case-attributes
-                    if datadicts:
-                        for dictname, dictvalue in datadicts.items():
-                            if type(dictvalue) is dict:
-                                if event[activity_key] in dictvalue.keys():
-                                    actualValue = dictvalue[event[activity_key]]
-                                    if np.issubclass_(type(actualValue), str):
-                                        exec("%s='%s'" % (dictname, actualValue), globals())
-                                    else:
-                                        exec("%s=%s" % (dictname, actualValue), globals())
-                                    event[dictname] = actualValue
-                                else:
-                                    event[dictname] = None
-                            else:
-                                if np.issubclass_(type(dictvalue), str):
-                                    exec("%s='%s'" % (dictname, dictvalue), globals())
-                                else:
-                                    exec("%s=%s" % (dictname, dictvalue), globals())
-                                event[dictname] = dictvalue
 
-                    for e in event_attrs.keys():
-                        event[e] = event_attrs[e]
-                    for c in caseAttr_names:
-                        event[c] = eval(c)
-                    
-                    trace.append(event)
-                    meanTime = int(trans.properties[1])
-                    lower, upper = int(meanTime*0.9), int(meanTime*1.1)+1
-                    curr_timestamp += random.randrange(lower, upper)
-
-                marking = self.execute(trans, marking)
-            log.append(trace)
-
-        return log
+        columns = self.simulate_traces(net, initial_marking, case_attrs=case_attrs, no_traces=no_traces,
+                                              max_trace_length=max_trace_length, case_id_key=case_id_key,
+                                              activity_key=activity_key, timestamp_key=timestamp_key,
+                                              final_marking=final_marking, smap=smap, datafunc=datafunc,
+                                              engine=engine, seed=seed)
+        timestamps, _ = self.event_timestamps(columns, init_timestamp=init_timestamp, worktime=worktime,
+                                              calendar=calendar, arrivals=arrivals, resources=resources, seed=seed)
+        return columns.to_event_log(timestamps)
+
+    def event_timestamps(self, columns, init_timestamp=1609502400, worktime=None, calendar=None, arrivals=None,
+                         resources=None, seed=None):
+        """ Schedules the events one case after another (assign_timestamps) or overlapping (schedule_timestamps) """
+
+        if arrivals is None and not resources:
+            return self.assign_timestamps(columns.durations, init_timestamp=init_timestamp, worktime=worktime,
+                                          calendar=calendar)
+        if worktime or calendar is not None:
+            raise Exception("Please use either arrivals/resources or worktime/calendar!")
+        return self.schedule_timestamps(columns, arrivals=0 if arrivals is None else arrivals, resources=resources,
+                                        init_timestamp=init_timestamp, seed=seed)
 
     def createPetriNet(self, graph, name="PetriNet"):
         ''' 
@@ -340,10 +643,13 @@ class PetriWidget(DOMWidget):
         Parameters
         ------------------------------------
         graph
-            Cells of the created Petri net, i.e. PetriWidget.graph
+            Cells of the created Petri net, i.e. PetriWidget.graph, or a transport.BinaryGraph
+            (whose columns are read directly, without creating the cells)
         name
             Name of the generated pm4py-petrinet
 
+        Returns a BuiltNet, which unpacks as (net, trans, links, initial_marking) and keeps
+        the id indexes, stochastic map and compiled net for later calls.
         '''
 
         place_infos = []
@@ -351,23 +657,100 @@ class PetriWidget(DOMWidget):
         links = []
         net = PetriNet(name)
         
-        for c in graph:
-            if c["type"] == "Place":
-                place_infos.append([c["id"], c["name"], c["tokens"]])
-            elif c["type"] == "Transition":
-                trans_infos.append([c["id"], c["name"], c["conditions"], c["exectime"], c["eventattrs"]])
-            else:
-                links.append([c["source"], c["target"], c["prob"]])
+        binary_graph = graph if isinstance(graph, BinaryGraph) else None
+        if binary_graph is not None:
+            place_infos, trans_infos, links = graph.place_infos(), graph.transition_infos(), graph.link_infos()
+        else:
+            for c in graph:
+                if c["type"] == "Place":
+                    place_infos.append([c["id"], c["name"], c["tokens"]])
+                elif c["type"] == "Transition":
+                    trans_infos.append([c["id"], c["name"], c["conditions"], c["exectime"], c["eventattrs"]])
+                else:
+                    links.append([c["source"], c["target"], c["prob"]])
         
-        trans, _ = self.add_nodes(net, trans_infos, place_infos)
-        self.add_links(net, links)
+        trans, places = self.add_nodes(net, trans_infos, place_infos)
+        transitions_by_id = {t.name: t for t in trans}
+        places_by_id = {p.name: p for p in places}
+        self.add_links(net, links, transitions_by_id, places_by_id)
 
         initial_marking = Marking()
         tokenplaces = self.get_init_token(net)
         for tp in tokenplaces:
             initial_marking[tp[0]] = tp[1]
 
-        return net, trans, links, initial_marking
+        return BuiltNet(net, trans, links, initial_marking, transitions_by_id, places_by_id, binary_graph=binary_graph)
+
+    def compile_graph(self, graph, name="PetriNet"):
+        '''
+        Create a PM4PY Petri net, reusing the one built before if the graph did not change
+
+        Parameters
+        ------------------------------------
+        graph
+            Cells of the created Petri net, i.e. PetriWidget.graph
+        name
+            Name of the generated pm4py-petrinet
+
+        Returns the cached BuiltNet (see createPetriNet), which must not be modified.
+        Nets are cached by the content of the graph, positions do not matter. The key of
+        PetriWidget.graph is only computed when it changes, so its cells are not to be
+        modified in place (assign a changed graph instead).
+        '''
+
+        key = self._graph_key if graph is self.graph else graph_key(graph)
+        return self._net_cache.get((key, name), lambda: self.createPetriNet(graph, name=name))
+
+    def compile_pnml(self, source, name="PetriNet"):
+        '''
+        Create a PM4PY Petri net from a PNML file, without rendering it in the widget
+
+        Parameters
+        ------------------------------------
+        source
+            Path or binary file object of the PNML file (see pnml.read_pnml)
+        name
+            Name of the generated pm4py-petrinet
+
+        Returns the cached BuiltNet (see compile_graph) and the case attributes of the file.
+        '''
+
+        graph, case_attrs = read_pnml(source)
+        return self.compile_graph(graph, name=name), case_attrs
+
+    def net_cache_info(self):
+        """ Returns hits, misses, evictions, invalidations and size of the cache of built nets """
+
+        return self._net_cache.stats()
+
+    def clear_net_cache(self):
+        """ Removes all cached nets """
+
+        self._net_cache.clear()
+
+    def explore_statespace(self, graph, name="PetriNet", max_states=1000000, max_memory=None, coverability=True):
+        '''
+        Explore the state space of the net, e.g. to check it before large simulations
+
+        Parameters
+        ------------------------------------
+        graph
+            Cells of the created Petri net, i.e. PetriWidget.graph
+        name
+            Name of the generated pm4py-petrinet
+        max_states
+            Exploration stops once this many markings are found
+        max_memory
+            If provided, exploration stops once the state space takes about this many MB
+        coverability
+            Summarize unbounded places by ω, so that the exploration terminates
+
+        Returns a StateSpace with the reachable markings, deadlocks, dead and live
+        transitions and bounds of the places. Conditions are not taken into account.
+        '''
+
+        built = self.compile_graph(graph, name=name)
+        return explore(built.compiled, max_states=max_states, max_memory=max_memory, coverability=coverability)
 
     def drawPetriNet(self, graph, name="PetriNet"):
         ''' 
@@ -382,12 +765,13 @@ class PetriWidget(DOMWidget):
 
         '''
 
-        net, _, _, initial_marking = self.createPetriNet(graph, name=name)
-        gviz = pn_visualizer.apply(net, initial_marking)
+        built = self.compile_graph(graph, name=name)
+        gviz = pn_visualizer.apply(built.net, built.initial_marking)
         pn_visualizer.view(gviz)
 
     def generate_eventlog(self, graph, case_attrs=[], name="PetriNet", no_traces=100, max_trace_length=500, draw=False, init_timestamp=1609502400, 
-                          worktime=None, datafunc=None):
+                          worktime=None, datafunc=None, engine="pm4py", seed=None, workers=1, output="dataframe",
+                          calendar=None, profile=False, hooks=None, rng_block_size=None, arrivals=None, resources=None):
         ''' 
         Simulate an event log as pandas dataframe containing event- and case-attributes
 
@@ -409,23 +793,309 @@ class PetriWidget(DOMWidget):
             Timestamp to start the first event at in seconds.
             Use PetriWidget.get_unix_time() to reveive the correct number for a certain datetime.
             default = 1609502400 (= 01.01.2021 12:00)
+        worktime
+            Tuple (start hour, end hour) of the working day, events starting after the end hour
+            are moved to the next morning and events on weekends to the next monday
         datafunc
             Method to generate dictonary of dictionaries for data attributes.
             This method will be executed once for every case! The result must conform to the following form:
             {data_attribute1: {activity_name1: respective_value1, activity_name2: respective_value2...}, ...}
+        engine
+            "pm4py" (default) to simulate on pm4py-markings or "compiled" to simulate on the
+            integer incidence arrays of a CompiledNet (faster on large nets, same log for the same seed)
+            or "batched" to advance all cases in lockstep on a (cases x places) marking matrix
+            (statistically equivalent log, falls back to "compiled" for nets with conditions)
+        seed
+            If provided, every case draws from its own random stream derived from the seed,
+            so the same seed always yields the same log (independent of workers)
+        workers
+            Number of processes to shard the traces across. The log equals the one of a
+            single-process run with the same seed (except for the "batched" engine).
+            A datafunc must be picklable then, i.e. defined at module level.
+        output
+            "dataframe" (default) to build the pandas DataFrame straight from the simulated
+            columns or "eventlog" to return a pm4py EventLog instead
+        calendar
+            WorkCalendar to schedule all events on in one vectorized pass, e.g.
+            WorkCalendar(hours=(8, 17), holidays=["2021-12-24"]) or WorkCalendar(shifts=[(6, 14), (14, 22)]).
+            Durations only elapse during working time then and worktime is ignored.
+        profile
+            If True, (log, SimulationStats) is returned: cumulative timings per phase (enabling,
+            conditions, sampling, firing, datafunc, timestamps, conversion, ...) and counters of
+            steps, firings, deadlocks, truncations and the mean size of the enabled sets.
+            With workers the timings of all processes are summed up.
+        hooks
+            List of callables, each called with the SimulationStats of the run once it is finished
+            (e.g. to push stats.as_dict() into a monitoring system). Enables profiling as well.
+        rng_block_size
+            Draw durations, attribute values (np.random.choice, normal, binomial, gamma,
+            exponential, ...) and transition picks in blocks of this many values per distribution,
+            e.g. 4096, instead of one at a time. Reproducible for the same seed, but (as for the "batched" engine)
+            the log then depends on workers and chunk_size.
+        arrivals
+            Inter-arrival times of the cases, which then run concurrently: their mean in seconds
+            (exponentially distributed), e.g. 600, a distribution like "np.random.gamma(shape=2, scale=300)"
+            or one value per case. Cannot be combined with worktime or calendar.
+        resources
+            Dictionary activity -> number of resources executing it, e.g. {"approve": 2}, events
+            queue up while all are busy. A tuple of activities as key shares one pool among them.
+            Without arrivals all cases arrive at init_timestamp.
         '''
 
-        net, trans, links, initial_marking = self.createPetriNet(graph, name=name)
-        smap = self.build_smap(trans, links)
+        # nothing is timed or counted unless requested
+        stats = SimulationStats() if profile or hooks else None
+        if stats is not None:
+            start = stats.timer()
+        built = self.compile_graph(graph, name=name)
+        if stats is not None:
+            stats.add_time("build", start)
 
         if draw:
-            gviz = pn_visualizer.apply(net, initial_marking)
+            gviz = pn_visualizer.apply(built.net, built.initial_marking)
             pn_visualizer.view(gviz)
         
-        simulated_log = self.apply_playout(net, initial_marking, case_attrs=case_attrs, init_timestamp=init_timestamp, no_traces=no_traces, 
-                                           max_trace_length=max_trace_length, smap=smap, worktime=worktime, datafunc=datafunc)
-        df = log_converter.apply(simulated_log, variant=log_converter.Variants.TO_DATA_FRAME)
-        return df
+        if workers > 1:
+            if seed is None:
+                seed = np.random.SeedSequence().entropy
+            columns = parallel_playout(graph, name=name, no_traces=no_traces, workers=workers,
+                                       case_attrs=case_attrs, max_trace_length=max_trace_length,
+                                       datafunc=datafunc, engine=engine, seed=seed, stats=stats,
+                                       rng_block_size=rng_block_size)
+        else:
+            columns = self.simulate_traces(built.net, built.initial_marking, case_attrs=case_attrs, no_traces=no_traces,
+                                           max_trace_length=max_trace_length, final_marking=built.final_marking,
+                                           smap=built.smap, datafunc=datafunc, engine=engine, seed=seed,
+                                           cnet=None if engine == "pm4py" else built.compiled,
+                                           exprs=built.expressions(case_attrs), stats=stats,
+                                           rng_block_size=rng_block_size)
+        if stats is not None:
+            start = stats.timer()
+        timestamps, _ = self.event_timestamps(columns, init_timestamp=init_timestamp, worktime=worktime,
+                                              calendar=calendar, arrivals=arrivals, resources=resources, seed=seed)
+        if stats is not None:
+            start = stats.add_time("timestamps", start)
+
+        # the pm4py EventLog is only built on request, the DataFrame is built from the columns directly
+        if output == "eventlog":
+            log = columns.to_event_log(timestamps)
+        else:
+            log = columns.to_dataframe(timestamps)
+
+        if stats is None:
+            return log
+        stats.add_time("conversion", start)
+        for hook in hooks or []:
+            hook(stats)
+        return (log, stats) if profile else log
+
+    def play_token_game(self, no_traces=1, seed=None, batch_size=100, max_trace_length=500, first_case=None):
+        '''
+        Play out cases of PetriWidget.graph and stream their firings to the view, which animates them
+
+        Parameters
+        ------------------------------------
+        no_traces
+            Number of cases to play out
+        seed
+            If provided, the cases fire the same transitions as in generate_eventlog with this seed
+        batch_size
+            Maximum number of steps sent per message
+        max_trace_length
+            Maximum number of visible transitions fired per case
+        first_case
+            Case ID of the first case (default: continue after the cases played so far)
+
+        Conditions, event- and case-attributes and probabilities are taken into account
+        exactly as when simulating an event log. Every case is sent as a step holding its
+        initial marking {place id: tokens}, followed by the ids of the fired transitions.
+        With PetriWidget.binary_transport, the steps are sent as buffers (see encode_steps)
+        referring to the places and transitions listed in the first message.
+        Returns the list of steps.
+        '''
+
+        built = self.compile_graph(self.graph)
+        exprs = built.expressions(self.caseAttrs)
+        if first_case is None:
+            first_case = self._token_game_cases
+        self._token_game_cases = first_case + no_traces
+
+        # case attributes are drawn as in simulate_traces, so the cases match the simulated log
+        case_rows = None
+        if exprs.case_attr_specs:
+            case_values = sample_case_attrs(exprs.case_attr_specs, first_case, no_traces, seed=seed)
+            names = list(case_values)
+            case_rows = list(zip(*(case_values[name].tolist() for name in names)))
+
+        marking = {p.name: int(tokens) for p, tokens in built.initial_marking.items()}
+        cache = EnabledSetCache(TransitionSampler(built.smap), exprs)
+        steps = []
+        for i in range(first_case, first_case + no_traces):
+            rng = None if seed is None else case_random_state(seed, i)
+            namespace = exprs.new_case(rng, None if case_rows is None else zip(names, case_rows[i - first_case]))
+            steps.append({"case": i, "marking": marking})
+            for trans in self.play_case(built.net, built.initial_marking, built.final_marking, built.smap, exprs,
+                                        namespace, max_trace_length=max_trace_length, cnet=built.compiled, rng=rng,
+                                        cache=cache):
+                if trans.label is not None:
+                    # drawn as in simulate_traces to keep the random stream of the case in line
+                    self.event_duration(trans, rng)
+                steps.append(trans.name)
+
+        # batched, so long cases do not flood the frontend with one message per firing
+        place_ids, transition_ids = [p.name for p in built.net.places], [t.name for t in built.net.transitions]
+        for start in range(0, len(steps), batch_size):
+            batch, last = steps[start:start + batch_size], start + batch_size >= len(steps)
+            if not self.binary_transport:
+                self.send({"event": "token_game", "steps": batch, "last": last})
+                continue
+            content = {"event": "token_game", "binary": True, "last": last}
+            if start == 0:
+                content.update(places=place_ids, transitions=transition_ids)
+            self.send(content, encode_steps(batch, place_ids, transition_ids))
+        return steps
+
+    def generate_eventlog_async(self, graph, case_attrs=[], name="PetriNet", no_traces=100, max_trace_length=500,
+                                init_timestamp=1609502400, worktime=None, datafunc=None, engine="pm4py", seed=None,
+                                output="dataframe", calendar=None, rng_block_size=None, arrivals=None, resources=None,
+                                chunk_size=1000, progress_interval=0.25):
+        '''
+        Simulate an event log in a background thread, so the kernel keeps handling the widget meanwhile
+
+        Parameters are the same as for generate_eventlog, additionally:
+        chunk_size
+            Number of cases simulated between two progress reports (and checks for cancellation)
+        progress_interval
+            Minimum number of seconds between two updates of PetriWidget.progress
+
+        Returns a concurrent.futures.Future of the log (use "await asyncio.wrap_future(future)"
+        in a notebook cell to wait without blocking). PetriWidget.progress holds the state,
+        cases done, events per second and the estimated seconds left and is shown in the
+        toolbar. cancel_eventlog() (or the cancel button) stops the simulation after the
+        current chunk; the future then returns the log of the cases simulated so far.
+        '''
+
+        if self._background is not None and self._background.running():
+            raise Exception("Please wait for the running simulation to finish or cancel it first!")
+
+        built = self.compile_graph(graph, name=name)
+        exprs = built.expressions(case_attrs)
+        cnet = None if engine == "pm4py" else built.compiled
+
+        def report(progress):
+            self.progress = progress
+
+        def run(cancelled):
+            progress = SimulationProgress(no_traces, report, interval=progress_interval)
+            progress.update(0, 0)
+            columns = None
+            try:
+                for first_case in range(0, no_traces, chunk_size):
+                    if cancelled.is_set():
+                        break
+                    part = self.simulate_traces(built.net, built.initial_marking, case_attrs=case_attrs,
+                                                no_traces=min(chunk_size, no_traces - first_case),
+                                                max_trace_length=max_trace_length, final_marking=built.final_marking,
+                                                smap=built.smap, datafunc=datafunc, engine=engine, seed=seed,
+                                                first_case=first_case, cnet=cnet, exprs=exprs,
+                                                rng_block_size=rng_block_size)
+                    if columns is None:
+                        columns = part
+                    else:
+                        columns.extend(part)
+                    progress.update(part.no_cases, len(part))
+
+                if columns is None:
+                    columns = EventColumns()
+                case_arrivals = arrivals
+                if np.ndim(arrivals) > 0:
+                    # only the cases simulated before a cancellation arrive
+                    case_arrivals = arrivals[:columns.no_cases]
+                timestamps, _ = self.event_timestamps(columns, init_timestamp=init_timestamp, worktime=worktime,
+                                                      calendar=calendar, arrivals=case_arrivals, resources=resources,
+                                                      seed=seed)
+                log = columns.to_event_log(timestamps) if output == "eventlog" else columns.to_dataframe(timestamps)
+            except BaseException:
+                progress.update(0, 0, state="failed")
+                raise
+            progress.update(0, 0, state="cancelled" if cancelled.is_set() else "done")
+            return log
+
+        self._background = BackgroundSimulation(run).start()
+        return self._background.future
+
+    def cancel_eventlog(self):
+        """ Cancels the simulation running in the background, returns whether one was running """
+
+        if self._background is None or not self._background.running():
+            return False
+        self._background.cancel()
+        return True
+
+    def iter_eventlog(self, graph, case_attrs=[], name="PetriNet", no_traces=100, max_trace_length=500, init_timestamp=1609502400,
+                      worktime=None, datafunc=None, engine="pm4py", seed=None, chunk_size=10000, output="dataframe",
+                      calendar=None, profile=False, hooks=None, rng_block_size=None):
+        '''
+        Simulate an event log chunk by chunk, yielding every chunk as soon as its cases are finished
+
+        The memory is bounded by chunk_size instead of no_traces. Timestamps and case IDs continue
+        across the chunks, concatenating all chunks yields the log of generate_eventlog.
+
+        Parameters
+        --------------------------------------------------------
+        graph, case_attrs, name, no_traces, max_trace_length, init_timestamp, worktime, datafunc, engine, seed, calendar,
+        rng_block_size
+            See generate_eventlog
+        chunk_size
+            Number of traces per chunk
+        output
+            "dataframe" (default) to yield pandas DataFrames or "eventlog" to yield pm4py EventLogs
+        profile
+            If True, tuples (chunk, SimulationStats) are yielded, the stats accumulate over the chunks
+        hooks
+            List of callables, each called with the accumulated SimulationStats after every chunk
+        '''
+
+        stats = SimulationStats() if profile or hooks else None
+        if stats is not None:
+            start = stats.timer()
+        # the net is built and compiled only once for all chunks
+        built = self.compile_graph(graph, name=name)
+        cnet = None if engine == "pm4py" else built.compiled
+        exprs = built.expressions(case_attrs)
+        if stats is not None:
+            stats.add_time("build", start)
+
+        curr_timestamp = init_timestamp
+        rows = 0
+        for first_case in range(0, no_traces, chunk_size):
+            columns = self.simulate_traces(built.net, built.initial_marking, case_attrs=case_attrs,
+                                           no_traces=min(chunk_size, no_traces - first_case),
+                                           max_trace_length=max_trace_length, final_marking=built.final_marking,
+                                           smap=built.smap, datafunc=datafunc, engine=engine, seed=seed,
+                                           first_case=first_case, cnet=cnet, exprs=exprs, stats=stats,
+                                           rng_block_size=rng_block_size)
+            if stats is not None:
+                start = stats.timer()
+            timestamps, curr_timestamp = self.assign_timestamps(columns.durations, init_timestamp=curr_timestamp,
+                                                                worktime=worktime, calendar=calendar)
+            if stats is not None:
+                start = stats.add_time("timestamps", start)
+
+            if output == "eventlog":
+                chunk = columns.to_event_log(timestamps)
+            else:
+                chunk = columns.to_dataframe(timestamps)
+                # continue the row numbers of the previous chunks
+                chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+                rows += len(chunk)
+
+            if stats is None:
+                yield chunk
+                continue
+            stats.add_time("conversion", start)
+            for hook in hooks or []:
+                hook(stats)
+            yield (chunk, stats) if profile else chunk
 
     def strip_start(self, df, caseCol="case:id", prob=0.25, n=1):
         ''' 
@@ -440,17 +1110,7 @@ class PetriWidget(DOMWidget):
             
         '''
 
-        assert n!=0, "Please make sure to select n bigger than 0."
-        cases = list(df[caseCol].unique())
-        modify = random.sample(cases, int(prob*len(cases)))
-        droprange = [j+1 for j in range(n)]
-        
-        for i in modify:
-            dropnum = np.random.choice(droprange)
-            index = df[df[caseCol] == str(i)].index[:dropnum]
-            df.drop(labels=index, axis=0, inplace=True)
-        
-        return df
+        return noise.strip_start(df, caseCol=caseCol, prob=prob, n=n)
 
     def strip_end(self, df, caseCol="case:id", prob=0.25, n=1):
         ''' 
@@ -461,23 +1121,13 @@ class PetriWidget(DOMWidget):
         df: pandas DataFrame (the event log)
         caseCol: string      (the column holding the case ID)
         prob: float          (the percentage of traces to modify)
-        n: int               (maximum number of events to delete per trace)
+        n: int               (number of events to delete per trace)
             
         '''
         
-        assert n!=0, "Please make sure to choose n bigger than 0."
-        cases = list(df[caseCol].unique())
-        modify = random.sample(cases, int(prob*len(cases)))
-        droprange = [-j for j in range(n, n+1)]
-        
-        for i in modify:
-            dropnum = np.random.choice(droprange)
-            index = df[df[caseCol] == str(i)].index[dropnum:]
-            df.drop(labels=index, axis=0, inplace=True)
-        
-        return df
+        return noise.strip_end(df, caseCol=caseCol, prob=prob, n=n)
 
-    def addDoubles(self, df, caseCol="case:id", prob=0.25):
+    def addDoubles(self, df, caseCol="case:id", prob=0.25, timeCol="time:timestamp"):
         ''' 
         Add already occuring events once again
 
@@ -486,25 +1136,11 @@ class PetriWidget(DOMWidget):
         df: pandas DataFrame (the event log)
         caseCol: string      (the column holding the case ID)
         prob: float          (the percentage of traces to modify)
+        timeCol: string      (the column holding the timestamp)
 
         '''
 
-        cases = list(df[caseCol].unique())
-        modify = random.sample(cases, int(prob*len(cases)))
-
-        for i in modify:
-            trace = df[df[caseCol] == str(i)].index
-            if len(trace[1:]) > 1:
-                index = np.random.choice(trace[1:])
-                df.loc[index+0.5] = df.loc[index, :]
-                df.sort_index(inplace=True)
-
-                # adjusting time for all following events and traces
-                timedelta = df.loc[index]["time:timestamp"] - df.loc[index-1]["time:timestamp"]
-                df.loc[index+1:, "time:timestamp"] = df.loc[index+1:, "time:timestamp"] + timedelta
-                df.reset_index(drop=True, inplace=True)
-
-        return df
+        return noise.addDoubles(df, caseCol=caseCol, prob=prob, timeCol=timeCol)
 
     def addSilence(self, df, caseCol="case:id", prob=0.25):
         ''' 
@@ -518,19 +1154,9 @@ class PetriWidget(DOMWidget):
             
         '''
         
-        cases = list(df[caseCol].unique())
-        modify = random.sample(cases, int(prob*len(cases)))
-        
-        for i in modify:
-            trace = df[df[caseCol] == str(i)].index
-            if len(trace) > 2:
-                index = np.random.choice(trace[1:-1])
-                df.drop(labels=index, axis=0, inplace=True)
-                df.reset_index(drop=True, inplace=True)
-                
-        return df
+        return noise.addSilence(df, caseCol=caseCol, prob=prob)
 
-    def switchTimestamps(self, df, caseCol="case:id", prob=0.25):
+    def switchTimestamps(self, df, caseCol="case:id", prob=0.25, timeCol="time:timestamp"):
         ''' 
         Randomly switch timestamps of two activities of random traces
 
@@ -539,17 +1165,27 @@ class PetriWidget(DOMWidget):
         df: pandas DataFrame (the event log)
         caseCol: string      (the column holding the case ID)
         prob: float          (the percentage of traces to modify)
+        timeCol: string      (the column holding the timestamp)
             
         '''
             
-        cases = list(df[caseCol].unique())
-        modify = random.sample(cases, int(prob*len(cases)))
-        
-        for i in modify:
-            trace = df[df[caseCol] == str(i)].index
-            if len(trace) >= 2:
-                i1, i2 = np.random.choice(trace, size=2, replace=False)
-                a, b = df.iloc[i1, 1], df.iloc[i2, 1]
-                df.iloc[i1, 1], df.iloc[i2, 1] = b, a
-                    
-        return df
+        return noise.switchTimestamps(df, caseCol=caseCol, prob=prob, timeCol=timeCol)
+
+    def apply_noise(self, df, steps, caseCol="case:id", timeCol="time:timestamp", chunk_size=None):
+        ''' 
+        Apply several kinds of noise at once (planned together, the log is changed in one pass)
+
+        Parameters:
+        ------------------------------
+        df: pandas DataFrame (the event log)
+        steps: list          (tuples (name, prob) or (name, prob, kwargs), applied in this order,
+                              name is one of "start", "end", "silence", "switch" and "doubles",
+                              e.g. [("silence", 0.1), ("doubles", 0.05), ("start", 0.1, {"n": 2})])
+        caseCol: string      (the column holding the case ID)
+        timeCol: string      (the column holding the timestamp)
+        chunk_size: int      (if provided, process the log in chunks of this many cases)
+
+        Returns a new DataFrame, the given one is left unchanged.
+        '''
+
+        return noise.apply_noise(df, steps, caseCol=caseCol, timeCol=timeCol, chunk_size=chunk_size)
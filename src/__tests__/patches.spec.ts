@@ -0,0 +1,92 @@
+// Copyright (c) Jakob Bucksch
+// Distributed under the terms of the Modified BSD License.
+
+import { GraphPatcher } from '../patches';
+import { decodeGraph } from '../transport';
+
+function place(id: string, tokens = 0): any {
+  return { type: 'Place', id: id, name: 'p' + id, tokens: tokens };
+}
+
+function setup(cells: any[], binary = false) {
+  const sent: any[] = [];
+  const patcher = new GraphPatcher(
+    (content, buffers) => sent.push({ content: content, buffers: buffers }),
+    () => cells,
+    () => binary
+  );
+  return { sent, patcher };
+}
+
+describe('GraphPatcher', () => {
+  beforeEach(() => {
+    jest.useFakeTimers();
+  });
+
+  afterEach(() => {
+    jest.useRealTimers();
+  });
+
+  it('sends a burst of changes as one patch after the delay', () => {
+    const { sent, patcher } = setup([place('1')]);
+    patcher.schedule();
+    jest.advanceTimersByTime(GraphPatcher.delay - 10);
+    patcher.schedule();
+    jest.advanceTimersByTime(GraphPatcher.delay - 10);
+    patcher.schedule();
+    expect(sent).toEqual([]);
+    jest.advanceTimersByTime(GraphPatcher.delay);
+    expect(sent.length).toEqual(1);
+    expect(sent[0].content).toEqual({
+      event: 'graph_patch',
+      upsert: [place('1')],
+      remove: [],
+    });
+  });
+
+  it('only sends cells changed since the last patch', () => {
+    const cells = [place('1'), place('2'), place('3')];
+    const { sent, patcher } = setup(cells);
+    patcher.reset(cells);
+    patcher.flush();
+    expect(sent).toEqual([]);
+
+    cells[0] = place('1', 5);
+    cells.splice(1, 1);
+    cells.push(place('4'));
+    patcher.flush();
+    expect(sent.length).toEqual(1);
+    expect(sent[0].content).toEqual({
+      event: 'graph_patch',
+      upsert: [place('1', 5), place('4')],
+      remove: ['2'],
+    });
+  });
+
+  it('sends large patches as binary buffers', () => {
+    const cells: any[] = [];
+    for (let i = 0; i < GraphPatcher.binarySize; i++) {
+      cells.push(place(String(i), i));
+    }
+    const { sent, patcher } = setup(cells, true);
+    patcher.flush();
+    expect(sent.length).toEqual(1);
+    expect(sent[0].content.upsert).toBeUndefined();
+    expect(sent[0].content.remove).toEqual([]);
+    const buffers = sent[0].buffers.map(
+      (b: ArrayBufferView) =>
+        new DataView(b.buffer, b.byteOffset, b.byteLength)
+    );
+    expect(decodeGraph(sent[0].content.binary, buffers)).toEqual(cells);
+
+    cells.pop();
+    cells[0] = place('0', 1);
+    patcher.flush();
+    expect(sent.length).toEqual(2);
+    expect(sent[1].content).toEqual({
+      event: 'graph_patch',
+      upsert: [place('0', 1)],
+      remove: [String(GraphPatcher.binarySize - 1)],
+    });
+  });
+});
@@ -0,0 +1,72 @@
+// Copyright (c) Jakob Bucksch
+// Distributed under the terms of the Modified BSD License.
+
+// Incremental sync of the graph: only cells added, removed or changed since the last patch
+// are sent to Python (handled by PetriWidget._handle_frontend_msg, event "graph_patch").
+
+import { encodeGraph } from './transport';
+
+export type PatchSender = (content: any, buffers?: ArrayBufferView[]) => void;
+
+export class GraphPatcher {
+  // milliseconds to collect bursts of changes (e.g. dragging) into one patch
+  static delay = 50;
+  // changed cells from which a patch is sent as binary buffers (if binary() is true)
+  static binarySize = 200;
+
+  // the cells Python holds (as JSON), patches are computed against them
+  synced: { [id: string]: string } = {};
+  timer: any = null;
+
+  constructor(
+    private send: PatchSender,
+    private serialize: () => any[],
+    private binary: () => boolean = () => false
+  ) {}
+
+  reset(cells: any[]): void {
+    // the graph was set from Python
+    this.synced = {};
+    cells.forEach((cell: any) => {
+      this.synced[cell.id] = JSON.stringify(cell);
+    });
+  }
+
+  schedule(): void {
+    // every change restarts the delay, so a burst of changes is sent as one patch
+    clearTimeout(this.timer);
+    this.timer = setTimeout(() => this.flush(), GraphPatcher.delay);
+  }
+
+  flush(): void {
+    clearTimeout(this.timer);
+    this.timer = null;
+    const cells: { [id: string]: string } = {};
+    const upsert: any[] = [];
+    const remove: string[] = [];
+
+    this.serialize().forEach((cell: any) => {
+      const json = JSON.stringify(cell);
+      cells[cell.id] = json;
+      if (this.synced[cell.id] !== json) {
+        upsert.push(cell);
+      }
+    });
+    Object.keys(this.synced).forEach((id) => {
+      if (!(id in cells)) {
+        remove.push(id);
+      }
+    });
+    this.synced = cells;
+
+    if (this.binary() && upsert.length >= GraphPatcher.binarySize) {
+      const encoded = encodeGraph(upsert);
+      this.send(
+        { event: 'graph_patch', binary: encoded.content, remove: remove },
+        encoded.buffers
+      );
+    } else if (upsert.length > 0 || remove.length > 0) {
+      this.send({ event: 'graph_patch', upsert: upsert, remove: remove });
+    }
+  }
+}
@@ -0,0 +1,221 @@
+// Copyright (c) Jakob Bucksch
+// Distributed under the terms of the Modified BSD License.
+
+// Binary encoding of graphs and token game steps, the counterpart of ipypetrinet/transport.py
+// (which documents the layout of the buffers).
+
+export const GRAPH_LAYOUT = [
+  'strings',
+  'offsets',
+  'places',
+  'transitions',
+  'exectimes',
+  'expressions',
+  'links',
+  'probs',
+];
+
+class StringTable {
+  index: { [s: string]: number } = {};
+  strings: string[] = [];
+
+  add(s: any): number {
+    s = s === undefined || s === null ? '' : String(s);
+    let i = this.index[s];
+    if (i === undefined) {
+      i = this.index[s] = this.strings.length;
+      this.strings.push(s);
+    }
+    return i;
+  }
+
+  buffers(): Uint8Array[] {
+    const encoder = new TextEncoder();
+    const encoded = this.strings.map((s) => encoder.encode(s));
+    const offsets = new Uint32Array(encoded.length + 1);
+    encoded.forEach((b, i) => {
+      offsets[i + 1] = offsets[i] + b.length;
+    });
+    const bytes = new Uint8Array(offsets[encoded.length]);
+    encoded.forEach((b, i) => bytes.set(b, offsets[i]));
+    return [bytes, new Uint8Array(offsets.buffer)];
+  }
+}
+
+// typed array on the bytes of a received buffer (copied only if it is not aligned)
+function view<T>(
+  type: {
+    new (buffer: ArrayBuffer, offset?: number, length?: number): T;
+    BYTES_PER_ELEMENT: number;
+  },
+  b: DataView | ArrayBuffer
+): T {
+  const dv = b instanceof DataView ? b : new DataView(b);
+  const length = dv.byteLength / type.BYTES_PER_ELEMENT;
+  if (dv.byteOffset % type.BYTES_PER_ELEMENT === 0) {
+    return new type(dv.buffer, dv.byteOffset, length);
+  }
+  return new type(
+    dv.buffer.slice(dv.byteOffset, dv.byteOffset + dv.byteLength),
+    0,
+    length
+  );
+}
+
+function decodeStrings(
+  bytes: DataView | ArrayBuffer,
+  offsets: DataView | ArrayBuffer
+): string[] {
+  const data = view(Uint8Array, bytes);
+  const ends = view(Uint32Array, offsets);
+  const decoder = new TextDecoder();
+  const strings: string[] = [];
+  for (let i = 0; i + 1 < ends.length; i++) {
+    strings.push(decoder.decode(data.subarray(ends[i], ends[i + 1])));
+  }
+  return strings;
+}
+
+export function encodeGraph(
+  cells: any[]
+): { content: any; buffers: ArrayBufferView[] } {
+  // cells as returned by PetriView.serializeGraph
+  const table = new StringTable();
+  const places: number[] = [];
+  const transitions: number[] = [];
+  const exectimes: number[] = [];
+  const expressions: number[] = [];
+  const links: number[] = [];
+  const probs: number[] = [];
+  cells.forEach((c: any) => {
+    if (c.type === 'Place') {
+      places.push(table.add(c.id), table.add(c.name), Number(c.tokens) || 0);
+    } else if (c.type === 'Transition') {
+      const conditions = c.conditions || [];
+      const eventattrs = c.eventattrs || [];
+      transitions.push(
+        table.add(c.id),
+        table.add(c.name),
+        conditions.length,
+        eventattrs.length
+      );
+      exectimes.push(Number(c.exectime) || 0);
+      conditions.concat(eventattrs).forEach((e: any) =>
+        expressions.push(table.add(e))
+      );
+    } else {
+      links.push(table.add(c.id), table.add(c.source), table.add(c.target));
+      probs.push(Number(c.prob));
+    }
+  });
+  const content = {
+    layout: GRAPH_LAYOUT,
+    counts: [
+      places.length / 3,
+      transitions.length / 4,
+      links.length / 3,
+      table.strings.length,
+    ],
+  };
+  const buffers: ArrayBufferView[] = table.buffers();
+  buffers.push(
+    new Int32Array(places),
+    new Int32Array(transitions),
+    new Float64Array(exectimes),
+    new Int32Array(expressions),
+    new Int32Array(links),
+    new Float64Array(probs)
+  );
+  return { content, buffers };
+}
+
+export function decodeGraph(
+  content: any,
+  buffers: (DataView | ArrayBuffer)[]
+): any[] {
+  // cells in the order places, transitions, links (keys as in PetriView.serializeGraph)
+  const data: { [name: string]: DataView | ArrayBuffer } = {};
+  content.layout.forEach((name: string, i: number) => {
+    data[name] = buffers[i];
+  });
+  const table = decodeStrings(data.strings, data.offsets);
+  const places = view(Int32Array, data.places);
+  const transitions = view(Int32Array, data.transitions);
+  const exectimes = view(Float64Array, data.exectimes);
+  const expressions = view(Int32Array, data.expressions);
+  const links = view(Int32Array, data.links);
+  const probs = view(Float64Array, data.probs);
+
+  const cells: any[] = [];
+  for (let i = 0; i < places.length; i += 3) {
+    cells.push({
+      type: 'Place',
+      id: table[places[i]],
+      name: table[places[i + 1]],
+      tokens: places[i + 2],
+    });
+  }
+  let pos = 0;
+  for (let i = 0; i < transitions.length; i += 4) {
+    const conditions: string[] = [];
+    const eventattrs: string[] = [];
+    for (let j = 0; j < transitions[i + 2]; j++) {
+      conditions.push(table[expressions[pos++]]);
+    }
+    for (let j = 0; j < transitions[i + 3]; j++) {
+      eventattrs.push(table[expressions[pos++]]);
+    }
+    cells.push({
+      type: 'Transition',
+      id: table[transitions[i]],
+      name: table[transitions[i + 1]],
+      exectime: exectimes[i / 4],
+      conditions,
+      eventattrs,
+    });
+  }
+  for (let i = 0; i < links.length; i += 3) {
+    cells.push({
+      type: 'Link',
+      id: table[links[i]],
+      prob: probs[i / 3],
+      source: table[links[i + 1]],
+      target: table[links[i + 2]],
+    });
+  }
+  return cells;
+}
+
+export function deserializeGraph(value: any): any[] {
+  // PetriModel.graph is sent as list of cells or, with binary_transport, as buffers
+  if (value && value.binary) {
+    return decodeGraph(value.binary, value.buffers);
+  }
+  return value;
+}
+
+export function decodeSteps(
+  places: string[],
+  transitions: string[],
+  buffers: (DataView | ArrayBuffer)[]
+): any[] {
+  // steps in the format of the JSON messages: {case, marking} for new cases, transition ids otherwise
+  const codes = view(Int32Array, buffers[0]);
+  const cases = view(Int32Array, buffers[1]);
+  const markings = view(Int32Array, buffers[2]);
+  const steps: any[] = [];
+  let started = 0;
+  for (let i = 0; i < codes.length; i++) {
+    if (codes[i] >= 0) {
+      steps.push(transitions[codes[i]]);
+      continue;
+    }
+    const marking: { [id: string]: number } = {};
+    const row = started * places.length;
+    places.forEach((p, j) => {
+      marking[p] = markings[row + j];
+    });
+    steps.push({ case: cases[started++], marking });
+  }
+  return steps;
+}
@@ -4,6 +4,8 @@
 import { DOMWidgetModel, DOMWidgetView, ISerializers } from '@jupyter-widgets/base';
 import { MODULE_NAME, MODULE_VERSION } from './version';
 import { customTransition } from './customTrans';
+import { deserializeGraph, decodeSteps } from './transport';
+import { GraphPatcher } from './patches';
 
 import * as joint from '../node_modules/jointjs/dist/joint';
 import '../css/widget.css';
@@ -28,12 +30,15 @@ export class PetriModel extends DOMWidgetModel {
       _view_module_version: PetriModel.view_module_version,
       graph: [],
       caseAttrs: [],
+      progress: {},
+      binary_transport: false,
     };
   }
 
   static serializers: ISerializers = {
     ...DOMWidgetModel.serializers,
     // Add any extra serializers here
+    graph: { deserialize: deserializeGraph },
   };
 
   static model_name = 'PetriModel';
@@ -49,13 +54,42 @@ export class PetriView extends DOMWidgetView {
   static selectedCell: any;
   static gridSize: any;
   static paper: joint.dia.Paper;
-  static backupTokens: any;
+  static backupTokens: {[id: string]: number} = {};
   static dragStartPosition: any;
   static caseAttrs: Array<string> = [];
   static eventAttrs: Array<string> = [];
-  simulationId: any;
+  // places and transitions by id, kept up to date on add/remove instead of scanning all cells
+  static places: {[id: string]: any} = {};
+  static transitions: {[id: string]: any} = {};
+  // labels of the transitions currently listed in the event attribute tab
+  static transListKey = '';
+  // attributes of cells that only change the layout, not the net
+  static geometryKeys: Array<string> = ['position', 'size', 'angle', 'z', 'vertices'];
+  // large nets: links added beyond this many cells are drawn without jumps (which scale quadratically),
+  // labels are hidden below this zoom and cells are rendered if within this many pixels of the view
+  static largeModelCells = 1000;
+  static detailScale = 0.6;
+  static viewportPadding = 100;
+  static visibleArea: any = null;
+  static viewportFrame = 0;
+  // milliseconds per fired transition at speed 1, cases requested from Python at once,
+  // queued steps below which more are requested and steps replayed per frame at most
+  static tokenGameStepDelay = 1000;
+  static tokenGameCases = 5;
+  static tokenGameLowWater = 50;
+  static tokenGameMaxSteps = 20;
+  animationFrame: any;
+  playing = false;
+  awaitingSteps = false;
+  tokenQueue: any[] = [];
+  // places and transitions binary token game steps refer to
+  tokenGameTables: any = {places: [], transitions: []};
+  lastStep = 0;
+  speed = 1;
+  transitionLinks: {[id: string]: any} = {};
   width: any;
   height: any;
+  patcher: GraphPatcher;
 
   render() {
     // DROPDOWN GRAPH-BUTTON
@@ -123,6 +157,18 @@ export class PetriView extends DOMWidgetView {
     stopSimulation.addEventListener("click", (e:Event) => this.stopSimulation());
     stopSimulation.innerHTML = '<i class="fa fa-stop"></i>' + " Stop";
 
+    // speed of the token game: 1/4x ... 8x
+    const speed = document.createElement('input');
+    speed.type = 'range';
+    speed.id = 'speed';
+    speed.className = 'speed';
+    speed.min = '-2';
+    speed.max = '3';
+    speed.step = '1';
+    speed.value = '0';
+    speed.title = 'Speed';
+    speed.addEventListener('input', (e:Event) => { this.speed = Math.pow(2, Number(speed.value)); });
+
     var lockModel = document.createElement("button");
     lockModel.className = "button button1";
     lockModel.id = "lock";
@@ -134,6 +180,22 @@ export class PetriView extends DOMWidgetView {
     reloadSim.addEventListener("click", (e:Event) => this.resetSim());
     reloadSim.innerHTML = '<i class="fa fa-refresh"></i>' + " Reset";
 
+    // PROGRESS OF A SIMULATION RUNNING IN PYTHON (generate_eventlog_async)
+    const progress = document.createElement('span');
+    progress.id = 'progress';
+    progress.className = 'progress';
+    progress.style.display = 'none';
+
+    const progressText = document.createElement('span');
+    progressText.id = 'progressText';
+
+    const cancelEventlog = document.createElement('button');
+    cancelEventlog.id = 'cancelEventlog';
+    cancelEventlog.className = 'button button2';
+    cancelEventlog.addEventListener('click', (e:Event) => this.model.send({event: 'cancel_eventlog'}, {}));
+    cancelEventlog.innerHTML = '<i class="fa fa-times"></i>' + ' Cancel';
+    progress.append(progressText, cancelEventlog);
+
     var saveGraph = document.createElement("button");
     saveGraph.className = "button button2";
     saveGraph.addEventListener("click", (e:Event) => PetriView.showPopup("savePopup"));
@@ -632,7 +694,7 @@ export class PetriView extends DOMWidgetView {
     // ADD EVERYTHING TO NOTEBOOK HTML CODE
     this.el.append(dropdown, saveGraph, importJSON, saveIMG, downloadJSON, zoomIn, zoomOut, addPlace,
                    addTrans, addToken, removeToken, setLayout, clearAll, lockModel, simulate, 
-                   stopSimulation, reloadSim, addAttrs);
+                   stopSimulation, speed, reloadSim, addAttrs, progress);
     this.el.append(popup, linkPopup, savePopup, uploadPopup, downPopup, condPopup, attrPopup, layoutPopup);
 
     // Init paper, give it the respective ID, restrict its elements moving area and append it
@@ -640,6 +702,11 @@ export class PetriView extends DOMWidgetView {
     PetriView.paper.el.id = "paper";
     PetriView.paper.options.restrictTranslate = function(cellView) { return cellView.paper!.getArea(); }
     this.el.appendChild(PetriView.paper.el);
+    // only cells in the visible area are kept in the DOM, checked again whenever the view changes
+    PetriView.paper.on('translate scale resize', () => PetriView.onViewportChange());
+    PetriView.paper.el.addEventListener('mouseenter', () => PetriView.onViewportChange());
+    this.displayed.then(() => PetriView.onViewportChange());
+    PetriView.paper.unfreeze();
 
     // If clicked outside of any popup-form, do not display it anymore (under conditions)
     window.onclick = function(event: MouseEvent) {
@@ -684,12 +751,10 @@ export class PetriView extends DOMWidgetView {
       // while alt-key is pressed cell is locked and you can connect it by dragging with mouseclick
       // otherwise the cell stroke is simply colored red
       'cell:pointerdown': function (this: joint.dia.Paper, cellView: any, evt: any) { 
+        PetriView.paper.el.classList.toggle('connecting', evt.altKey);
         if (evt.altKey) {
-          jQuery('.joint-element').css("cursor", "crosshair")
           evt.data = cellView.model.position();
           this.findViewByModel(cellView.model).setInteractivity(false);
-        } else {
-          jQuery('.joint-element').css("cursor", "move");
         }
 
         // Reset "old" selectedCell-stroke if slectedCell is not the same as cellView
@@ -739,7 +804,7 @@ export class PetriView extends DOMWidgetView {
       // when mousebutton is lifted up while altkey is pressed a link is created between source and destination
       // if altkey is not pressed simply unlock the cell again (only if Lock-Button was not pressed)
       'cell:pointerup': function(this: joint.dia.Paper, cellView: any, evt: any, x: any, y: any) {
-          jQuery('.joint-element').css("cursor", "move");
+          PetriView.paper.el.classList.remove('connecting');
           if (document.querySelector('#lock')!.textContent == " Lock") {
             this.findViewByModel(cellView.model).setInteractivity(true);
           }
@@ -849,20 +914,36 @@ export class PetriView extends DOMWidgetView {
     });
 
     // UPDATE TYPESCRIPT FROM PYTHON: (alternatively on_some_change)
-    this.model.on("change:graph", this.updateGraph, this);
+    this.patcher = new GraphPatcher(
+      (content, buffers) => this.model.send(content, {}, buffers),
+      () => {
+        // the transitions listed in the event attribute tab follow the net
+        PetriView.updateTransList();
+        return PetriView.serializeGraph();
+      },
+      () => this.model.get('binary_transport')
+    );
+    this.patcher.reset(this.model.get('graph') || []);
+    this.model.on('change:graph', this.onModelGraphChange, this);
+    this.model.on('change:progress', this.onProgressChange, this);
+    this.model.on('msg:custom', this.onCustomMessage, this);
 
     // UPDATING PYTHON BASED ON TYPESCRIPT
-    PetriView.graph.on("change", this.updateGraph.bind(this), this);
-    PetriView.graph.on('change:property', this.updateGraph.bind(this), this);
+    PetriView.graph.on('change', this.onGraphChange.bind(this), this);
+    PetriView.graph.on('change:property', this.onGraphChange.bind(this), this);
+    PetriView.graph.on('add remove', this.updateGraph.bind(this), this);
   }
 
   private initWidget() {
     const namespace = joint.shapes
     PetriView.graph = new joint.dia.Graph({ cellNamespace: namespace });
+    PetriView.graph.on('add', (cell: any) => PetriView.indexCell(cell));
+    PetriView.graph.on('remove', (cell: any) => PetriView.unindexCell(cell));
+    PetriView.graph.on('reset', () => PetriView.reindexCells());
+    PetriView.reindexCells();
     PetriView.gridSize = 1;
     PetriView.selectedCell = null as any;
-    PetriView.backupTokens = null as any;
-    this.simulationId = 0;
+    this.animationFrame = 0;
     this.width = jQuery('#paper').width;
     this.height = jQuery('#paper').height;
 
@@ -878,6 +959,10 @@ export class PetriView extends DOMWidgetView {
       cellViewNamespace: namespace,                   // crucial for the tokens to get rendered when jointjs is loaded as a module !!!
       linkPinning: false,                             // prevent dangling links
       snapLabels: true,                               // make link-labels movable along the link
+      async: true,                                    // render cells in batches per animation frame
+      frozen: true,                                   // unfrozen once the paper is part of the page
+      sorting: joint.dia.Paper.sorting.APPROX,
+      viewport: (view: any) => PetriView.inViewport(view),
       interactive: {
         "linkMove": true,
         "labelMove": true,
@@ -896,7 +981,51 @@ export class PetriView extends DOMWidgetView {
     this.model.sync("update", this.model);
   }
 
+  private onProgressChange() {
+    // e.g. "Simulating: 5,000 / 20,000 cases, 95,000 events/s, 2s left"
+    const progress = this.model.get('progress') || {};
+    const el = this.el.querySelector('#progress') as HTMLElement;
+    if (!el || !progress.state) {
+      return;
+    }
+    let text = progress.cases.toLocaleString() + ' / ' + progress.total.toLocaleString() + ' cases';
+    if (progress.state === 'running') {
+      text = 'Simulating: ' + text + ', ' + Math.round(progress.events_per_s).toLocaleString() + ' events/s';
+      if (typeof progress.eta === 'number') {
+        text += ', ' + Math.ceil(progress.eta) + 's left';
+      }
+    } else {
+      text = progress.state.charAt(0).toUpperCase() + progress.state.slice(1) + ': ' + text;
+    }
+    (el.querySelector('#progressText') as HTMLElement).innerText = text;
+    (el.querySelector('#cancelEventlog') as HTMLElement).style.display = progress.state === 'running' ? '' : 'none';
+    el.style.display = '';
+  }
+
+  private onModelGraphChange() {
+    // the graph was set from Python, bring it back in line with the paper
+    this.patcher.reset(this.model.get('graph') || []);
+    this.updateGraph();
+  }
+
+  private onGraphChange(cell: any) {
+    // moving or resizing cells does not change the net
+    const changed = Object.keys((cell && cell.changed) || {});
+    if (changed.length > 0 && changed.every((key) => PetriView.geometryKeys.indexOf(key) !== -1)) {
+      return;
+    }
+    // tokens moved by the token game do not change the initial marking of the net
+    if (this.playing && changed.length > 0 && changed.every((key) => key === 'tokens')) {
+      return;
+    }
+    this.updateGraph();
+  }
+
   private updateGraph() {
+    this.patcher.schedule();
+  }
+
+  private static serializeGraph() {
     var allCells = PetriView.graph.getCells();
     // allCells.concat(PetriView.graph.getLinks());
     var res: any[] = []
@@ -929,9 +1058,7 @@ export class PetriView extends DOMWidgetView {
       }
     });
 
-    PetriView.updateTransList();
-    this.model.set("graph", res);
-    this.model.save_changes();
+    return res;
   }
 
   private showFileName() {
@@ -952,14 +1079,61 @@ export class PetriView extends DOMWidgetView {
     }
   }
 
-  private static getTokenlist(cells: any) {
-    var tokenlist: any[] = []
-    cells.forEach(function(c: any) {
-        if (c.attributes.type == "pn.Place") {
-            tokenlist.push(c.get("tokens"));
-        }
+  private static indexCell(cell: any) {
+    if (cell.attributes.type === 'pn.Place') {
+      PetriView.places[cell.id] = cell;
+      PetriView.backupTokens[cell.id] = cell.get('tokens');
+    } else if (cell.attributes.type === 'customTransition') {
+      PetriView.transitions[cell.id] = cell;
+    }
+  }
+
+  private static unindexCell(cell: any) {
+    delete PetriView.places[cell.id];
+    delete PetriView.transitions[cell.id];
+    delete PetriView.backupTokens[cell.id];
+  }
+
+  private static reindexCells() {
+    // tokens of the places (by id) restored by "Reset", i.e. the initial marking
+    PetriView.places = {};
+    PetriView.transitions = {};
+    PetriView.backupTokens = {};
+    PetriView.graph.getElements().forEach((cell: any) => PetriView.indexCell(cell));
+  }
+
+  private static onViewportChange() {
+    // at most once per frame, the paper is translated on every mouse move while dragging it
+    if (PetriView.viewportFrame) {
+      return;
+    }
+    PetriView.viewportFrame = requestAnimationFrame(() => {
+      PetriView.viewportFrame = 0;
+      const area = PetriView.paper.getArea();
+      // as long as the paper is not laid out (e.g. not yet displayed), all cells are rendered
+      PetriView.visibleArea = area.width > 0 && area.height > 0 ? area.inflate(PetriView.viewportPadding) : null;
+      PetriView.paper.el.classList.toggle('petri-lod', PetriView.paper.scale().sx < PetriView.detailScale);
+      PetriView.paper.checkViewport();
     });
-    return tokenlist
+  }
+
+  private static inViewport(view: any) {
+    const area = PetriView.visibleArea;
+    const model = view.model;
+    if (!area || !model) {
+      return true;
+    }
+    if (!model.isLink()) {
+      return area.intersect(model.getBBox()) !== null;
+    }
+    const source = model.getSourceElement();
+    const target = model.getTargetElement();
+    if (!source || !target) {
+      return true;
+    }
+    let bbox = source.getBBox().union(target.getBBox());
+    (model.vertices() || []).forEach((v: any) => { bbox = bbox.union(new joint.g.Rect(v.x, v.y, 1, 1)); });
+    return area.intersect(bbox) !== null;
   }
 
   private firstExample() {
@@ -1052,7 +1226,6 @@ export class PetriView extends DOMWidgetView {
     ]);
 
     this.updateGraph();
-    PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells());
   }
 
   private secondExample() {
@@ -1146,17 +1319,15 @@ export class PetriView extends DOMWidgetView {
     ]);
 
     this.updateGraph();
-    PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells())
   }
 
   private static link(a: any, b: any) {
     return new joint.shapes.pn.Link({
         source: { id: a.id, selector: '.root' },
         target: { id: b.id, selector: '.root' },
-        // creates little jumps over other links
-        connector: { name: 'jumpover',
-                     args: { size: 5 }
-        },
+        // creates little jumps over other links (not in large nets, every link is checked against all others)
+        connector: PetriView.graph.get('cells').length > PetriView.largeModelCells ? { name: 'normal' } :
+                   { name: 'jumpover', args: { size: 5 } },
         z: -1,
         attrs: { 
           text: {
@@ -1208,7 +1379,7 @@ export class PetriView extends DOMWidgetView {
         // console.log("You cannot add tokens to transitions! Please select a place instead.");
       } else {
         PetriView.selectedCell.set('tokens', PetriView.selectedCell.get('tokens') + 1);
-        PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells())
+        PetriView.backupTokens[PetriView.selectedCell.id] = PetriView.selectedCell.get('tokens');
       }
     } catch(e) {
       return "Nothing selected! Please select a place before adding a token."
@@ -1222,7 +1393,7 @@ export class PetriView extends DOMWidgetView {
       } else {
           if (PetriView.selectedCell.get('tokens') > 0) {
             PetriView.selectedCell.set('tokens', PetriView.selectedCell.get('tokens') - 1);
-            PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells())
+            PetriView.backupTokens[PetriView.selectedCell.id] = PetriView.selectedCell.get('tokens');
           }
       }
     } catch(e) {
@@ -1269,7 +1440,6 @@ export class PetriView extends DOMWidgetView {
       tokens: 0,
       position: { x: x, y: y }
     }));
-    PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells())
     this.updateGraph();
   }
 
@@ -1319,92 +1489,118 @@ export class PetriView extends DOMWidgetView {
   }
 
   private simulate() {
-    var transitions: any[] = []
-    for (const c of PetriView.graph.getCells()) {
-        if (c.attributes.type == "customTransition") {
-            transitions.push(c);
-        }
+    // the token game is played by the simulation engine in Python, which streams the fired transitions
+    if (this.playing) {
+      return;
     }
-    // shuffle transitions to randomize which one is chosen first
-    transitions = transitions.map((value) => ({ value, sort: Math.random() }))
-                                 .sort((a, b) => a.sort - b.sort)
-                                 .map(({ value }) => value);
-
-    function fireTransition(t: any, sec: any) {
-
-      var inbound = PetriView.graph.getConnectedLinks(t, { inbound: true });
-      var outbound = PetriView.graph.getConnectedLinks(t, { outbound: true });
-      var placesBefore = inbound.map(function(link) { return link.getSourceElement(); });
-      var placesAfter = outbound.map(function(link) { return link.getTargetElement(); });
-      var isFirable = true;
-
-      // shuffle Places before to ensure it is random which places get checked first
-      placesBefore = placesBefore.map((value) => ({ value, sort: Math.random() }))
-                                 .sort((a, b) => a.sort - b.sort)
-                                 .map(({ value }) => value);
-
-      placesBefore.forEach(function(p: any) {
-        if (p.get('tokens') === 0) {
-          isFirable = false;
-        } 
-      });
+    this.playing = true;
+    this.tokenQueue = [];
+    this.lastStep = 0;
+    // links of every transition are looked up once per game instead of on every firing
+    this.transitionLinks = {};
+    Object.keys(PetriView.transitions).forEach((id) => {
+      const c = PetriView.transitions[id];
+      this.transitionLinks[id] = {
+        inbound: PetriView.graph.getConnectedLinks(c, { inbound: true }),
+        outbound: PetriView.graph.getConnectedLinks(c, { outbound: true }),
+      };
+    });
+    this.requestSteps();
+    this.animationFrame = requestAnimationFrame((now: number) => this.animate(now));
+  }
 
-      if (isFirable) {
-        placesBefore.forEach(function(p: any) {
-          // Let the execution finish before adjusting the value of tokens. So that we can loop over all transitions
-          // and call fireTransition() on the original number of tokens. --> partially leads to negative tokens --> disabled for now
-          // setTimeout(function() {
-          //     p.set('tokens', p.get('tokens') - 1);
-          // }, 0);
-          p.set('tokens', p.get('tokens') - 1);
-
-          var links = inbound.filter(function(l) { return l.getSourceElement() === p; });
-          links.forEach(function(l) {
-              var token = joint.V('circle', { r: 5, fill: '#feb662' }).node;
-              (<joint.dia.LinkView> l.findView(PetriView.paper)).sendToken(token, sec * 1000);
-          });
-        });
-        
-        placesAfter.forEach(function(p: any) {
-          var links = outbound.filter(function(l) { return l.getTargetElement() === p; });
-          links.forEach(function(l) {
-              var token = joint.V('circle', { r: 5, fill: '#feb662' }).node;
-              (<joint.dia.LinkView> l.findView(PetriView.paper)).sendToken(token, sec * 1000, function() {
-                  p.set('tokens', p.get('tokens') + 1);
-              });
-          });
-        });
+  private requestSteps() {
+    if (!this.awaitingSteps) {
+      this.awaitingSteps = true;
+      this.model.send({event: 'play_token_game', cases: PetriView.tokenGameCases}, {});
+    }
+  }
+
+  private onCustomMessage(content: any, buffers: DataView[]) {
+    if (content.event === 'token_game' && content.places) {
+      this.tokenGameTables = {places: content.places, transitions: content.transitions};
+    }
+    if (content.event === 'token_game' && this.playing) {
+      const steps = content.binary ? decodeSteps(this.tokenGameTables.places, this.tokenGameTables.transitions, buffers)
+                                 : content.steps;
+      this.tokenQueue.push(...steps);
+      if (content.last) {
+        this.awaitingSteps = false;
       }
     }
+  }
 
-    // if (Math.random() < 0.7)
-    transitions.forEach(function(this: any, t) {
-      fireTransition(t, 1);
-    })
+  private animate(now: number) {
+    if (!this.playing) {
+      return;
+    }
+    const delay = PetriView.tokenGameStepDelay / this.speed;
+    // at high speeds several steps are replayed per frame
+    const due = this.lastStep ? Math.min(Math.floor((now - this.lastStep) / delay), PetriView.tokenGameMaxSteps) : 1;
+    for (let i = 0; i < due && this.tokenQueue.length > 0; i++) {
+      this.replayStep(this.tokenQueue.shift(), delay);
+      this.lastStep = now;
+    }
+    if (this.tokenQueue.length < PetriView.tokenGameLowWater) {
+      this.requestSteps();
+    }
+    this.animationFrame = requestAnimationFrame((now: number) => this.animate(now));
+  }
 
-    this.simulationId = setInterval(function() {
-      transitions.forEach(function(this: any, t) {
-        fireTransition(t, 1);
+  private replayStep(step: any, delay: number) {
+    if (typeof step !== 'string') {
+      // a new case starts in its initial marking, only places whose tokens differ are updated
+      Object.keys(PetriView.places).forEach((id) => {
+        const tokens = step.marking[id] || 0;
+        if (PetriView.places[id].get('tokens') !== tokens) {
+          PetriView.places[id].set('tokens', tokens);
+        }
       });
-    }, 2000);
+      return;
+    }
+    const links = this.transitionLinks[step];
+    if (!links) {
+      return;
+    }
+    // the counts change right away, the tokens moving along the links are only drawn
+    const duration = Math.min(delay, PetriView.tokenGameStepDelay);
+    links.inbound.forEach((l: any) => {
+      const p = l.getSourceElement();
+      p.set('tokens', p.get('tokens') - 1);
+      PetriView.sendToken(l, duration);
+    });
+    links.outbound.forEach((l: any) => {
+      const p = l.getTargetElement();
+      p.set('tokens', p.get('tokens') + 1);
+      PetriView.sendToken(l, duration);
+    });
+  }
+
+  private static sendToken(link: any, duration: number) {
+    // tokens are only drawn on links that are rendered (i.e. in the visible area)
+    const view = <joint.dia.LinkView> PetriView.paper.findViewByModel(link);
+    if (view && view.el.isConnected) {
+      view.sendToken(joint.V('circle', { r: 5, fill: '#feb662' }).node, duration);
+    }
   }
 
   private stopSimulation() {
-    clearInterval(this.simulationId);
+    this.playing = false;
+    cancelAnimationFrame(this.animationFrame);
+    this.tokenQueue = [];
+    this.awaitingSteps = false;
   }  
 
   private lockModel() {
     if (document.querySelector('#lock')!.textContent == " Lock") {
       document.querySelector('#lock')!.innerHTML = '<i class="fa fa-lock"></i>' + " Unlock"
       PetriView.paper.setInteractivity(function() { return false });
-
-      jQuery('.joint-element').css("cursor", "pointer");
-      jQuery('.marker-arrowheads').css("cursor", "pointer");
-      jQuery('.marker-vertices').css("cursor", "pointer");
-      jQuery('.joint-link.joint-theme-dark .connection-wrap').css("cursor", "pointer");
+      // a class instead of styling every cell, so cells rendered later get the cursor as well
+      PetriView.paper.el.classList.add('locked');
     } else {
       document.querySelector('#lock')!.innerHTML = '<i class="fa fa-unlock"></i>' + " Lock"
       PetriView.paper.setInteractivity(function() { return true });
+      PetriView.paper.el.classList.remove('locked');
     }
   }
 
@@ -1412,12 +1608,11 @@ export class PetriView extends DOMWidgetView {
     PetriView.paper.translate(0, 0);
     PetriView.paper.scale(1, 1, 0, 0);
 
-    var i = 0
-    PetriView.graph.getCells().forEach(function(this: any, c) {
-        if (c.attributes.type == "pn.Place") {
-            c.set('tokens', PetriView.backupTokens[i]);
-            i+=1
-        }
+    Object.keys(PetriView.places).forEach((id) => {
+      const tokens = PetriView.backupTokens[id];
+      if (tokens !== undefined && PetriView.places[id].get('tokens') !== tokens) {
+        PetriView.places[id].set('tokens', tokens);
+      }
     });
   }
 
@@ -1602,10 +1797,6 @@ export class PetriView extends DOMWidgetView {
 				}
       }
     }
-    PetriView.graph.getCells().forEach((cell) => {
-      
-    })
-    
     // Check if auto-layout should apply (note that the method is called recursive, so != 0 is crucial)
     if ((placePos.size <= 2 && placePos.size != 0) || (transPos.size <= 2 && transPos.size != 0)) {
       joint.layout.DirectedGraph.layout(PetriView.graph, { dagre: dagre, graphlib: graphlib, setVertices: true, marginX: 20, marginY: 30 });
@@ -1627,6 +1818,8 @@ export class PetriView extends DOMWidgetView {
     let fileType = files[0]["name"].split(".")[1];
     var reader = new FileReader();
     reader.onload = function(e: any) { 
+      // nothing is rendered while the cells are added, afterwards they are rendered in batches
+      PetriView.paper.freeze();
       if (fileType == "pnml") {
         PetriView.graph.clear();
         PetriView.caseAttrs = [];
@@ -1635,7 +1828,6 @@ export class PetriView extends DOMWidgetView {
         let xmlPnml = xmlDoc.getElementsByTagName("pnml")[0];
 
         PetriView.parsePNML(xmlPnml);
-        PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells());
         PetriView.updateAttrsFrontend("caseAttrsList");
       }
       else {
@@ -1645,19 +1837,18 @@ export class PetriView extends DOMWidgetView {
 
         delete jsonstring["caseAttributes"];
         PetriView.graph.fromJSON(jsonstring);
-        PetriView.backupTokens = PetriView.getTokenlist(PetriView.graph.getCells());
       }
 
-      PetriView.graph.getCells().forEach(function(c) {
-        if (c.attributes.type == "customTransition") {
-          // Just to trigger PetriView.graph.on("change", ...)
-          c.attr({"body": { "stroke": "#7c68fc" }});
+      Object.keys(PetriView.transitions).forEach((id) => {
+        const c = PetriView.transitions[id];
+        // Just to trigger PetriView.graph.on("change", ...)
+        c.attr({'body': { 'stroke': '#7c68fc' }});
 
-          c.attributes.eventAttrs.forEach(function(event: string) {
-            PetriView.eventAttrs.push(c.attributes.attrs!["label"]!["text"] + " -> " + event);
-          });
-        }
+        c.attributes.eventAttrs.forEach((event: string) => {
+          PetriView.eventAttrs.push(c.attr('label/text') + ' -> ' + event);
+        });
       });
+      PetriView.paper.unfreeze();
 
       PetriView.updateAttrsFrontend("eventAttrsList");
       document.getElementById("uploadPopup")!.style.display = "none";
@@ -1809,9 +2000,11 @@ export class PetriView extends DOMWidgetView {
   }
 
   private static unPNMLify(fileName: string) {
+    PetriView.paper.freeze();
     PetriView.graph.clear();
     const pnmlString = localStorage.getItem(fileName)!;
     PetriView.graph.fromJSON(JSON.parse(pnmlString));
+    PetriView.paper.unfreeze();
 
     // let parser = new DOMParser();
     // var xmlDoc = parser.parseFromString(pnmlString, "text/xml");
@@ -1821,7 +2014,9 @@ export class PetriView extends DOMWidgetView {
 
   private static unJSONify(fileName: string) {
     const jsonstring = localStorage.getItem(fileName)!;
+    PetriView.paper.freeze();
     PetriView.graph.fromJSON(JSON.parse(jsonstring));
+    PetriView.paper.unfreeze();
   }
 
   private saveIMG() {
@@ -1831,6 +2026,8 @@ export class PetriView extends DOMWidgetView {
     $(".tool-options").css("display", "none");
     $(".marker-vertices").css("display", "none");
 
+    // cells outside the visible area are not in the DOM, render all of them for the image
+    PetriView.paper.dumpViews({ viewport: () => true });
     let svg = (<Node> document.querySelector('svg'));
     if (svg == null) {
       console.log("There is no SVG to be saved.");
@@ -2027,14 +2224,13 @@ export class PetriView extends DOMWidgetView {
   }
 
   private static updateGraphEventAttrs() {
-    PetriView.graph.getCells().forEach(function(c) {
-      if (c.attributes.type == "customTransition") {
-        c.attributes.eventAttrs = [];
-        PetriView.eventAttrs.forEach(function(item) {
-          var event = item.replace(": ", "=").split(" -> ");
-          if (event[0] == c.attributes.attrs!["label"]!["text"]) { c.attributes.eventAttrs.push(event[1]) }
-        });
-      }
+    Object.keys(PetriView.transitions).forEach((id) => {
+      const c = PetriView.transitions[id];
+      c.attributes.eventAttrs = [];
+      PetriView.eventAttrs.forEach((item) => {
+        const event = item.replace(': ', '=').split(' -> ');
+        if (event[0] === c.attr('label/text')) { c.attributes.eventAttrs.push(event[1]) }
+      });
     });
     PetriView.graph.set('cellNamespace', joint.shapes);
   }
@@ -2064,14 +2260,14 @@ export class PetriView extends DOMWidgetView {
   }
 
   private static updateTransList() {
+    const transitions: any = Object.keys(PetriView.transitions).map((id) => PetriView.transitions[id].attr('label/text'));
+    // the list is only rebuilt if the transitions changed (it is updated with every patch sent to Python)
+    const key = JSON.stringify(transitions);
+    if (key === PetriView.transListKey && (document.getElementById('transList') as HTMLElement).childElementCount === transitions.length) {
+      return;
+    }
+    PetriView.transListKey = key;
     $("#transList").empty();
-    var transitions: any = [];
-
-    PetriView.graph.getCells().forEach(function(c) {
-      if (c.attributes.type == "customTransition") {
-        transitions.push(c.attributes.attrs!["label"]!["text"]);
-      }
-    });
 
     transitions.forEach(function (trans: string) {
       var listEl = document.createElement("div");